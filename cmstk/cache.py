@@ -0,0 +1,192 @@
+from contextlib import closing
+import hashlib
+import os
+import pickle
+import sqlite3
+import time
+from typing import Any, Callable, Optional
+
+_schema = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime INTEGER NOT NULL,
+    digest TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS results (
+    digest TEXT NOT NULL,
+    key TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    accessed REAL NOT NULL,
+    PRIMARY KEY (digest, key, version)
+);
+CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed);
+"""
+
+
+class ResultCache(object):
+    """SQLite backed cache of values extracted from files.
+
+    Notes:
+        Values are keyed by a hash of the content of the file they were
+        extracted from, the name of the value and the version of the parser
+        which produced it so a moved or copied file reuses its entries and a
+        changed parser never returns stale values. The hash of each file is
+        stored with its size and modification time and is only recomputed
+        when either of them changes.
+
+        The least recently used values are evicted once the total size of
+        the stored values exceeds `max_size`. The same pass removes the
+        hashes of files which no longer exist or which no value refers to.
+
+        A new connection is opened for each operation so that a cache can be
+        shared by forked worker processes.
+
+    Args:
+        path: Filepath to the SQLite database.
+        - Defaults to ~/.cache/cmstk/results.sqlite
+        max_size: Maximum total size of the stored values in bytes.
+
+    Attributes:
+        path: Filepath to the SQLite database.
+        max_size: Maximum total size of the stored values in bytes.
+    """
+
+    def __init__(self,
+                 path: Optional[str] = None,
+                 max_size: int = 1073741824) -> None:
+        if path is None:
+            path = os.path.join(os.path.expanduser("~"), ".cache", "cmstk",
+                                "results.sqlite")
+        directory = os.path.dirname(path)
+        if directory != "" and not os.path.exists(directory):
+            os.makedirs(directory)
+        self.path = path
+        self.max_size = max_size
+        with closing(self._connect()) as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(_schema)
+
+    def fetch(self, filepath: str, key: str, version: int,
+              compute: Callable[[], Any]) -> Any:
+        """Returns a cached value or computes and stores it.
+
+        Args:
+            filepath: Filepath to the file the value is extracted from.
+            key: Name of the value.
+            version: Version of the parser which produces the value.
+            compute: Produces the value if it is not cached.
+        """
+        digest = self.digest(filepath)
+        with closing(self._connect()) as connection:
+            row = connection.execute(
+                "SELECT value FROM results "
+                "WHERE digest = ? AND key = ? AND version = ?",
+                (digest, key, version)).fetchone()
+            if row is not None:
+                with connection:
+                    connection.execute(
+                        "UPDATE results SET accessed = ? "
+                        "WHERE digest = ? AND key = ? AND version = ?",
+                        (time.time(), digest, key, version))
+                return pickle.loads(row[0])
+        value = compute()
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        with closing(self._connect()) as connection:
+            with connection:
+                connection.execute(
+                    "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?)",
+                    (digest, key, version, blob, len(blob), time.time()))
+                self._evict(connection)
+        return value
+
+    def digest(self, filepath: str) -> str:
+        """Returns the content hash of a file.
+
+        Notes:
+            The stored hash is returned without reading the file if its size
+            and modification time are unchanged.
+
+        Args:
+            filepath: Filepath to the file.
+        """
+        path = os.path.abspath(filepath)
+        stat = os.stat(path)
+        with closing(self._connect()) as connection:
+            row = connection.execute(
+                "SELECT digest FROM files "
+                "WHERE path = ? AND size = ? AND mtime = ?",
+                (path, stat.st_size, stat.st_mtime_ns)).fetchone()
+            if row is not None:
+                return row[0]
+            h = hashlib.blake2b(digest_size=20)
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(1048576), b""):
+                    h.update(chunk)
+            digest = h.hexdigest()
+            with connection:
+                connection.execute(
+                    "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)",
+                    (path, stat.st_size, stat.st_mtime_ns, digest))
+        return digest
+
+    def clear(self) -> None:
+        """Removes every stored value and file hash."""
+        with closing(self._connect()) as connection:
+            with connection:
+                connection.execute("DELETE FROM results")
+                connection.execute("DELETE FROM files")
+
+    @property
+    def size(self) -> int:
+        """Total size of the stored values in bytes."""
+        with closing(self._connect()) as connection:
+            row = connection.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM results").fetchone()
+        return int(row[0])
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=60.0)
+
+    def _evict(self, connection: sqlite3.Connection) -> None:
+        # drop the least recently used values until the cache fits
+        total = connection.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+        if total <= self.max_size:
+            return
+        rows = connection.execute(
+            "SELECT rowid, size FROM results ORDER BY accessed").fetchall()
+        evicted = []
+        for rowid, size in rows:
+            if total <= self.max_size:
+                break
+            evicted.append((rowid, ))
+            total -= size
+        connection.executemany("DELETE FROM results WHERE rowid = ?", evicted)
+        # drop the hashes of files which are gone or no longer referenced
+        connection.execute("DELETE FROM files WHERE digest NOT IN "
+                           "(SELECT digest FROM results)")
+        paths = connection.execute("SELECT path FROM files").fetchall()
+        missing = [(path, ) for path, in paths if not os.path.exists(path)]
+        connection.executemany("DELETE FROM files WHERE path = ?", missing)
+
+
+_default_cache: Optional[ResultCache] = None
+
+
+def get_result_cache() -> Optional[ResultCache]:
+    """Returns the cache used by the file wrappers or None if disabled."""
+    return _default_cache
+
+
+def set_result_cache(cache: Optional[ResultCache]) -> None:
+    """Sets the cache used by the file wrappers.
+
+    Args:
+        cache: The cache to use.
+        - None disables caching.
+    """
+    global _default_cache
+    _default_cache = cache
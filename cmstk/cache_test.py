@@ -0,0 +1,108 @@
+from cmstk.cache import ResultCache, get_result_cache, set_result_cache
+from cmstk.vasp.oszicar import OszicarFile
+from contextlib import closing
+import os
+import pytest
+import shutil
+import sqlite3
+
+
+def test_result_cache():
+    """Tests storing, reusing and evicting extracted values."""
+    db_path = "test_cache.sqlite"
+    path = "test_cache.txt"
+    with open(path, "w") as f:
+        f.write("content\n")
+    cache = ResultCache(db_path)
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return {"value": len(calls)}
+
+    assert cache.fetch(path, "key", 1, compute) == {"value": 1}
+    assert cache.fetch(path, "key", 1, compute) == {"value": 1}
+    # a new parser version is recomputed
+    assert cache.fetch(path, "key", 2, compute) == {"value": 2}
+    # identical content is found under a different path
+    shutil.copy(path, "test_cache_copy.txt")
+    assert cache.fetch("test_cache_copy.txt", "key", 1, compute) == {
+        "value": 1
+    }
+    with open(path, "w") as f:
+        f.write("changed content\n")
+    assert cache.fetch(path, "key", 1, compute) == {"value": 3}
+    assert len(calls) == 3
+    # the least recently used values are evicted
+    cache.max_size = cache.size
+    cache.fetch("test_cache_copy.txt", "key", 1, compute)
+    cache.fetch(path, "other", 1, compute)
+    assert cache.size <= cache.max_size
+    cache.fetch("test_cache_copy.txt", "key", 1, compute)
+    cache.fetch(path, "key", 1, compute)
+    assert len(calls) == 4
+    cache.fetch("test_cache_copy.txt", "key", 2, compute)
+    assert len(calls) == 5
+    # the hashes of removed files are dropped when values are evicted
+    removed = "test_cache_removed.txt"
+    with open(removed, "w") as f:
+        f.write("removed content\n")
+    cache.fetch(removed, "key", 1, compute)
+    os.remove(removed)
+    cache.fetch(path, "third", 1, compute)
+    with closing(sqlite3.connect(db_path)) as connection:
+        rows = connection.execute("SELECT path FROM files").fetchall()
+    paths = [row[0] for row in rows]
+    assert os.path.abspath(removed) not in paths
+    assert os.path.abspath(path) in paths
+    cache.clear()
+    assert cache.size == 0
+    os.remove("test_cache_copy.txt")
+    os.remove(path)
+    for suffix in ["", "-wal", "-shm"]:
+        if os.path.exists(db_path + suffix):
+            os.remove(db_path + suffix)
+
+
+def test_result_cache_file_wrappers(monkeypatch):
+    """Tests that the file wrappers reuse cached final values."""
+    db_path = "test_cache.sqlite"
+    path = "test_cache.OSZICAR"
+    copy_path = "test_cache_copy.OSZICAR"
+    with open(path, "w") as f:
+        f.write("   1 F= -.13644212E+03 E0= -.13644801E+03  d E =-.13E+03\n")
+    calls = []
+    read_final_values = OszicarFile._read_final_values
+
+    def counted(oszicar):
+        calls.append(oszicar.filepath)
+        return read_final_values(oszicar)
+
+    monkeypatch.setattr(OszicarFile, "_read_final_values", counted)
+    assert get_result_cache() is None
+    OszicarFile(path).final_values
+    OszicarFile(path).final_values
+    # every read is parsed without a cache
+    assert calls == [path, path]
+    set_result_cache(ResultCache(db_path))
+    try:
+        assert OszicarFile(path).final_values["F"] == pytest.approx(-136.44212)
+        assert OszicarFile(path).final_values["F"] == pytest.approx(-136.44212)
+        assert calls == [path, path, path]
+        # identical content with a different path hits the cache
+        shutil.copy(path, copy_path)
+        values = OszicarFile(copy_path).final_values
+        assert values["F"] == pytest.approx(-136.44212)
+        assert calls == [path, path, path]
+        # changed content is parsed again
+        with open(copy_path, "a") as f:
+            f.write("   2 F= -.13700000E+03 E0= -.13700000E+03  d E =-.1E+01\n")
+        assert OszicarFile(copy_path).final_values["F"] == pytest.approx(-137.0)
+        assert calls == [path, path, path, copy_path]
+    finally:
+        set_result_cache(None)
+    os.remove(copy_path)
+    os.remove(path)
+    for suffix in ["", "-wal", "-shm"]:
+        if os.path.exists(db_path + suffix):
+            os.remove(db_path + suffix)
@@ -1,5 +1,203 @@
 from cmstk.filetypes import TextFile
-from typing import Dict, List, Optional, Tuple
+import numpy as np
+from scipy.interpolate import CubicSpline
+from typing import Callable, Dict, List, Optional, TextIO, Tuple
+
+
+def _read_tabulation(lines: List[str], n_sections: int,
+                     section_length: int) -> Tuple[List[str], np.ndarray]:
+    """Bulk parses the body of an EAM tabulation.
+
+    Notes:
+        Each of the `n_sections` element sections begins with a four token
+        descriptor followed by `section_length` values. Any values trailing
+        the element sections (the pair functions) are returned at the end of
+        the value array.
+
+    Args:
+        lines: Lines of the body section.
+        n_sections: Number of element sections.
+        section_length: Number of values in each element section.
+    """
+    tokens = np.array(" ".join(lines).split())
+    offsets = np.arange(n_sections) * (section_length + 4)
+    descriptors = [" ".join(tokens[o:o + 4]) for o in offsets]
+    mask = np.ones(len(tokens), dtype=bool)
+    mask[(offsets[:, np.newaxis] + np.arange(4)).ravel()] = False
+    return descriptors, tokens[mask].astype(float)
+
+
+def _write_tabulation(f: TextIO, values: np.ndarray) -> None:
+    """Writes tabulated values one per line without intermediate strings."""
+    np.asarray(values, dtype=float).tofile(f, sep="\n", format="%.16e")
+    f.write("\n")
+
+
+_funcfl_conversion = 27.2 * 0.529  # Hartree * Bohr in eV * Angstrom
+
+_no_comment = "no comment specified"
+
+TabulatedFunction = Callable[[np.ndarray], np.ndarray]
+
+
+class EamTable(object):
+    """Array-backed representation of an EAM tabulation.
+
+    Notes:
+        This is the common representation shared by the setfl, Finnis-Sinclair
+        and funcfl file wrappers. Conversion between formats goes through this
+        object without leaving numpy.
+
+    Args:
+        comments: Comment lines describing the potential.
+        symbols: IUPAC chemical symbols of the tabulation.
+        symbol_descriptors: Descriptive information for each symbol.
+        - Format:
+            {atomic number} {atomic mass} {lattice parameter} {structure}
+        n_rho: Number of points at which the electron density is evaluated.
+        d_rho: Distance between points at which the electron density is
+        evaluated.
+        n_r: Number of points at which the interatomic potential and embedding
+        function are evaluated.
+        d_r: Distance between points at which the interatomic and embedding
+        function are evaluated.
+        cutoff: Cutoff distance for all functions.
+        embedding_function: Embedding function of each symbol.
+        - Shape: (n_symbols, n_rho)
+        density_function: Density contributed by the first symbol at an atom
+        of the second symbol.
+        - Shape: (n_symbols, n_symbols, n_r)
+        pair_function: Symmetric interatomic potential (r * phi) between each
+        symbol pair.
+        - Shape: (n_symbols, n_symbols, n_r)
+
+    Attributes:
+        comments: Comment lines describing the potential.
+        symbols: IUPAC chemical symbols of the tabulation.
+        symbol_descriptors: Descriptive information for each symbol.
+        n_rho: Number of points at which the electron density is evaluated.
+        d_rho: Distance between points at which the electron density is
+        evaluated.
+        n_r: Number of points at which the interatomic potential and embedding
+        function are evaluated.
+        d_r: Distance between points at which the interatomic and embedding
+        function are evaluated.
+        cutoff: Cutoff distance for all functions.
+        embedding_function: Embedding function of each symbol.
+        density_function: Density contributed by the first symbol at an atom
+        of the second symbol.
+        pair_function: Symmetric interatomic potential (r * phi) between each
+        symbol pair.
+        n_symbols: Number of symbols in the tabulation.
+    """
+
+    def __init__(self, comments: List[str], symbols: List[str],
+                 symbol_descriptors: Dict[str, str], n_rho: int, d_rho: float,
+                 n_r: int, d_r: float, cutoff: float,
+                 embedding_function: np.ndarray, density_function: np.ndarray,
+                 pair_function: np.ndarray) -> None:
+        n_symbols = len(symbols)
+        if embedding_function.shape != (n_symbols, n_rho):
+            err = "embedding_function must have shape (n_symbols, n_rho)."
+            raise ValueError(err)
+        if density_function.shape != (n_symbols, n_symbols, n_r):
+            err = ("density_function must have shape "
+                   "(n_symbols, n_symbols, n_r).")
+            raise ValueError(err)
+        if pair_function.shape != (n_symbols, n_symbols, n_r):
+            err = "pair_function must have shape (n_symbols, n_symbols, n_r)."
+            raise ValueError(err)
+        self.comments = comments
+        self.symbols = symbols
+        self.symbol_descriptors = symbol_descriptors
+        self.n_rho = n_rho
+        self.d_rho = d_rho
+        self.n_r = n_r
+        self.d_r = d_r
+        self.cutoff = cutoff
+        self.embedding_function = embedding_function
+        self.density_function = density_function
+        self.pair_function = pair_function
+
+    @property
+    def n_symbols(self) -> int:
+        return len(self.symbols)
+
+    def resample(self,
+                 n_rho: int,
+                 d_rho: float,
+                 n_r: int,
+                 d_r: float,
+                 cutoff: Optional[float] = None) -> 'EamTable':
+        """Returns a copy of the tabulation on a new grid.
+
+        Notes:
+            All functions sharing a grid are interpolated together by a single
+            cubic spline evaluation.
+
+        Args:
+            n_rho: Number of points at which the electron density is evaluated.
+            d_rho: Distance between points at which the electron density is
+            evaluated.
+            n_r: Number of points at which the interatomic potential and
+            embedding function are evaluated.
+            d_r: Distance between points at which the interatomic and
+            embedding function are evaluated.
+            cutoff: Cutoff distance for all functions.
+            - Defaults to the existing cutoff.
+
+        Raises:
+            ValueError
+            - The new grid extends beyond the existing grid.
+        """
+        rho = np.arange(self.n_rho) * self.d_rho
+        r = np.arange(self.n_r) * self.d_r
+        new_rho = np.arange(n_rho) * d_rho
+        new_r = np.arange(n_r) * d_r
+        tolerance = 1 + 1e-12
+        if new_rho[-1] > rho[-1] * tolerance or new_r[-1] > r[-1] * tolerance:
+            err = "The new grid extends beyond the existing grid."
+            raise ValueError(err)
+        if cutoff is None:
+            cutoff = self.cutoff
+        embedding = CubicSpline(rho, self.embedding_function, axis=1)(new_rho)
+        shape = (self.n_symbols, self.n_symbols, n_r)
+        r_functions = np.concatenate(
+            (self.density_function.reshape((-1, self.n_r)),
+             self.pair_function.reshape((-1, self.n_r))))
+        r_functions = CubicSpline(r, r_functions, axis=1)(new_r)
+        n_functions = self.n_symbols**2
+        density = r_functions[:n_functions].reshape(shape)
+        pair = r_functions[n_functions:].reshape(shape)
+        return EamTable(list(self.comments), list(self.symbols),
+                        dict(self.symbol_descriptors), n_rho, d_rho, n_r, d_r,
+                        cutoff, embedding, density, pair)
+
+    def subset(self, symbols: List[str]) -> 'EamTable':
+        """Returns a copy of the tabulation restricted to the given symbols.
+
+        Args:
+            symbols: IUPAC chemical symbols to keep in the desired order.
+
+        Raises:
+            ValueError
+            - `symbols` must be a unique sequence.
+            - A symbol is not found in the tabulation.
+        """
+        if len(symbols) != len(set(symbols)):
+            err = "`symbols` must be a unique sequence."
+            raise ValueError(err)
+        for s in symbols:
+            if s not in self.symbols:
+                err = "A symbol is not found in the tabulation ({}).".format(s)
+                raise ValueError(err)
+        index = np.array([self.symbols.index(s) for s in symbols])
+        grid = np.ix_(index, index)
+        return EamTable(list(self.comments), list(symbols),
+                        {s: self.symbol_descriptors[s] for s in symbols},
+                        self.n_rho, self.d_rho, self.n_r, self.d_r,
+                        self.cutoff, self.embedding_function[index],
+                        self.density_function[grid], self.pair_function[grid])
 
 
 class SetflFile(TextFile):
@@ -35,6 +233,8 @@ class SetflFile(TextFile):
         symbol.
         pair_function: Tabulated values of the interatomic potential between 
         each symbol pair.
+        - Pairs are ordered as in the file (i >= j), for example:
+            FeFe NiFe NiNi CrFe CrNi CrCr
     """
 
     def __init__(self, filepath: Optional[str] = None) -> None:
@@ -49,9 +249,9 @@ class SetflFile(TextFile):
         self._n_r: Optional[int] = None
         self._d_r: Optional[float] = None
         self._cutoff: Optional[float] = None
-        self._embedding_function: Optional[Dict[str, List[float]]] = None
-        self._density_function: Optional[Dict[str, List[float]]] = None
-        self._pair_function: Optional[Dict[str, List[float]]] = None
+        self._embedding_function: Optional[Dict[str, np.ndarray]] = None
+        self._density_function: Optional[Dict[str, np.ndarray]] = None
+        self._pair_function: Optional[Dict[str, np.ndarray]] = None
         super().__init__(filepath)
 
     @property
@@ -74,6 +274,7 @@ class SetflFile(TextFile):
     @symbols.setter
     def symbols(self, value: List[str]) -> None:
         self._symbols = value
+        self._symbol_pairs = None
 
     @property
     def symbol_pairs(self) -> List[str]:
@@ -81,7 +282,7 @@ class SetflFile(TextFile):
             pairs = []
             for i, s0 in enumerate(self.symbols):
                 for j, s1 in enumerate(self.symbols):
-                    if i <= j:
+                    if i >= j:
                         pairs.append("{}{}".format(s0, s1))
             self._symbol_pairs = pairs
         return self._symbol_pairs
@@ -147,35 +348,112 @@ class SetflFile(TextFile):
         self._cutoff = value
 
     @property
-    def embedding_function(self) -> Dict[str, List[float]]:
+    def embedding_function(self) -> Dict[str, np.ndarray]:
         if self._embedding_function is None:
             self._read_body()
         return self._embedding_function  # type: ignore
 
     @embedding_function.setter
-    def embedding_function(self, value: Dict[str, List[float]]) -> None:
+    def embedding_function(self, value: Dict[str, np.ndarray]) -> None:
         self._embedding_function = value
 
     @property
-    def density_function(self) -> Dict[str, List[float]]:
+    def density_function(self) -> Dict[str, np.ndarray]:
         if self._density_function is None:
             self._read_body()
         return self._density_function  # type: ignore
 
     @density_function.setter
-    def density_function(self, value: Dict[str, List[float]]) -> None:
+    def density_function(self, value: Dict[str, np.ndarray]) -> None:
         self._density_function = value
 
     @property
-    def pair_function(self) -> Dict[str, List[float]]:
+    def pair_function(self) -> Dict[str, np.ndarray]:
         if self._pair_function is None:
             self._read_body()
         return self._pair_function  # type: ignore
 
     @pair_function.setter
-    def pair_function(self, value: Dict[str, List[float]]) -> None:
+    def pair_function(self, value: Dict[str, np.ndarray]) -> None:
         self._pair_function = value
 
+    @classmethod
+    def from_table(cls,
+                   table: EamTable,
+                   filepath: Optional[str] = None) -> 'SetflFile':
+        """Initializes a setfl file from an array-backed tabulation.
+
+        Notes:
+            The tabulated values are shared with `table` rather than copied.
+
+        Args:
+            table: The tabulation to represent.
+            filepath: Filepath of the new file.
+
+        Raises:
+            ValueError
+            - The density functions depend on the host symbol.
+        """
+        density = table.density_function[:, :1, :]
+        broadcast = np.broadcast_to(density, table.density_function.shape)
+        if not np.array_equal(broadcast, table.density_function,
+                              equal_nan=True):
+            err = ("The density functions depend on the host symbol and "
+                   "cannot be represented in setfl format.")
+            raise ValueError(err)
+        setfl = cls._from_table_header(table, filepath)
+        setfl.density_function = dict(zip(table.symbols, density[:, 0, :]))
+        return setfl
+
+    def to_table(self) -> EamTable:
+        """Returns the array-backed representation of the tabulation."""
+        n_symbols = len(self.symbols)
+        shape = (n_symbols, n_symbols, self.n_r)
+        density = np.stack([self.density_function[s] for s in self.symbols])
+        density = np.broadcast_to(density[:, np.newaxis, :], shape)
+        return self._to_table(density)
+
+    def resample(self,
+                 n_rho: int,
+                 d_rho: float,
+                 n_r: int,
+                 d_r: float,
+                 cutoff: Optional[float] = None,
+                 filepath: Optional[str] = None) -> 'SetflFile':
+        """Returns a copy of the potential tabulated on a new grid.
+
+        Notes:
+            See `EamTable.resample`.
+
+        Args:
+            n_rho: Number of points at which the electron density is evaluated.
+            d_rho: Distance between points at which the electron density is
+            evaluated.
+            n_r: Number of points at which the interatomic potential and
+            embedding function are evaluated.
+            d_r: Distance between points at which the interatomic and
+            embedding function are evaluated.
+            cutoff: Cutoff distance for all functions.
+            - Defaults to the existing cutoff.
+            filepath: Filepath of the new file.
+        """
+        table = self.to_table().resample(n_rho, d_rho, n_r, d_r, cutoff)
+        return self.from_table(table, filepath)
+
+    def subset(self,
+               symbols: List[str],
+               filepath: Optional[str] = None) -> 'SetflFile':
+        """Returns a copy of the potential restricted to the given symbols.
+
+        Notes:
+            Pair functions are relabeled to follow the order of `symbols`.
+
+        Args:
+            symbols: IUPAC chemical symbols to keep in the desired order.
+            filepath: Filepath of the new file.
+        """
+        return self.from_table(self.to_table().subset(symbols), filepath)
+
     def write(self, path: Optional[str] = None) -> None:
         """Writes a setfl file.
 
@@ -185,49 +463,562 @@ class SetflFile(TextFile):
         if path is None:
             path = self.filepath
         with open(path, "w") as f:
-            f.write("{}\n".format("\n".join(self.comments)))
-            f.write("{} {}\n".format(len(self.symbols), " ".join(self.symbols)))
-            f.write("{} {} {} {} {}\n".format(self.n_rho, self.d_rho, self.n_r,
-                                              self.d_r, self.cutoff))
+            self._write_header(f)
             for s in self.symbols:
                 f.write(self.symbol_descriptors[s] + "\n")
-                embedding_function = map(str, self.embedding_function[s])
-                f.write("{}\n".format("\n".join(embedding_function)))
-                density_function = map(str, self.density_function[s])
-                f.write("{}\n".format("\n".join(density_function)))
+                _write_tabulation(f, self.embedding_function[s])
+                _write_tabulation(f, self.density_function[s])
             for sp in self.symbol_pairs:
-                pair_function = map(str, self.pair_function[sp])
-                f.write("{}\n".format("\n".join(pair_function)))
+                _write_tabulation(f, self.pair_function[sp])
+
+    @classmethod
+    def _from_table_header(cls, table: EamTable,
+                           filepath: Optional[str]) -> 'SetflFile':
+        setfl = cls(filepath)
+        comments = (list(table.comments) + [_no_comment] * 3)[:3]
+        setfl.comments = (comments[0], comments[1], comments[2])
+        setfl.symbols = list(table.symbols)
+        setfl.symbol_descriptors = dict(table.symbol_descriptors)
+        setfl.n_rho = table.n_rho
+        setfl.d_rho = table.d_rho
+        setfl.n_r = table.n_r
+        setfl.d_r = table.d_r
+        setfl.cutoff = table.cutoff
+        setfl.embedding_function = dict(
+            zip(table.symbols, table.embedding_function))
+        pair_function = {}
+        for i, s0 in enumerate(table.symbols):
+            for j, s1 in enumerate(table.symbols):
+                if i >= j:
+                    key = "{}{}".format(s0, s1)
+                    pair_function[key] = table.pair_function[i, j]
+        setfl.pair_function = pair_function
+        return setfl
+
+    def _to_table(self, density: np.ndarray) -> EamTable:
+        n_symbols = len(self.symbols)
+        pair = np.empty((n_symbols, n_symbols, self.n_r))
+        for i, s0 in enumerate(self.symbols):
+            for j, s1 in enumerate(self.symbols):
+                if i >= j:
+                    key = "{}{}".format(s0, s1)
+                    pair[i, j] = pair[j, i] = self.pair_function[key]
+        embedding = np.stack([self.embedding_function[s] for s in self.symbols])
+        return EamTable(list(self.comments), list(self.symbols),
+                        dict(self.symbol_descriptors), self.n_rho, self.d_rho,
+                        self.n_r, self.d_r, self.cutoff, embedding, density,
+                        pair)
+
+    def _write_header(self, f: TextIO) -> None:
+        f.write("{}\n".format("\n".join(self.comments)))
+        f.write("{} {}\n".format(len(self.symbols), " ".join(self.symbols)))
+        f.write("{} {} {} {} {}\n".format(self.n_rho, self.d_rho, self.n_r,
+                                          self.d_r, self.cutoff))
+
+    def _read_body(self) -> None:
+        n_symbols = len(self.symbols)
+        section_length = self.n_rho + self.n_r
+        descriptors, values = _read_tabulation(self.lines[5:], n_symbols,
+                                               section_length)
+        sections = values[:n_symbols * section_length]
+        sections = sections.reshape((n_symbols, section_length))
+        pairs = values[n_symbols * section_length:]
+        pairs = pairs.reshape((len(self.symbol_pairs), self.n_r))
+        self._symbol_descriptors = dict(zip(self.symbols, descriptors))
+        self._embedding_function = dict(
+            zip(self.symbols, sections[:, :self.n_rho]))
+        self._density_function = dict(
+            zip(self.symbols, sections[:, self.n_rho:]))
+        self._pair_function = dict(zip(self.symbol_pairs, pairs))
+
+
+class FinnisSinclairFile(SetflFile):
+    """File wrapper for a Finnis-Sinclair (eam.fs) formatted EAM potential
+       tabulation.
+
+    Notes:
+        The format is identical to setfl except that each symbol section
+        contains one density function per symbol.
+
+        File specification:
+        https://lammps.sandia.gov/doc/pair_eam.html
+
+    Args:
+        filepath: Filepath to an eam.fs file.
+
+    Attributes:
+        filepath: Filepath to an eam.fs file.
+        comments: Comments at the top of the file.
+        symbols: IUPAC chemical symbols specified in the file.
+        symbol_pairs: Pairs of IUPAC chemical symbols specified in the file.
+        symbol_descriptors: Descriptive information to insert between tabulation
+        sections of each symbol.
+        n_rho: Number of points at which the electron density is evaluated.
+        d_rho: Distance between points at which the electron density is
+        evaluated.
+        n_r: Number of points at which the interatomic potential and embedding
+        function are evaluated.
+        d_r: Distance between points at which the interatomic and embedding
+        function are evaluated.
+        cutoff: Cutoff distance for all functions.
+        embedding_function: Tabulated values of the embedding function for each
+        symbol.
+        density_function: Tabulated values of the density function for each
+        ordered symbol pair.
+        - Keys are ordered by section then by host, for example:
+            FeFe FeCr CrFe CrCr
+        pair_function: Tabulated values of the interatomic potential between
+        each symbol pair.
+    """
+
+    def __init__(self, filepath: Optional[str] = None) -> None:
+        if filepath is None:
+            filepath = "eam.fs"
+        super().__init__(filepath)
+
+    @classmethod
+    def from_table(cls,
+                   table: EamTable,
+                   filepath: Optional[str] = None) -> 'FinnisSinclairFile':
+        """Initializes an eam.fs file from an array-backed tabulation.
+
+        Notes:
+            The tabulated values are shared with `table` rather than copied.
+
+        Args:
+            table: The tabulation to represent.
+            filepath: Filepath of the new file.
+        """
+        fs = cls._from_table_header(table, filepath)
+        density_function = {}
+        for i, s0 in enumerate(table.symbols):
+            for j, s1 in enumerate(table.symbols):
+                key = "{}{}".format(s0, s1)
+                density_function[key] = table.density_function[i, j]
+        fs.density_function = density_function
+        return fs  # type: ignore
+
+    def to_table(self) -> EamTable:
+        """Returns the array-backed representation of the tabulation."""
+        density = np.stack([
+            self.density_function["{}{}".format(s0, s1)]
+            for s0 in self.symbols
+            for s1 in self.symbols
+        ])
+        n_symbols = len(self.symbols)
+        return self._to_table(
+            density.reshape((n_symbols, n_symbols, self.n_r)))
+
+    def write(self, path: Optional[str] = None) -> None:
+        """Writes an eam.fs file.
+
+        Args:
+            path: Filepath to write.
+        """
+        if path is None:
+            path = self.filepath
+        with open(path, "w") as f:
+            self._write_header(f)
+            for s0 in self.symbols:
+                f.write(self.symbol_descriptors[s0] + "\n")
+                _write_tabulation(f, self.embedding_function[s0])
+                for s1 in self.symbols:
+                    key = "{}{}".format(s0, s1)
+                    _write_tabulation(f, self.density_function[key])
+            for sp in self.symbol_pairs:
+                _write_tabulation(f, self.pair_function[sp])
+
+    def _read_body(self) -> None:
+        n_symbols = len(self.symbols)
+        section_length = self.n_rho + n_symbols * self.n_r
+        descriptors, values = _read_tabulation(self.lines[5:], n_symbols,
+                                               section_length)
+        sections = values[:n_symbols * section_length]
+        sections = sections.reshape((n_symbols, section_length))
+        densities = sections[:, self.n_rho:].reshape(
+            (n_symbols * n_symbols, self.n_r))
+        density_keys = [
+            "{}{}".format(s0, s1) for s0 in self.symbols for s1 in self.symbols
+        ]
+        pairs = values[n_symbols * section_length:]
+        pairs = pairs.reshape((len(self.symbol_pairs), self.n_r))
+        self._symbol_descriptors = dict(zip(self.symbols, descriptors))
+        self._embedding_function = dict(
+            zip(self.symbols, sections[:, :self.n_rho]))
+        self._density_function = dict(zip(density_keys, densities))
+        self._pair_function = dict(zip(self.symbol_pairs, pairs))
+
+
+class FuncflFile(TextFile):
+    """File wrapper for a funcfl formatted single element EAM potential
+       tabulation.
+
+    Notes:
+        The pair interaction is tabulated as an effective charge Z(r) such
+        that r * phi(r) = 27.2 * 0.529 * Z(r)**2.
+
+        File specification:
+        https://lammps.sandia.gov/doc/pair_eam.html
+
+    Args:
+        filepath: Filepath to a funcfl file.
+
+    Attributes:
+        filepath: Filepath to a funcfl file.
+        comment: Comment at the top of the file.
+        symbol_descriptor: Descriptive information about the element.
+        - Format:
+            {atomic number} {atomic mass} {lattice parameter} {structure}
+        n_rho: Number of points at which the electron density is evaluated.
+        d_rho: Distance between points at which the electron density is
+        evaluated.
+        n_r: Number of points at which the interatomic potential and embedding
+        function are evaluated.
+        d_r: Distance between points at which the interatomic and embedding
+        function are evaluated.
+        cutoff: Cutoff distance for all functions.
+        embedding_function: Tabulated values of the embedding function.
+        effective_charge: Tabulated values of the effective charge.
+        density_function: Tabulated values of the density function.
+    """
+
+    def __init__(self, filepath: Optional[str] = None) -> None:
+        if filepath is None:
+            filepath = "eam"
+        self._comment: Optional[str] = None
+        self._symbol_descriptor: Optional[str] = None
+        self._n_rho: Optional[int] = None
+        self._d_rho: Optional[float] = None
+        self._n_r: Optional[int] = None
+        self._d_r: Optional[float] = None
+        self._cutoff: Optional[float] = None
+        self._embedding_function: Optional[np.ndarray] = None
+        self._effective_charge: Optional[np.ndarray] = None
+        self._density_function: Optional[np.ndarray] = None
+        super().__init__(filepath)
+
+    @property
+    def comment(self) -> str:
+        if self._comment is None:
+            self._comment = self.lines[0]
+        return self._comment
+
+    @comment.setter
+    def comment(self, value: str) -> None:
+        self._comment = value
+
+    @property
+    def symbol_descriptor(self) -> str:
+        if self._symbol_descriptor is None:
+            self._symbol_descriptor = " ".join(self.lines[1].split()[:4])
+        return self._symbol_descriptor
+
+    @symbol_descriptor.setter
+    def symbol_descriptor(self, value: str) -> None:
+        self._symbol_descriptor = value
+
+    @property
+    def n_rho(self) -> int:
+        if self._n_rho is None:
+            self._n_rho = int(self.lines[2].split()[0])
+        return self._n_rho
+
+    @n_rho.setter
+    def n_rho(self, value: int) -> None:
+        self._n_rho = value
+
+    @property
+    def d_rho(self) -> float:
+        if self._d_rho is None:
+            self._d_rho = float(self.lines[2].split()[1])
+        return self._d_rho
+
+    @d_rho.setter
+    def d_rho(self, value: float) -> None:
+        self._d_rho = value
+
+    @property
+    def n_r(self) -> int:
+        if self._n_r is None:
+            self._n_r = int(self.lines[2].split()[2])
+        return self._n_r
+
+    @n_r.setter
+    def n_r(self, value: int) -> None:
+        self._n_r = value
+
+    @property
+    def d_r(self) -> float:
+        if self._d_r is None:
+            self._d_r = float(self.lines[2].split()[3])
+        return self._d_r
+
+    @d_r.setter
+    def d_r(self, value: float) -> None:
+        self._d_r = value
+
+    @property
+    def cutoff(self) -> float:
+        if self._cutoff is None:
+            self._cutoff = float(self.lines[2].split()[4])
+        return self._cutoff
+
+    @cutoff.setter
+    def cutoff(self, value: float) -> None:
+        self._cutoff = value
+
+    @property
+    def embedding_function(self) -> np.ndarray:
+        if self._embedding_function is None:
+            self._read_body()
+        return self._embedding_function  # type: ignore
+
+    @embedding_function.setter
+    def embedding_function(self, value: np.ndarray) -> None:
+        self._embedding_function = value
+
+    @property
+    def effective_charge(self) -> np.ndarray:
+        if self._effective_charge is None:
+            self._read_body()
+        return self._effective_charge  # type: ignore
+
+    @effective_charge.setter
+    def effective_charge(self, value: np.ndarray) -> None:
+        self._effective_charge = value
+
+    @property
+    def density_function(self) -> np.ndarray:
+        if self._density_function is None:
+            self._read_body()
+        return self._density_function  # type: ignore
+
+    @density_function.setter
+    def density_function(self, value: np.ndarray) -> None:
+        self._density_function = value
+
+    @classmethod
+    def from_table(cls,
+                   table: EamTable,
+                   filepath: Optional[str] = None) -> 'FuncflFile':
+        """Initializes a funcfl file from an array-backed tabulation.
+
+        Args:
+            table: The tabulation to represent.
+            filepath: Filepath of the new file.
+
+        Raises:
+            ValueError
+            - funcfl files contain exactly one symbol.
+            - The pair function is negative and has no effective charge.
+        """
+        if table.n_symbols != 1:
+            err = "funcfl files contain exactly one symbol."
+            raise ValueError(err)
+        r_phi = table.pair_function[0, 0]
+        if np.any(r_phi < 0):
+            err = ("The pair function is negative and cannot be represented "
+                   "as an effective charge.")
+            raise ValueError(err)
+        funcfl = cls(filepath)
+        comments = list(table.comments) + [_no_comment]
+        funcfl.comment = comments[0]
+        funcfl.symbol_descriptor = table.symbol_descriptors[table.symbols[0]]
+        funcfl.n_rho = table.n_rho
+        funcfl.d_rho = table.d_rho
+        funcfl.n_r = table.n_r
+        funcfl.d_r = table.d_r
+        funcfl.cutoff = table.cutoff
+        funcfl.embedding_function = table.embedding_function[0]
+        funcfl.effective_charge = np.sqrt(r_phi / _funcfl_conversion)
+        funcfl.density_function = table.density_function[0, 0]
+        return funcfl
+
+    def to_table(self, symbol: str) -> EamTable:
+        """Returns the array-backed representation of the tabulation.
+
+        Args:
+            symbol: IUPAC chemical symbol of the element.
+            - funcfl files do not record the symbol.
+        """
+        r_phi = _funcfl_conversion * self.effective_charge**2
+        return EamTable([self.comment], [symbol],
+                        {symbol: self.symbol_descriptor}, self.n_rho,
+                        self.d_rho, self.n_r, self.d_r, self.cutoff,
+                        self.embedding_function[np.newaxis, :],
+                        self.density_function[np.newaxis, np.newaxis, :],
+                        r_phi[np.newaxis, np.newaxis, :])
+
+    def write(self, path: Optional[str] = None) -> None:
+        """Writes a funcfl file.
+
+        Args:
+            path: Filepath to write.
+        """
+        if path is None:
+            path = self.filepath
+        with open(path, "w") as f:
+            f.write("{}\n".format(self.comment))
+            f.write("{}\n".format(self.symbol_descriptor))
+            f.write("{} {} {} {} {}\n".format(self.n_rho, self.d_rho, self.n_r,
+                                              self.d_r, self.cutoff))
+            _write_tabulation(f, self.embedding_function)
+            _write_tabulation(f, self.effective_charge)
+            _write_tabulation(f, self.density_function)
 
     def _read_body(self) -> None:
-        # clear any prior data
-        self._embedding_function = {}
-        self._density_function = {}
-        self._pair_function = {}
-        start = 5  # beginning of body section
-        values = []  # separate line by spaces to support multi-col format
-        for line in self.lines[start:]:
-            for s in line.split():
-                values.append(s)
-        start = 0  # now `start` references individual values not lines
-        self._symbol_descriptors = {}
-        for s in self.symbols:
-            symbol_descriptor = values[start:start + 4]
-            self._symbol_descriptors[s] = " ".join(symbol_descriptor)
-            start += 4  # skip the descriptor section
-            self._embedding_function[s] = []
-            self._density_function[s] = []
-            for i in range(self.n_rho):
-                value = float(values[start + i])
-                self._embedding_function[s].append(value)
-            start += self.n_rho
-            for i in range(self.n_r):
-                value = float(values[start + i])
-                self._density_function[s].append(value)
-            start += self.n_r
-        for sp in self.symbol_pairs:
-            self._pair_function[sp] = []
-            for i in range(self.n_r):
-                value = float(values[start + i])
-                self._pair_function[sp].append(value)
-            start += self.n_r
+        _, values = _read_tabulation(self.lines[3:], 0, 0)
+        n_rho, n_r = self.n_rho, self.n_r
+        self._embedding_function = values[:n_rho]
+        self._effective_charge = values[n_rho:n_rho + n_r]
+        self._density_function = values[n_rho + n_r:n_rho + 2 * n_r]
+
+
+def tabulate_setfl(symbols: List[str],
+                   symbol_descriptors: Dict[str, str],
+                   n_rho: int,
+                   d_rho: float,
+                   n_r: int,
+                   d_r: float,
+                   cutoff: float,
+                   embedding_function: Dict[str, TabulatedFunction],
+                   density_function: Dict[str, TabulatedFunction],
+                   pair_function: Dict[str, TabulatedFunction],
+                   comments: Optional[Tuple[str, str, str]] = None,
+                   filepath: Optional[str] = None) -> SetflFile:
+    """Returns a setfl file tabulated from analytic functions.
+
+    Notes:
+        Each function is called exactly once with the full grid as a numpy
+        array and must return an array of the same length. Pair functions
+        return phi(r); the tabulated value is r * phi(r) as required by the
+        setfl format.
+
+    Args:
+        symbols: IUPAC chemical symbols to tabulate.
+        symbol_descriptors: Descriptive information for each symbol.
+        n_rho: Number of points at which the electron density is evaluated.
+        d_rho: Distance between points at which the electron density is
+        evaluated.
+        n_r: Number of points at which the interatomic potential and embedding
+        function are evaluated.
+        d_r: Distance between points at which the interatomic and embedding
+        function are evaluated.
+        cutoff: Cutoff distance for all functions.
+        embedding_function: Embedding function F(rho) of each symbol.
+        density_function: Density function rho(r) of each symbol.
+        pair_function: Pair function phi(r) of each symbol pair.
+        - Either ordering of the pair label is accepted.
+        comments: Comments at the top of the file.
+        filepath: Filepath of the new setfl file.
+    """
+    return tabulate_setfl_batch(1, symbols, symbol_descriptors, n_rho, d_rho,
+                                n_r, d_r, cutoff, embedding_function,
+                                density_function, pair_function, comments,
+                                [filepath])[0]
+
+
+def tabulate_setfl_batch(
+        n_sets: int,
+        symbols: List[str],
+        symbol_descriptors: Dict[str, str],
+        n_rho: int,
+        d_rho: float,
+        n_r: int,
+        d_r: float,
+        cutoff: float,
+        embedding_function: Dict[str, TabulatedFunction],
+        density_function: Dict[str, TabulatedFunction],
+        pair_function: Dict[str, TabulatedFunction],
+        comments: Optional[Tuple[str, str, str]] = None,
+        filepaths: Optional[List[Optional[str]]] = None) -> List[SetflFile]:
+    """Returns setfl files tabulated from analytic functions for many
+       parameter sets at once.
+
+    Notes:
+        Each function is called exactly once with the full grid as a numpy
+        array and may return any array which broadcasts to (n_sets, n), for
+        example one tabulation of shape (n,) shared by all sets. Parameters are
+        conveniently batched with a trailing axis, for example:
+
+            a = np.array([1.0, 1.1, 1.2])[:, np.newaxis]
+            pair_function = {"FeFe": lambda r: np.exp(-a * r)}
+
+        The returned files share memory with a single batched array rather
+        than holding individual copies.
+
+    Args:
+        n_sets: Number of parameter sets.
+        symbols: IUPAC chemical symbols to tabulate.
+        symbol_descriptors: Descriptive information for each symbol.
+        n_rho: Number of points at which the electron density is evaluated.
+        d_rho: Distance between points at which the electron density is
+        evaluated.
+        n_r: Number of points at which the interatomic potential and embedding
+        function are evaluated.
+        d_r: Distance between points at which the interatomic and embedding
+        function are evaluated.
+        cutoff: Cutoff distance for all functions.
+        embedding_function: Embedding function F(rho) of each symbol.
+        density_function: Density function rho(r) of each symbol.
+        pair_function: Pair function phi(r) of each symbol pair.
+        - Either ordering of the pair label is accepted.
+        comments: Comments at the top of each file.
+        filepaths: Filepath of each new setfl file.
+
+    Raises:
+        ValueError
+        - A function is missing for a symbol or symbol pair.
+        - A function returned an array of the wrong shape.
+    """
+    if comments is None:
+        comments = ("Tabulated by cmstk", _no_comment, _no_comment)
+    if filepaths is None:
+        filepaths = [None] * n_sets
+    if len(filepaths) != n_sets:
+        err = "Number of filepaths must match number of sets."
+        raise ValueError(err)
+    n_symbols = len(symbols)
+    rho = np.arange(n_rho) * d_rho
+    r = np.arange(n_r) * d_r
+    embedding = np.empty((n_sets, n_symbols, n_rho))
+    density = np.empty((n_sets, n_symbols, n_r))
+    pair = np.empty((n_sets, n_symbols, n_symbols, n_r))
+    for i, s0 in enumerate(symbols):
+        f = _tabulated_function(embedding_function, s0)
+        embedding[:, i] = _evaluate(f, rho, n_sets)
+        f = _tabulated_function(density_function, s0)
+        density[:, i] = _evaluate(f, r, n_sets)
+        for j, s1 in enumerate(symbols[:i + 1]):
+            key = "{}{}".format(s0, s1)
+            if key not in pair_function:
+                key = "{}{}".format(s1, s0)
+            f = _tabulated_function(pair_function, key)
+            pair[:, i, j] = pair[:, j, i] = r * _evaluate(f, r, n_sets)
+    shape = (n_symbols, n_symbols, n_r)
+    setfls = []
+    for k in range(n_sets):
+        table = EamTable(list(comments), list(symbols),
+                         dict(symbol_descriptors), n_rho, d_rho, n_r, d_r,
+                         cutoff, embedding[k],
+                         np.broadcast_to(density[k, :, np.newaxis, :], shape),
+                         pair[k])
+        setfls.append(SetflFile.from_table(table, filepaths[k]))
+    return setfls
+
+
+def _tabulated_function(functions: Dict[str, TabulatedFunction],
+                        key: str) -> TabulatedFunction:
+    if key not in functions:
+        err = "A function is missing for `{}`.".format(key)
+        raise ValueError(err)
+    return functions[key]
+
+
+def _evaluate(f: TabulatedFunction, x: np.ndarray, n_sets: int) -> np.ndarray:
+    values = np.asarray(f(x), dtype=float)
+    try:
+        return np.broadcast_to(values, (n_sets,) + x.shape)
+    except ValueError:
+        err = "A function returned an array of shape {}.".format(values.shape)
+        raise ValueError(err)
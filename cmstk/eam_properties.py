@@ -0,0 +1,272 @@
+from cmstk.eam import EamTable, SetflFile
+from cmstk.elements import Element
+import itertools
+import multiprocessing
+import numpy as np
+from scipy.interpolate import CubicSpline
+from scipy.optimize import minimize_scalar
+from typing import Callable, Dict, List, Optional, Tuple
+
+_ev_per_cubic_angstrom_to_gpa = 160.21766208
+_strain = 0.005  # finite strain used to evaluate elastic constants
+
+PROPERTIES = [
+    "lattice_constant", "cohesive_energy", "vacancy_formation_energy", "c11",
+    "c12", "c44"
+]
+
+
+class EamCalculator(object):
+    """Evaluates the energy of periodic cells with an EAM tabulation.
+
+    Notes:
+        Every function of the tabulation is splined once on construction so
+        that repeated energy evaluations only cost a neighbor search and a
+        handful of vectorized spline evaluations.
+
+    Args:
+        table: The EAM tabulation.
+
+    Attributes:
+        table: The EAM tabulation.
+    """
+
+    def __init__(self, table: EamTable) -> None:
+        self.table = table
+        rho = np.arange(table.n_rho) * table.d_rho
+        r = np.arange(table.n_r) * table.d_r
+        n = table.n_symbols
+        self._embedding = [
+            CubicSpline(rho, table.embedding_function[a]) for a in range(n)
+        ]
+        self._density = [[
+            CubicSpline(r, table.density_function[a, b]) for b in range(n)
+        ] for a in range(n)]
+        self._pair = [[
+            CubicSpline(r, table.pair_function[a, b]) for b in range(n)
+        ] for a in range(n)]
+
+    def energy(self, lattice: np.ndarray, fractional_positions: np.ndarray,
+               symbols: List[str]) -> float:
+        """Returns the total energy of a periodic cell in eV.
+
+        Args:
+            lattice: Lattice vectors as rows of a 3x3 matrix.
+            fractional_positions: Fractional position of each atom.
+            symbols: IUPAC chemical symbol of each atom.
+        """
+        types = np.array([self.table.symbols.index(s) for s in symbols])
+        n_atoms = len(types)
+        cutoff = self.table.cutoff
+        positions = np.matmul(fractional_positions, lattice)
+        translations = _periodic_translations(lattice, cutoff)
+        # displacement from atom i to every periodic image of atom j
+        d = (positions[np.newaxis, :, np.newaxis, :] +
+             translations[np.newaxis, np.newaxis, :, :] -
+             positions[:, np.newaxis, np.newaxis, :])
+        distances = np.linalg.norm(d, axis=3)
+        within = (distances > 1e-8) & (distances < cutoff)
+        i, j, _ = np.nonzero(within)
+        r = distances[within]
+        host, neighbor = types[i], types[j]
+        density = np.zeros(n_atoms)
+        pair_energy = 0.0
+        for a, b in itertools.product(np.unique(types), repeat=2):
+            mask = (neighbor == a) & (host == b)
+            if not mask.any():
+                continue
+            density += np.bincount(i[mask],
+                                   weights=self._density[a][b](r[mask]),
+                                   minlength=n_atoms)
+            pair_energy += np.sum(self._pair[a][b](r[mask]) / r[mask])
+        embedding_energy = 0.0
+        for a in np.unique(types):
+            embedding_energy += np.sum(self._embedding[a](density[types == a]))
+        return float(embedding_energy + 0.5 * pair_energy)
+
+
+def calculate_properties(potentials: List[str],
+                         elements: List[Element],
+                         properties: Optional[List[str]] = None,
+                         processes: Optional[int] = None,
+                         chunksize: int = 1) -> Dict[str, np.ndarray]:
+    """Calculates the properties of each element with each potential in
+       parallel.
+
+    Notes:
+        Each potential is an independent task distributed over a process
+        pool. The worker which receives a potential loads and splines it once,
+        relaxes the reference cell of each element once and evaluates every
+        requested property from them.
+
+        The reference cell is the element's `unit_cell`. Elastic constants
+        are evaluated from unrelaxed finite strains and the vacancy formation
+        energy from an unrelaxed 3x3x3 supercell. Properties of elements
+        missing from a potential are reported as NaN.
+
+    Args:
+        potentials: Filepaths to setfl files.
+        elements: Elements whose reference cells are evaluated.
+        properties: Names of the properties to calculate.
+        - Defaults to all of `PROPERTIES`.
+        processes: Number of worker processes.
+        - Defaults to the number of available cores.
+        chunksize: Number of potentials sent to a worker at a time.
+
+    Returns:
+        A columnar table with one row per (potential, element) combination.
+        - Columns: potential, symbol, and one column per property.
+
+    Raises:
+        ValueError
+        - Unknown property.
+    """
+    if properties is None:
+        properties = list(PROPERTIES)
+    for p in properties:
+        if p not in PROPERTIES:
+            err = "Unknown property `{}`.".format(p)
+            raise ValueError(err)
+    rows = list(itertools.product(potentials, elements))
+    tasks = [(potential, elements, properties) for potential in potentials]
+    with multiprocessing.Pool(processes) as pool:
+        values = pool.map(_calculate_potential, tasks, chunksize)
+    values_arr = np.array(values).reshape((len(rows), len(properties)))
+    table = {
+        "potential": np.array([potential for potential, _ in rows]),
+        "symbol": np.array([element.symbol for _, element in rows]),
+    }
+    for i, p in enumerate(properties):
+        table[p] = values_arr[:, i]
+    return table
+
+
+#================================#
+#   Worker Process Entrypoints   #
+#================================#
+
+
+def _calculate_potential(
+        task: Tuple[str, List[Element], List[str]]) -> np.ndarray:
+    # every property of every element with a single potential
+    potential, elements, properties = task
+    setfl = SetflFile(potential)
+    setfl.load()
+    calculator = EamCalculator(setfl.to_table())
+    setfl.unload()
+    values = np.full((len(elements), len(properties)), np.nan)
+    for i, element in enumerate(elements):
+        if element.symbol not in calculator.table.symbols:
+            continue
+        a = _relax(calculator, element)
+        for j, name in enumerate(properties):
+            values[i, j] = _property_functions[name](calculator, element, a)
+    return values
+
+
+def _reference_cell(element: Element,
+                    a: float) -> Tuple[np.ndarray, np.ndarray, List[str]]:
+    unit_cell = element.unit_cell
+    lattice = unit_cell.lattice_vectors
+    positions = np.array(unit_cell.positions)
+    fractional = np.matmul(positions, np.linalg.inv(lattice))
+    lattice = lattice * (a / unit_cell.a)
+    return lattice, fractional, unit_cell.symbols
+
+
+def _energy_per_atom(calculator: EamCalculator, element: Element,
+                     a: float) -> float:
+    lattice, fractional, symbols = _reference_cell(element, a)
+    return calculator.energy(lattice, fractional, symbols) / len(symbols)
+
+
+def _relax(calculator: EamCalculator, element: Element) -> float:
+    a = element.unit_cell.a
+    result = minimize_scalar(lambda x: _energy_per_atom(calculator, element, x),
+                             bounds=(0.8 * a, 1.2 * a),
+                             method="bounded",
+                             options={"xatol": 1e-6})
+    return float(result.x)
+
+
+def _lattice_constant(calculator: EamCalculator, element: Element,
+                      a: float) -> float:
+    return a
+
+
+def _cohesive_energy(calculator: EamCalculator, element: Element,
+                     a: float) -> float:
+    return _energy_per_atom(calculator, element, a)
+
+
+def _vacancy_formation_energy(calculator: EamCalculator, element: Element,
+                              a: float) -> float:
+    lattice, fractional, symbols = _reference_cell(element, a)
+    repeat = 3
+    shifts = np.array(list(itertools.product(range(repeat), repeat=3)))
+    supercell = (fractional[np.newaxis, :, :] + shifts[:, np.newaxis, :])
+    supercell = supercell.reshape((-1, 3)) / repeat
+    supercell_symbols = symbols * len(shifts)
+    lattice = lattice * repeat
+    n_atoms = len(supercell)
+    perfect = calculator.energy(lattice, supercell, supercell_symbols)
+    defect = calculator.energy(lattice, supercell[1:], supercell_symbols[1:])
+    return defect - perfect * (n_atoms - 1) / n_atoms
+
+
+def _strain_energy_density(calculator: EamCalculator, element: Element,
+                           a: float, strain: np.ndarray) -> float:
+    # second derivative of the energy density along `strain`
+    lattice, fractional, symbols = _reference_cell(element, a)
+    volume = abs(np.linalg.det(lattice))
+    energies = []
+    for delta in [-_strain, 0.0, _strain]:
+        deformation = np.identity(3) + delta * strain
+        strained = np.matmul(lattice, deformation.T)
+        energies.append(calculator.energy(strained, fractional, symbols))
+    curvature = (energies[0] - 2 * energies[1] + energies[2]) / _strain**2
+    return curvature / volume * _ev_per_cubic_angstrom_to_gpa
+
+
+def _c11(calculator: EamCalculator, element: Element, a: float) -> float:
+    strain = np.zeros((3, 3))
+    strain[0, 0] = 1.0
+    return _strain_energy_density(calculator, element, a, strain)
+
+
+def _c12(calculator: EamCalculator, element: Element, a: float) -> float:
+    strain = np.zeros((3, 3))
+    strain[0, 0] = strain[1, 1] = 1.0
+    c11_c12 = _strain_energy_density(calculator, element, a, strain) / 2
+    return c11_c12 - _c11(calculator, element, a)
+
+
+def _c44(calculator: EamCalculator, element: Element, a: float) -> float:
+    strain = np.zeros((3, 3))
+    strain[1, 2] = strain[2, 1] = 0.5
+    return _strain_energy_density(calculator, element, a, strain)
+
+
+_property_functions: Dict[str, Callable[[EamCalculator, Element, float],
+                                        float]] = {
+    "lattice_constant": _lattice_constant,
+    "cohesive_energy": _cohesive_energy,
+    "vacancy_formation_energy": _vacancy_formation_energy,
+    "c11": _c11,
+    "c12": _c12,
+    "c44": _c44,
+}
+
+
+def _periodic_translations(lattice: np.ndarray, cutoff: float) -> np.ndarray:
+    # number of images needed along each vector to cover the cutoff sphere
+    volume = abs(np.linalg.det(lattice))
+    widths = np.array([
+        volume / np.linalg.norm(np.cross(lattice[1], lattice[2])),
+        volume / np.linalg.norm(np.cross(lattice[2], lattice[0])),
+        volume / np.linalg.norm(np.cross(lattice[0], lattice[1]))
+    ])
+    n = np.ceil(cutoff / widths).astype(int)
+    ranges = [np.arange(-k, k + 1) for k in n]
+    grid = np.stack(np.meshgrid(*ranges, indexing="ij"), axis=-1)
+    return np.matmul(grid.reshape((-1, 3)), lattice)
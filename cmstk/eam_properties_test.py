@@ -0,0 +1,65 @@
+from cmstk.eam import SetflFile, tabulate_setfl
+from cmstk.eam_properties import EamCalculator, calculate_properties
+from cmstk.elements import Chromium, Iron
+import numpy as np
+import os
+import pytest
+
+
+def _morse(r: np.ndarray) -> np.ndarray:
+    return 0.4 * (np.exp(-2.8 * (r - 2.48)) - 2 * np.exp(-1.4 * (r - 2.48)))
+
+
+def _write_potential(path: str, embedding_scale: float) -> None:
+    setfl = tabulate_setfl(["Fe"], {"Fe": "26 55.845 2.8665 bcc"},
+                           n_rho=500,
+                           d_rho=0.05,
+                           n_r=500,
+                           d_r=0.012,
+                           cutoff=5.5,
+                           embedding_function={
+                               "Fe": lambda rho: -embedding_scale * np.sqrt(rho)
+                           },
+                           density_function={"Fe": lambda r: np.exp(-r)},
+                           pair_function={"FeFe": _morse},
+                           filepath=path)
+    setfl.write()
+
+
+def test_eam_calculator():
+    """Tests the energy of a simple cubic cell against a direct sum."""
+    path = "test.eam.alloy"
+    _write_potential(path, 0.0)
+    setfl = SetflFile(path)
+    with setfl:
+        calculator = EamCalculator(setfl.to_table())
+    os.remove(path)
+    # simple cubic cell with only nearest neighbors inside the cutoff
+    lattice = np.identity(3) * 5.0
+    energy = calculator.energy(lattice, np.zeros((1, 3)), ["Fe"])
+    assert energy == pytest.approx(0.5 * 6 * _morse(5.0), rel=1e-6)
+
+
+def test_calculate_properties():
+    """Tests parallel property calculation for a batch of potentials."""
+    paths = ["test_pair.eam.alloy", "test_eam.eam.alloy"]
+    _write_potential(paths[0], 0.0)
+    _write_potential(paths[1], 1.0)
+    table = calculate_properties(paths, [Iron(), Chromium()], processes=2)
+    for path in paths:
+        os.remove(path)
+    assert list(table["potential"]) == [
+        paths[0], paths[0], paths[1], paths[1]
+    ]
+    assert list(table["symbol"]) == ["Fe", "Cr", "Fe", "Cr"]
+    # chromium is not described by either potential
+    assert np.isnan(table["lattice_constant"][1])
+    assert np.isnan(table["c44"][3])
+    # pair potentials obey the Cauchy relation and E_v = -E_coh
+    assert table["c12"][0] == pytest.approx(table["c44"][0], rel=1e-3)
+    assert table["vacancy_formation_energy"][0] == pytest.approx(
+        -table["cohesive_energy"][0])
+    assert table["c11"][2] > table["c12"][2] > 0
+    assert table["cohesive_energy"][2] < table["cohesive_energy"][0]
+    with pytest.raises(ValueError):
+        calculate_properties(paths, [Iron()], properties=["bulk_modulus"])
@@ -1,7 +1,9 @@
-from cmstk.eam import SetflFile
+from cmstk.eam import FinnisSinclairFile, FuncflFile, SetflFile
+from cmstk.eam import tabulate_setfl, tabulate_setfl_batch
 from cmstk.util import data_directory
 import numpy as np
 import os
+import pytest
 
 
 def test_setfl_file():
@@ -16,7 +18,7 @@ def test_setfl_file():
         "Contact information: gbonny@sckcen.be")
     assert setfl.symbols == ["Fe", "Ni", "Cr"]
     assert setfl.symbol_pairs == [
-        "FeFe", "FeNi", "FeCr", "NiNi", "NiCr", "CrCr"
+        "FeFe", "NiFe", "NiNi", "CrFe", "CrNi", "CrCr"
     ]
     assert setfl.symbol_descriptors == {
         "Fe": "26 55.845 3.49869656 fcc",
@@ -72,3 +74,203 @@ def test_setfl_file():
                 continue
             assert v1 == v2
     os.remove("test.eam.alloy")
+
+
+def _synthetic_setfl() -> SetflFile:
+    setfl = SetflFile()
+    setfl.comments = ("synthetic", "potential", "for testing")
+    setfl.symbols = ["Fe", "Ni", "Cr"]
+    setfl.symbol_descriptors = {
+        "Fe": "26 55.845 2.8665 bcc",
+        "Ni": "28 58.6934 3.52 fcc",
+        "Cr": "24 51.9961 2.91 bcc"
+    }
+    setfl.n_rho = 101
+    setfl.d_rho = 0.1
+    setfl.n_r = 201
+    setfl.d_r = 0.025
+    setfl.cutoff = 5.0
+    rho = np.arange(setfl.n_rho) * setfl.d_rho
+    r = np.arange(setfl.n_r) * setfl.d_r
+    setfl.embedding_function = {
+        s: -np.sqrt(rho) * (i + 1) for i, s in enumerate(setfl.symbols)
+    }
+    setfl.density_function = {
+        s: np.exp(-r * (i + 1)) for i, s in enumerate(setfl.symbols)
+    }
+    setfl.pair_function = {
+        sp: np.cos(r) * (i + 1) for i, sp in enumerate(setfl.symbol_pairs)
+    }
+    return setfl
+
+
+def test_setfl_file_subset():
+    """Tests element subset extraction from an eam.SetflFile."""
+    setfl = _synthetic_setfl()
+    subset = setfl.subset(["Cr", "Fe"])
+    assert subset.symbols == ["Cr", "Fe"]
+    assert subset.symbol_pairs == ["CrCr", "FeCr", "FeFe"]
+    assert subset.symbol_descriptors == {
+        "Cr": "24 51.9961 2.91 bcc",
+        "Fe": "26 55.845 2.8665 bcc"
+    }
+    assert np.array_equal(subset.pair_function["FeCr"],
+                          setfl.pair_function["CrFe"])
+    assert np.array_equal(subset.pair_function["FeFe"],
+                          setfl.pair_function["FeFe"])
+    assert np.array_equal(subset.embedding_function["Cr"],
+                          setfl.embedding_function["Cr"])
+    subset.write("test.eam.alloy")
+    reader = SetflFile("test.eam.alloy")
+    with reader:
+        assert reader.symbol_pairs == subset.symbol_pairs
+        for sp in reader.symbol_pairs:
+            assert np.array_equal(reader.pair_function[sp],
+                                  subset.pair_function[sp])
+        for s in reader.symbols:
+            assert np.array_equal(reader.density_function[s],
+                                  subset.density_function[s])
+    os.remove("test.eam.alloy")
+    with pytest.raises(ValueError):
+        setfl.subset(["Fe", "Al"])
+    with pytest.raises(ValueError):
+        setfl.subset(["Fe", "Fe"])
+
+
+def test_setfl_file_resample():
+    """Tests grid resampling of an eam.SetflFile."""
+    setfl = _synthetic_setfl()
+    resampled = setfl.resample(n_rho=51, d_rho=0.2, n_r=401, d_r=0.0125)
+    assert resampled.n_rho == 51
+    assert resampled.n_r == 401
+    assert resampled.cutoff == setfl.cutoff
+    assert resampled.symbol_pairs == setfl.symbol_pairs
+    rho = np.arange(resampled.n_rho) * resampled.d_rho
+    r = np.arange(resampled.n_r) * resampled.d_r
+    assert np.allclose(resampled.embedding_function["Ni"], -2 * np.sqrt(rho),
+                       atol=1e-2)
+    assert np.allclose(resampled.density_function["Cr"], np.exp(-3 * r),
+                       atol=1e-4)
+    assert np.allclose(resampled.pair_function["CrNi"], 5 * np.cos(r),
+                       atol=1e-6)
+    with pytest.raises(ValueError):
+        setfl.resample(n_rho=101, d_rho=0.2, n_r=201, d_r=0.025)
+
+
+def test_finnis_sinclair_file():
+    """Tests conversion between eam.SetflFile and eam.FinnisSinclairFile."""
+    setfl = _synthetic_setfl()
+    fs = FinnisSinclairFile.from_table(setfl.to_table())
+    assert sorted(fs.density_function) == sorted(
+        [s0 + s1 for s0 in setfl.symbols for s1 in setfl.symbols])
+    assert np.array_equal(fs.density_function["NiCr"],
+                          setfl.density_function["Ni"])
+    fs.density_function["NiCr"] = fs.density_function["NiCr"] * 2
+    fs.write("test.eam.fs")
+    reader = FinnisSinclairFile("test.eam.fs")
+    with reader:
+        assert reader.symbols == fs.symbols
+        assert reader.symbol_pairs == fs.symbol_pairs
+        assert reader.symbol_descriptors == fs.symbol_descriptors
+        for key in fs.density_function:
+            assert np.array_equal(reader.density_function[key],
+                                  fs.density_function[key])
+        for sp in fs.symbol_pairs:
+            assert np.array_equal(reader.pair_function[sp],
+                                  fs.pair_function[sp])
+        subset = reader.subset(["Cr", "Ni"])
+        assert isinstance(subset, FinnisSinclairFile)
+        assert np.array_equal(subset.density_function["NiCr"],
+                              fs.density_function["NiCr"])
+        with pytest.raises(ValueError):
+            SetflFile.from_table(reader.to_table())
+        table = reader.subset(["Fe", "Cr"]).to_table()
+        converted = SetflFile.from_table(table)
+        assert np.array_equal(converted.density_function["Cr"],
+                              setfl.density_function["Cr"])
+    os.remove("test.eam.fs")
+
+
+def test_funcfl_file():
+    """Tests the initialization of an eam.FuncflFile object."""
+    setfl = _synthetic_setfl().subset(["Fe"])
+    setfl.pair_function["FeFe"] = np.abs(setfl.pair_function["FeFe"])
+    funcfl = FuncflFile.from_table(setfl.to_table())
+    funcfl.write("test.eam")
+    reader = FuncflFile("test.eam")
+    with reader:
+        assert reader.comment == "synthetic"
+        assert reader.symbol_descriptor == "26 55.845 2.8665 bcc"
+        assert reader.n_rho == setfl.n_rho
+        assert reader.d_r == setfl.d_r
+        assert np.array_equal(reader.embedding_function,
+                              setfl.embedding_function["Fe"])
+        assert np.array_equal(reader.density_function,
+                              setfl.density_function["Fe"])
+        converted = SetflFile.from_table(reader.to_table("Fe"))
+        assert np.allclose(converted.pair_function["FeFe"],
+                           setfl.pair_function["FeFe"])
+    os.remove("test.eam")
+    with pytest.raises(ValueError):
+        FuncflFile.from_table(_synthetic_setfl().to_table())
+
+
+def test_tabulate_setfl():
+    """Tests tabulation of a setfl file from analytic functions."""
+    symbols = ["Fe", "Cr"]
+    descriptors = {"Fe": "26 55.845 2.8665 bcc", "Cr": "24 51.9961 2.91 bcc"}
+    morse = lambda r: np.exp(-2 * (r - 2.5)) - 2 * np.exp(-(r - 2.5))
+    setfl = tabulate_setfl(symbols,
+                           descriptors,
+                           n_rho=100,
+                           d_rho=0.1,
+                           n_r=100,
+                           d_r=0.05,
+                           cutoff=4.95,
+                           embedding_function={
+                               "Fe": lambda rho: -np.sqrt(rho),
+                               "Cr": lambda rho: -2 * np.sqrt(rho)
+                           },
+                           density_function={
+                               "Fe": lambda r: np.exp(-r),
+                               "Cr": lambda r: np.exp(-2 * r)
+                           },
+                           pair_function={
+                               "FeFe": morse,
+                               "FeCr": morse,
+                               "CrCr": morse
+                           })
+    r = np.arange(100) * 0.05
+    assert setfl.symbol_pairs == ["FeFe", "CrFe", "CrCr"]
+    assert np.allclose(setfl.pair_function["CrFe"], r * morse(r))
+    assert np.allclose(setfl.density_function["Cr"], np.exp(-2 * r))
+    setfl.write("test.eam.alloy")
+    reader = SetflFile("test.eam.alloy")
+    with reader:
+        assert np.array_equal(reader.embedding_function["Cr"],
+                              setfl.embedding_function["Cr"])
+    os.remove("test.eam.alloy")
+    with pytest.raises(ValueError):
+        tabulate_setfl(symbols, descriptors, 100, 0.1, 100, 0.05, 4.95,
+                       {"Fe": np.sqrt}, {"Fe": np.exp}, {"FeFe": np.exp})
+
+
+def test_tabulate_setfl_batch():
+    """Tests batched tabulation of setfl files from analytic functions."""
+    a = np.array([1.0, 2.0, 3.0])[:, np.newaxis]
+    setfls = tabulate_setfl_batch(3, ["Fe"], {"Fe": "26 55.845 2.8665 bcc"},
+                                  n_rho=50,
+                                  d_rho=0.1,
+                                  n_r=60,
+                                  d_r=0.05,
+                                  cutoff=2.95,
+                                  embedding_function={"Fe": np.sqrt},
+                                  density_function={"Fe": lambda r: a * r},
+                                  pair_function={"FeFe": lambda r: -a})
+    assert len(setfls) == 3
+    r = np.arange(60) * 0.05
+    for i, setfl in enumerate(setfls):
+        assert np.allclose(setfl.density_function["Fe"], (i + 1) * r)
+        assert np.allclose(setfl.pair_function["FeFe"], -(i + 1) * r)
+        assert np.allclose(setfl.embedding_function["Fe"],
+                           np.sqrt(np.arange(50) * 0.1))
@@ -1,9 +1,73 @@
+from cmstk.cache import get_result_cache
 import json
-from typing import Any, Dict, List, Optional
+import os
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
 import xml.etree.ElementTree as ET
 from xml.etree.ElementTree import Element
 
 
+def read_lines_reversed(path: str, chunk_size: int = 4096) -> Iterator[str]:
+    """Yields the lines of a text file from last to first.
+
+    Notes:
+        The file is read backwards in fixed size chunks so only the portion of
+        the file preceding the last line consumed is ever read. Lines are
+        yielded without their line terminators and the empty string following
+        a trailing newline is not yielded.
+
+    Args:
+        path: The path to the file.
+        chunk_size: Number of bytes read at a time.
+    """
+    with open(path, "rb") as f:
+        position = f.seek(0, os.SEEK_END)
+        remainder = b""
+        trailing = True
+        while position > 0:
+            start = max(position - chunk_size, 0)
+            f.seek(start)
+            lines = (f.read(position - start) + remainder).split(b"\n")
+            position = start
+            # the first line may continue in the preceding chunk
+            remainder = lines.pop(0)
+            if trailing and len(lines) > 0:
+                trailing = False
+                if lines[-1] == b"":
+                    lines.pop()
+            for line in reversed(lines):
+                yield line.rstrip(b"\r").decode()
+        if not trailing or remainder != b"":
+            yield remainder.rstrip(b"\r").decode()
+
+
+def read_appended_lines(path: str,
+                        offset: int,
+                        final: bool = False) -> Iterator[Tuple[str, int]]:
+    """Yields each complete line of a text file following a byte offset.
+
+    Notes:
+        This is intended for files which are still being written. A trailing
+        line without a line terminator may be incomplete and is not yielded
+        unless `final` is set.
+
+    Args:
+        path: The path to the file.
+        offset: Byte offset at which to start reading.
+        final: Whether or not to yield a trailing line without a terminator.
+
+    Returns:
+        Each line without its line terminator and the byte offset following
+        it.
+    """
+    with open(path, "rb") as f:
+        f.seek(offset)
+        for line in f:
+            if not line.endswith(b"\n") and not final:
+                return
+            offset += len(line)
+            yield line.rstrip(b"\r\n").decode(), offset
+
+
 class BaseFile(object):
     """Abstract base class for file wrappers.
 
@@ -25,6 +89,15 @@ class BaseFile(object):
         for attr in self._attrs:
             setattr(self, attr, None)
 
+    def _cached(self, key: str, version: int,
+                compute: Callable[[], Any]) -> Any:
+        # reuse a value extracted from identical content by the same parser
+        cache = get_result_cache()
+        if cache is None:
+            return compute()
+        key = "{}.{}".format(type(self).__name__, key)
+        return cache.fetch(self.filepath, key, version, compute)
+
     def __enter__(self):
         self.load()
 
@@ -1,4 +1,5 @@
-from cmstk.filetypes import BaseFile, JsonFile, TextFile, XmlFile
+from cmstk.filetypes import (BaseFile, JsonFile, TextFile, XmlFile,
+                             read_appended_lines, read_lines_reversed)
 import os
 import pytest
 
@@ -72,3 +73,28 @@ def test_xml_file():
     with pytest.raises(RuntimeError):
         _ = new_xf.root
     os.remove(filepath)
+
+
+def test_read_lines_reversed():
+    filepath = "test.txt"
+    content = "first\nsecond\r\n\nfourth line\n"
+    with open(filepath, "w", newline="") as f:
+        f.write(content)
+    expected = ["fourth line", "", "second", "first"]
+    for chunk_size in [1, 3, 4096]:
+        assert list(read_lines_reversed(filepath, chunk_size)) == expected
+    os.remove(filepath)
+
+
+def test_read_appended_lines():
+    filepath = "test.txt"
+    with open(filepath, "w") as f:
+        f.write("first\nsecond\nthi")
+    lines = list(read_appended_lines(filepath, 0))
+    assert lines == [("first", 6), ("second", 13)]
+    assert list(read_appended_lines(filepath, 13)) == []
+    assert list(read_appended_lines(filepath, 13, final=True)) == [("thi", 16)]
+    with open(filepath, "a") as f:
+        f.write("rd\n")
+    assert list(read_appended_lines(filepath, 13)) == [("third", 19)]
+    os.remove(filepath)
@@ -11,6 +11,13 @@ class SimulationCell(AtomCollection):
         coordinate_matrix: 3x3 matrix defining the coordinate system of the
             bounding box.
         tolerance: The radius in which to check for atoms on add or remove.
+
+    Attributes:
+        coordinate_matrix: 3x3 matrix defining the coordinate system of the
+            bounding box.
+        fractional_matrix: Inverse of `coordinate_matrix` which transforms
+            Cartesian positions (as rows) into fractional positions.
+        - Cached until `coordinate_matrix` is reassigned.
     """
 
     def __init__(self,
@@ -19,5 +26,58 @@ class SimulationCell(AtomCollection):
                  tolerance: float = 0.001) -> None:
         if coordinate_matrix is None:
             coordinate_matrix = np.identity(3)
+        self._fractional_matrix: Optional[np.ndarray] = None
         self.coordinate_matrix = coordinate_matrix
         super().__init__(atoms, tolerance)
+
+    @property
+    def coordinate_matrix(self) -> np.ndarray:
+        return self._coordinate_matrix
+
+    @coordinate_matrix.setter
+    def coordinate_matrix(self, value: np.ndarray) -> None:
+        self._coordinate_matrix = value
+        self._fractional_matrix = None
+
+    @property
+    def fractional_matrix(self) -> np.ndarray:
+        if self._fractional_matrix is None:
+            self._fractional_matrix = np.linalg.inv(self.coordinate_matrix)
+        return self._fractional_matrix
+
+    @classmethod
+    def from_arrays(cls,
+                    positions: np.ndarray,
+                    coordinate_matrix: Optional[np.ndarray] = None,
+                    symbols: Optional[List[str]] = None,
+                    tolerance: float = 0.001) -> 'SimulationCell':
+        """Initializes a SimulationCell from arrays of atomic properties.
+
+        Notes:
+            The positions are assumed to be distinct so the tolerance check
+            performed by `add_atom` is skipped. This avoids a quadratic number
+            of distance evaluations when building large cells from files.
+
+        Args:
+            positions: Position of each atom.
+            - Shape: (n_atoms, 3)
+            coordinate_matrix: 3x3 matrix defining the coordinate system of
+                the bounding box.
+            symbols: IUPAC chemical symbol of each atom.
+            tolerance: The radius in which to check for atoms on add or remove.
+
+        Raises:
+            ValueError
+            - Number of symbols must match number of atoms.
+        """
+        positions = np.array(positions, dtype=float).reshape((-1, 3))
+        if symbols is None:
+            symbols = [""] * len(positions)
+        if len(symbols) != len(positions):
+            err = "Number of symbols must match number of atoms."
+            raise ValueError(err)
+        cell = cls(None, coordinate_matrix, tolerance)
+        cell._atoms = [
+            Atom(position=p, symbol=s) for p, s in zip(positions, symbols)
+        ]
+        return cell
@@ -1,6 +1,7 @@
 from cmstk.structure.atom import Atom
 from cmstk.structure.simulation import SimulationCell
 import numpy as np
+import pytest
 
 
 def test_simulation_cell():
@@ -10,4 +11,16 @@ def test_simulation_cell():
         Atom(position=np.array([1, 1, 1]))
     ]
     cell = SimulationCell(atoms=atoms)
-    assert cell.n_atoms == 2
\ No newline at end of file
+    assert cell.n_atoms == 2
+
+def test_simulation_cell_from_arrays():
+    """Tests initialization of a SimulationCell object from arrays."""
+    positions = np.array([[0, 0, 0], [0.5, 0.5, 0.5]])
+    cell = SimulationCell.from_arrays(positions, np.identity(3) * 2.87,
+                                      ["Fe", "Cr"])
+    assert cell.n_atoms == 2
+    assert cell.symbols == ["Fe", "Cr"]
+    assert np.array_equal(cell.positions[1], [0.5, 0.5, 0.5])
+    assert cell.coordinate_matrix[0, 0] == 2.87
+    with pytest.raises(ValueError):
+        SimulationCell.from_arrays(positions, symbols=["Fe"])
@@ -0,0 +1,297 @@
+from cmstk.filetypes import BaseFile
+from cmstk.vasp.poscar import PoscarFile
+import mmap
+import numpy as np
+import os
+from typing import BinaryIO, List, Optional, Tuple
+
+
+class VolumetricFile(BaseFile):
+    """Generalized representation of a VASP volumetric data file.
+
+    Notes:
+        This is a read-only file wrapper.
+
+        The structure header is read into a PoscarFile and the first grid is
+        decoded on `load`. The grid is read `chunk_size` bytes at a time and
+        each chunk is converted to floats in a single call which writes
+        straight into the preallocated grid. When `cache` is set the grid is
+        written into a memory mapped .npy file instead and later loads map
+        that file without decoding the text. A cache older than the file is
+        rebuilt.
+
+        Sections following the first grid (augmentation occupancies and the
+        spin grid) are not read until `spin_grid` is accessed.
+
+        Values are stored in the order that VASP writes them (x fastest) so
+        the grids are Fortran ordered views with shape (NGX, NGY, NGZ).
+
+    Args:
+        filepath: Filepath to a volumetric data file.
+        cache: Whether or not to cache the decoded grids on disk.
+        chunk_size: Number of bytes decoded at a time.
+
+    Attributes:
+        filepath: Filepath to a volumetric data file.
+        cache: Whether or not to cache the decoded grids on disk.
+        cache_path: Filepath of the grid cache.
+        chunk_size: Number of bytes decoded at a time.
+        grid: Values of the first grid.
+        - Shape: (NGX, NGY, NGZ)
+        grid_shape: Number of grid points along each lattice vector.
+        lattice: Lattice vectors (including the scaling factor) as rows of a
+                 matrix.
+        poscar: Structure header of the file.
+        spin_grid: Values of the second (spin) grid.
+        - Shape: (NGX, NGY, NGZ)
+        volume: Volume of the cell.
+    """
+
+    def __init__(self,
+                 filepath: str,
+                 cache: bool = False,
+                 chunk_size: int = 8388608) -> None:
+        self.cache = cache
+        self.chunk_size = chunk_size
+        self._grid: Optional[np.ndarray] = None
+        self._grid_end: Optional[int] = None
+        self._grid_line: Optional[bytes] = None
+        self._poscar: Optional[PoscarFile] = None
+        self._spin_grid: Optional[np.ndarray] = None
+        super().__init__(filepath)
+
+    def load(self, path: Optional[str] = None) -> None:
+        if path is None:
+            path = self.filepath
+        with open(path, "rb") as f:
+            self._poscar = PoscarFile(path)
+            self._poscar._lines = _read_header(f)
+            line = f.readline()
+            while len(line.strip()) == 0:
+                line = f.readline()
+            self._grid_line = line.rstrip(b"\r\n")
+            self._grid = self._read_grid(f, self.cache_path)
+            self._grid_end = f.tell()
+
+    @property
+    def cache_path(self) -> str:
+        return "{}.grid.npy".format(self.filepath)
+
+    @property
+    def grid(self) -> np.ndarray:
+        if self._grid is None:
+            raise RuntimeError("file not loaded")
+        return self._grid
+
+    @property
+    def grid_shape(self) -> Tuple[int, int, int]:
+        if self._grid_line is None:
+            raise RuntimeError("file not loaded")
+        nx, ny, nz = [int(n) for n in self._grid_line.split()]
+        return (nx, ny, nz)
+
+    @property
+    def lattice(self) -> np.ndarray:
+        cell = self.poscar.simulation_cell
+        return cell.coordinate_matrix * self.poscar.scaling_factor
+
+    @property
+    def poscar(self) -> PoscarFile:
+        if self._poscar is None:
+            raise RuntimeError("file not loaded")
+        return self._poscar
+
+    @property
+    def spin_grid(self) -> np.ndarray:
+        if self._spin_grid is None:
+            if self._grid_end is None or self._grid_line is None:
+                raise RuntimeError("file not loaded")
+            with open(self.filepath, "rb") as f:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    # the spin grid repeats the grid line of the first grid
+                    marker = b"\n" + self._grid_line + b"\n"
+                    position = mm.find(marker, self._grid_end - 1)
+                if position == -1:
+                    err = "`{}` does not include a spin grid.".format(
+                        self.filepath)
+                    raise ValueError(err)
+                f.seek(position + len(marker))
+                path = "{}.spin.npy".format(self.filepath)
+                self._spin_grid = self._read_grid(f, path)
+        return self._spin_grid
+
+    @property
+    def volume(self) -> float:
+        return float(abs(np.linalg.det(self.lattice)))
+
+    def _read_grid(self, f: BinaryIO, path: str) -> np.ndarray:
+        shape = self.grid_shape
+        if self.cache:
+            if (os.path.exists(path)
+                    and os.path.getmtime(path) >= os.path.getmtime(
+                        self.filepath)):
+                return np.load(path, mmap_mode="r")
+            grid = np.lib.format.open_memmap(path,
+                                             mode="w+",
+                                             shape=shape,
+                                             fortran_order=True)
+        else:
+            grid = np.empty(shape, order="F")
+        _decode_grid(f, grid.ravel(order="F"), self.chunk_size)
+        if self.cache:
+            grid.flush()
+            del grid
+            return np.load(path, mmap_mode="r")
+        return grid
+
+
+class ChgcarFile(VolumetricFile):
+    """File wrapper for a VASP CHGCAR file.
+
+    Notes:
+        The grid values are the charge density multiplied by the volume of
+        the cell and the spin grid is the magnetization density of a spin
+        polarized calculation.
+
+    Args:
+        filepath: Filepath to a CHGCAR file.
+        cache: Whether or not to cache the decoded grids on disk.
+        chunk_size: Number of bytes decoded at a time.
+    """
+
+    def __init__(self,
+                 filepath: Optional[str] = None,
+                 cache: bool = False,
+                 chunk_size: int = 8388608) -> None:
+        if filepath is None:
+            filepath = "CHGCAR"
+        super().__init__(filepath, cache, chunk_size)
+
+
+def planar_average(grid: np.ndarray, axis: int = 2) -> np.ndarray:
+    """Returns the average of a grid over each plane normal to an axis.
+
+    Args:
+        grid: Volumetric grid.
+        - Shape: (NGX, NGY, NGZ)
+        axis: Lattice vector normal to the averaged planes.
+
+    Returns:
+        Average of each plane in the order of the grid points along `axis`.
+    """
+    if axis not in [0, 1, 2]:
+        err = "axis must be 0, 1 or 2."
+        raise ValueError(err)
+    axes = tuple(i for i in range(3) if i != axis)
+    return np.asarray(grid.mean(axis=axes))
+
+
+def spherical_average(grid: np.ndarray,
+                      lattice: np.ndarray,
+                      center: np.ndarray,
+                      radius: float,
+                      n_bins: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+    """Returns the average of a grid over concentric spherical shells.
+
+    Notes:
+        Distances are measured to the nearest periodic image of `center`. The
+        grid is processed one plane at a time so memory usage does not scale
+        with the size of the grid and a memory mapped grid is never copied.
+
+    Args:
+        grid: Volumetric grid.
+        - Shape: (NGX, NGY, NGZ)
+        lattice: Lattice vectors as rows of a matrix.
+        center: Fractional coordinates of the center of the sphere.
+        radius: Radius of the sphere.
+        n_bins: Number of shells of equal width.
+        - The average of the whole sphere is returned with a single shell.
+
+    Returns:
+        Radius at the middle of each shell and the average of the grid points
+        within each shell.
+        - The average of a shell which includes no grid points is NaN.
+    """
+    nx, ny, nz = grid.shape
+    center = np.asarray(center, dtype=float)
+    lattice = np.asarray(lattice, dtype=float)
+    width = radius / n_bins
+    # fractional offsets of every point in a plane of constant x
+    offsets = np.zeros((ny, nz, 3))
+    offsets[..., 1] = (np.arange(ny) / ny - center[1])[:, np.newaxis]
+    offsets[..., 2] = (np.arange(nz) / nz - center[2])[np.newaxis, :]
+    sums = np.zeros(n_bins)
+    counts = np.zeros(n_bins)
+    for i in range(nx):
+        offsets[..., 0] = i / nx - center[0]
+        wrapped = offsets - np.round(offsets)
+        distances = np.linalg.norm(np.matmul(wrapped, lattice), axis=-1)
+        mask = distances < radius
+        if not np.any(mask):
+            continue
+        bins = (distances[mask] / width).astype(int)
+        sums += np.bincount(bins, weights=grid[i][mask], minlength=n_bins)
+        counts += np.bincount(bins, minlength=n_bins)
+    radii = (np.arange(n_bins) + 0.5) * width
+    with np.errstate(invalid="ignore"):
+        return radii, sums / counts
+
+
+def _read_header(f: BinaryIO) -> List[str]:
+    # read only the lines of the structure header as PoscarFile stores them
+    lines: List[str] = []
+    n_lines: Optional[int] = None
+    while n_lines is None or len(lines) < n_lines:
+        line = f.readline()
+        if len(line) == 0:
+            err = "Unexpected end of file in the structure header."
+            raise ValueError(err)
+        line = line.decode().strip()
+        if len(line) == 0:
+            continue
+        lines.append(line)
+        if len(lines) == 8:
+            # VASP5 files name the species on the line preceding the counts
+            counts = 5 if lines[5].split()[0].isdigit() else 6
+            n_atoms = sum(int(n) for n in lines[counts].split())
+            coordinate_system = counts + 1
+            if lines[coordinate_system][0] in ["S", "s"]:
+                coordinate_system += 1
+            n_lines = coordinate_system + 1 + n_atoms
+    return lines
+
+
+def _decode_grid(f: BinaryIO, out: np.ndarray, chunk_size: int) -> None:
+    # convert whole lines one chunk at a time until the grid is full
+    n_values = len(out)
+    filled = 0
+    remainder = b""
+    n_lines: Optional[int] = None
+    while filled < n_values:
+        chunk = f.read(chunk_size)
+        text = remainder + chunk
+        if len(chunk) == 0:
+            end = len(text)
+        else:
+            end = text.rfind(b"\n") + 1
+        if n_lines is None and end > 0:
+            # every line holds the same number of values except the last
+            per_line = len(text[:text.find(b"\n")].split())
+            n_lines = -(-(n_values - filled) // per_line)
+        if n_lines is not None:
+            newlines = np.flatnonzero(
+                np.frombuffer(text, dtype=np.uint8, count=end) == 10)
+            if len(newlines) >= n_lines:
+                end = int(newlines[n_lines - 1]) + 1
+            n_lines -= len(newlines[newlines < end])
+        values = np.fromstring(text[:end].decode(), sep=" ")
+        if filled + len(values) > n_values or (len(chunk) == 0
+                                               and filled + len(values)
+                                               < n_values):
+            err = "Unable to parse the volumetric grid."
+            raise ValueError(err)
+        out[filled:filled + len(values)] = values
+        filled += len(values)
+        remainder = text[end:]
+    # leave the file positioned after the grid
+    f.seek(-len(remainder), os.SEEK_CUR)
@@ -0,0 +1,89 @@
+from cmstk.vasp.chgcar import ChgcarFile, planar_average, spherical_average
+import numpy as np
+import os
+import pytest
+
+_shape = (4, 3, 5)
+
+
+def _grid(offset):
+    values = np.arange(np.prod(_shape), dtype=float) + offset
+    return values.reshape(_shape, order="F")
+
+
+def _grid_text(grid):
+    values = grid.ravel(order="F")
+    lines = [
+        " ".join("{:.11E}".format(v) for v in values[i:i + 5])
+        for i in range(0, len(values), 5)
+    ]
+    text = "   {}   {}   {}\n".format(*_shape)
+    return text + "\n".join(lines) + "\n"
+
+
+def _write_chgcar(path):
+    text = "Fe Cr\n   1.00000000000000\n"
+    text += "     4.000000    0.000000    0.000000\n"
+    text += "     0.000000    3.000000    0.000000\n"
+    text += "     0.000000    0.000000    5.000000\n"
+    text += "   Fe   Cr\n     1     1\nDirect\n"
+    text += "  0.000000  0.000000  0.000000\n  0.500000  0.500000  0.500000\n"
+    text += "\n" + _grid_text(_grid(0))
+    text += "augmentation occupancies   1  4\n  0.1 0.2 0.3 0.4\n"
+    text += "augmentation occupancies   2  4\n  0.5 0.6 0.7 0.8\n"
+    text += "  0.000 0.000\n" + _grid_text(_grid(1000))
+    text += "augmentation occupancies   1  4\n  0.1 0.2 0.3 0.4\n"
+    with open(path, "w") as f:
+        f.write(text)
+
+
+def test_chgcar_file():
+    """Tests chunked decoding of a CHGCAR file."""
+    path = "test.CHGCAR"
+    _write_chgcar(path)
+    # a small chunk size forces lines to straddle chunk boundaries
+    for chunk_size in [23, 8388608]:
+        chgcar = ChgcarFile(path, chunk_size=chunk_size)
+        with chgcar:
+            assert chgcar.grid_shape == _shape
+            assert chgcar.poscar.species == ["Fe", "Cr"]
+            assert chgcar.volume == pytest.approx(60.0)
+            assert np.array_equal(chgcar.grid, _grid(0))
+            assert np.array_equal(chgcar.spin_grid, _grid(1000))
+    chgcar = ChgcarFile(path, cache=True)
+    with chgcar:
+        assert np.array_equal(chgcar.grid, _grid(0))
+        assert isinstance(chgcar.grid, np.memmap)
+        assert np.array_equal(chgcar.spin_grid, _grid(1000))
+    assert os.path.exists(chgcar.cache_path)
+    # the cache is mapped without decoding the grid
+    cached = ChgcarFile(path, cache=True)
+    with cached:
+        assert np.array_equal(cached.grid, _grid(0))
+    os.remove(chgcar.cache_path)
+    os.remove("{}.spin.npy".format(path))
+    os.remove(path)
+
+
+def test_planar_average():
+    """Tests averaging a grid over planes."""
+    grid = _grid(0)
+    assert np.allclose(planar_average(grid, 2), grid.mean(axis=(0, 1)))
+    assert planar_average(grid, 0).shape == (_shape[0],)
+    with pytest.raises(ValueError):
+        planar_average(grid, 3)
+
+
+def test_spherical_average():
+    """Tests averaging a grid over spherical shells."""
+    grid = np.ones((10, 10, 10))
+    lattice = np.identity(3) * 10.0
+    radii, averages = spherical_average(grid, lattice, [0.0, 0.0, 0.0], 3.0,
+                                        3)
+    assert np.allclose(radii, [0.5, 1.5, 2.5])
+    assert np.allclose(averages, 1.0)
+    grid = np.zeros((10, 10, 10))
+    grid[0, 0, 0] = 7.0
+    # the nearest periodic image of the center is used
+    _, averages = spherical_average(grid, lattice, [0.99, 0.99, 0.99], 0.5)
+    assert averages[0] == pytest.approx(7.0)
@@ -0,0 +1,91 @@
+from cmstk.filetypes import TextFile
+import numpy as np
+from typing import Optional
+
+
+class DoscarFile(TextFile):
+    """File wrapper for a VASP DOSCAR file.
+
+    Notes:
+        This is a read-only file wrapper.
+
+        The arrays share the layout of the corresponding VasprunFile
+        properties so that a DOSCAR can stand in for a missing or truncated
+        vasprun.xml file. Each block of the file is decoded with a single
+        numeric conversion.
+
+    Args:
+        filepath: Filepath to a DOSCAR file.
+
+    Attributes:
+        filepath: Filepath to a DOSCAR file.
+        density_of_states: Total density of states.
+        - Shape: (n_energies, 3)
+        - Columns are the energy, the density of states and the integrated
+          density of states of the last spin channel as in VasprunFile.
+        fermi_energy: The calculated Fermi Energy.
+        n_energies: Number of energies in each block.
+        n_spins: Number of spin channels.
+        partial_density_of_states: Site and orbital projected density of states.
+        - Shape: (n_ions, n_spins, n_energies, n_orbitals)
+        - Empty if the file does not include projections.
+    """
+
+    def __init__(self, filepath: Optional[str] = None) -> None:
+        if filepath is None:
+            filepath = "DOSCAR"
+        self._density_of_states: Optional[np.ndarray] = None
+        self._partial_density_of_states: Optional[np.ndarray] = None
+        super().__init__(filepath)
+
+    @property
+    def density_of_states(self) -> np.ndarray:
+        if self._density_of_states is None:
+            block = self._read_block(0)
+            n_spins = self.n_spins
+            self._density_of_states = block[:, [0, n_spins, 2 * n_spins]]
+        return self._density_of_states
+
+    @property
+    def fermi_energy(self) -> float:
+        return float(self.lines[5].split()[3])
+
+    @property
+    def n_energies(self) -> int:
+        return int(self.lines[5].split()[2])
+
+    @property
+    def n_spins(self) -> int:
+        # the total block reports the density and its integral for each spin
+        n_columns = len(self.lines[6].split())
+        return (n_columns - 1) // 2
+
+    @property
+    def partial_density_of_states(self) -> np.ndarray:
+        if self._partial_density_of_states is None:
+            n_blocks = (len(self.lines) - 5) // (self.n_energies + 1)
+            n_ions = n_blocks - 1
+            if n_ions == 0:
+                pdos = np.zeros((0, self.n_spins, self.n_energies, 0))
+            else:
+                start = 6 + self.n_energies
+                end = start + n_ions * (self.n_energies + 1)
+                lines = [
+                    line for i, line in enumerate(self.lines[start:end])
+                    if i % (self.n_energies + 1) != 0
+                ]
+                values = np.fromstring(" ".join(lines), sep=" ")
+                pdos = values.reshape((n_ions, self.n_energies, -1))[..., 1:]
+                # orbital columns alternate between spin channels
+                pdos = pdos.reshape(
+                    (n_ions, self.n_energies, -1, self.n_spins))
+                pdos = pdos.transpose((0, 3, 1, 2))
+            self._partial_density_of_states = pdos
+        return self._partial_density_of_states
+
+    def _read_block(self, index: int) -> np.ndarray:
+        # each block is a header line followed by a line for each energy
+        start = 6 + index * (self.n_energies + 1)
+        end = start + self.n_energies
+        values = np.fromstring(" ".join(self.lines[start:end]), sep=" ")
+        return values.reshape((self.n_energies, -1))
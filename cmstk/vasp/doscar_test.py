@@ -0,0 +1,46 @@
+from cmstk.vasp.doscar import DoscarFile
+import numpy as np
+import os
+import pytest
+
+_n_energies = 4
+_n_ions = 2
+_n_orbitals = 3
+
+
+def _write_doscar(path):
+    text = "  2  2  1  0\n  0.1E+02  0.3E-09  0.3E-09  0.3E-09  0.5E-15\n"
+    text += "  1.0E-04\n  CAR\n Fe\n"
+    header = "   5.0 -5.0   {}   1.50000000   1.0\n".format(_n_energies)
+    text += header
+    for e in range(_n_energies):
+        text += " {} {} {} {} {}\n".format(e, e + 0.1, e + 0.2, e + 0.3,
+                                           e + 0.4)
+    for i in range(_n_ions):
+        text += header
+        for e in range(_n_energies):
+            values = [
+                i * 100 + o * 10 + s + e / 10 for o in range(_n_orbitals)
+                for s in range(2)
+            ]
+            text += " {} {}\n".format(e, " ".join(map(str, values)))
+    with open(path, "w") as f:
+        f.write(text)
+
+
+def test_doscar_file():
+    """Tests decoding of a spin polarized DOSCAR file."""
+    path = "test.DOSCAR"
+    _write_doscar(path)
+    doscar = DoscarFile(path)
+    with doscar:
+        assert doscar.fermi_energy == 1.5
+        assert doscar.n_spins == 2
+        dos = doscar.density_of_states
+        assert dos.shape == (_n_energies, 3)
+        assert np.allclose(dos[2], [2, 2.2, 2.4])
+        pdos = doscar.partial_density_of_states
+        assert pdos.shape == (_n_ions, 2, _n_energies, _n_orbitals)
+        assert pdos[1, 1, 3, 2] == pytest.approx(121.3)
+        assert pdos[0, 0, 1, 1] == pytest.approx(10.1)
+    os.remove(path)
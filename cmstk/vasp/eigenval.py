@@ -0,0 +1,95 @@
+from cmstk.filetypes import TextFile
+import numpy as np
+from typing import Optional
+
+
+class EigenvalFile(TextFile):
+    """File wrapper for a VASP EIGENVAL file.
+
+    Notes:
+        This is a read-only file wrapper.
+
+        The eigenvalues share the layout of `VasprunFile.eigenvalues` so that
+        an EIGENVAL can stand in for a missing or truncated vasprun.xml file.
+        Every k-point and band line is decoded with a single numeric
+        conversion.
+
+        Files written by versions of VASP which do not report occupations
+        have NaN occupations.
+
+    Args:
+        filepath: Filepath to an EIGENVAL file.
+
+    Attributes:
+        filepath: Filepath to an EIGENVAL file.
+        eigenvalues: Energy and occupation of each band at each k-point.
+        - Shape: (n_spins, n_kpoints, n_bands, 2)
+        kpoint_weights: Weight of each k-point.
+        kpoints: Reciprocal coordinates of each k-point.
+        - Shape: (n_kpoints, 3)
+        n_bands: Number of bands.
+        n_electrons: Number of electrons.
+        n_kpoints: Number of k-points.
+        n_spins: Number of spin channels.
+    """
+
+    def __init__(self, filepath: Optional[str] = None) -> None:
+        if filepath is None:
+            filepath = "EIGENVAL"
+        self._eigenvalues: Optional[np.ndarray] = None
+        self._kpoint_weights: Optional[np.ndarray] = None
+        self._kpoints: Optional[np.ndarray] = None
+        super().__init__(filepath)
+
+    @property
+    def eigenvalues(self) -> np.ndarray:
+        if self._eigenvalues is None:
+            self._read_kpoints()
+        return self._eigenvalues  # type: ignore
+
+    @property
+    def kpoint_weights(self) -> np.ndarray:
+        if self._kpoint_weights is None:
+            self._read_kpoints()
+        return self._kpoint_weights  # type: ignore
+
+    @property
+    def kpoints(self) -> np.ndarray:
+        if self._kpoints is None:
+            self._read_kpoints()
+        return self._kpoints  # type: ignore
+
+    @property
+    def n_bands(self) -> int:
+        return int(self.lines[5].split()[2])
+
+    @property
+    def n_electrons(self) -> float:
+        return float(self.lines[5].split()[0])
+
+    @property
+    def n_kpoints(self) -> int:
+        return int(self.lines[5].split()[1])
+
+    @property
+    def n_spins(self) -> int:
+        return int(self.lines[0].split()[3])
+
+    def _read_kpoints(self) -> None:
+        # each k-point line is followed by a line for each band
+        n_kpoints = self.n_kpoints
+        n_bands = self.n_bands
+        n_spins = self.n_spins
+        end = 6 + n_kpoints * (n_bands + 1)
+        values = np.fromstring(" ".join(self.lines[6:end]), sep=" ")
+        values = values.reshape((n_kpoints, -1))
+        self._kpoints = values[:, :3]
+        self._kpoint_weights = values[:, 3]
+        # band index, energy of each spin and occupation of each spin
+        bands = values[:, 4:].reshape((n_kpoints, n_bands, -1))
+        eigenvalues = np.full((n_spins, n_kpoints, n_bands, 2), np.nan)
+        eigenvalues[..., 0] = bands[..., 1:1 + n_spins].transpose((2, 0, 1))
+        if bands.shape[-1] == 1 + 2 * n_spins:
+            occupations = bands[..., 1 + n_spins:]
+            eigenvalues[..., 1] = occupations.transpose((2, 0, 1))
+        self._eigenvalues = eigenvalues
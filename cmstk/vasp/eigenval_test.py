@@ -0,0 +1,45 @@
+from cmstk.vasp.eigenval import EigenvalFile
+import numpy as np
+import os
+import pytest
+
+_n_kpoints = 3
+_n_bands = 4
+
+
+def _write_eigenval(path, occupations=True):
+    text = "    2    2    1    2\n  0.1E+02  0.3E-09  0.3E-09  0.3E-09  0.5E-15\n"
+    text += "  1.0E-04\n  CAR\n Fe\n"
+    text += "     16    {}    {}\n\n".format(_n_kpoints, _n_bands)
+    for k in range(_n_kpoints):
+        text += "  {:.7E}  0.0000000E+00  0.0000000E+00  {:.7E}\n".format(
+            k / 4, 1 / _n_kpoints)
+        for b in range(_n_bands):
+            values = [b + 1, k * 10 + b, 100 + k * 10 + b]
+            if occupations:
+                values += [1.0, 0.5]
+            text += " ".join(map(str, values)) + "\n"
+        text += "\n"
+    with open(path, "w") as f:
+        f.write(text)
+
+
+def test_eigenval_file():
+    """Tests decoding of a spin polarized EIGENVAL file."""
+    path = "test.EIGENVAL"
+    _write_eigenval(path)
+    eigenval = EigenvalFile(path)
+    with eigenval:
+        assert eigenval.n_electrons == 16
+        assert eigenval.n_spins == 2
+        eigenvalues = eigenval.eigenvalues
+        assert eigenvalues.shape == (2, _n_kpoints, _n_bands, 2)
+        assert np.array_equal(eigenvalues[1, 2, 3], [123, 0.5])
+        assert np.array_equal(eigenvalues[0, 1, 2], [12, 1.0])
+        assert eigenval.kpoints[2, 0] == pytest.approx(0.5)
+        assert np.allclose(eigenval.kpoint_weights, 1 / _n_kpoints)
+    _write_eigenval(path, occupations=False)
+    with eigenval:
+        assert eigenval.eigenvalues[1, 2, 3, 0] == 123
+        assert np.all(np.isnan(eigenval.eigenvalues[..., 1]))
+    os.remove(path)
@@ -1,11 +1,17 @@
 from cmstk.filetypes import TextFile
 from cmstk.util import BaseTag
-from typing import Any, List, Optional
+import numpy as np
+from typing import Any, Dict, List, Optional, Type
 
 
 class IncarTag(BaseTag):
     """Tag preconfigured for INCAR files.
 
+    Notes:
+        Values are decoded from strings into the value type of the tag class
+        registered under the tag's name in `INCAR_TAGS`. Tags which are not
+        registered keep their value as a string.
+
     Args:
         name: The tag's name.
         comment: Description of the tag's purpose.
@@ -18,17 +24,68 @@ class IncarTag(BaseTag):
     """
 
     _comment_prefix = "!"
+    _value_type: type = str
 
     def __init__(self,
                  name: Optional[str] = None,
                  comment: Optional[str] = None,
                  value: Any = None) -> None:
-        super().__init__(name, comment, value)
+        super().__init__(comment=comment, name=name, value=value)
+
+    @classmethod
+    def from_str(cls, s: str) -> 'IncarTag':
+        """Parses tag info from a string into a Tag object of the registered
+           type.
+
+        Notes:
+            The string should have the form:
+            <name> = <value> ! <comment>
+
+        Args:
+            s: The string to parse.
+
+        Raises:
+            ValueError
+            - The string does not contain a tag.
+            - The value cannot be decoded into the registered type.
+        """
+        name, separator, value = s.partition("=")
+        if separator == "":
+            err = "`{}` does not contain a tag.".format(s)
+            raise ValueError(err)
+        name = name.strip()
+        value, _, comment = value.partition(cls._comment_prefix)
+        value = value.strip()
+        comment = comment.strip()
+        tag_type = INCAR_TAGS.get(name)
+        if tag_type is None:
+            tag = IncarTag(name, None, value)
+        else:
+            tag = tag_type(_decode_value(value, tag_type._value_type))
+        if len(comment) > 0:
+            tag.comment = comment
+        return tag
+
+    def to_str(self) -> str:
+        """Writes the tag info into a string."""
+        value = self.value
+        if isinstance(value, (bool, np.bool_)):
+            value = ".TRUE." if value else ".FALSE."
+        elif isinstance(value, (list, tuple, np.ndarray)):
+            value = " ".join(str(v) for v in value)
+        return "{} = {} {} {}".format(self.name, value, self._comment_prefix,
+                                      self.comment).strip()
 
 
 class IncarFile(TextFile):
     """File wrapper for a VASP INCAR file.
 
+    Notes:
+        The tags are indexed by name in the order that they were added so a
+        tag is found or updated in constant time with `incar[name]`. Setting
+        a value replaces the tag rather than mutating it which makes `copy`
+        cheap: a copy shares every tag which it does not override.
+
     Args:
         filepath: Filepath to an INCAR file
         tags: The VASP tags in the incar file.
@@ -43,27 +100,115 @@ class IncarFile(TextFile):
                  tags: Optional[List[IncarTag]] = None) -> None:
         if filepath is None:
             filepath = "INCAR"
-        self.filepath = filepath
-        self._tags = tags
+        self._index: Optional[Dict[str, IncarTag]] = None
+        if tags is not None:
+            self._index = {tag.name: tag for tag in tags}
+        super().__init__(filepath)
 
     def write(self, path: Optional[str] = None) -> None:
         if path is None:
             path = self.filepath
+        lines = ["{}\n".format(tag.to_str()) for tag in self.index.values()]
         with open(path, "w") as f:
-            for tag in self.tags:
-                f.write("{}\n".format(tag.to_str()))
+            f.write("".join(lines))
+
+    def copy(self,
+             filepath: Optional[str] = None,
+             **values: Any) -> 'IncarFile':
+        """Returns a copy with some tag values overridden.
+
+        Notes:
+            Only the index is copied. Tags which are not overridden are shared
+            with this file.
+
+        Args:
+            filepath: Filepath of the copy.
+            - Defaults to `filepath`.
+            values: Value of each tag to add or override by name.
+        """
+        if filepath is None:
+            filepath = self.filepath
+        incar = IncarFile(filepath)
+        incar._index = dict(self.index)
+        for name, value in values.items():
+            incar[name] = value
+        return incar
+
+    def get_tag(self, name: str) -> IncarTag:
+        """Returns the tag with a given name.
+
+        Args:
+            name: The tag's name.
+
+        Raises:
+            KeyError
+            - The tag is not set.
+        """
+        return self.index[name]
 
     @property
-    def tags(self) -> List[IncarTag]:
-        if self._tags is None:
-            self._tags = []
+    def index(self) -> Dict[str, IncarTag]:
+        if self._index is None:
+            self._index = {}
             for line in self.lines:
-                self._tags.append(IncarTag.from_str(line)) # type: ignore
-        return self._tags
+                if line[0] in ["#", "!"] or "=" not in line:
+                    continue
+                tag = IncarTag.from_str(line)
+                self._index[tag.name] = tag
+        return self._index
+
+    @property
+    def tags(self) -> List[IncarTag]:
+        return list(self.index.values())
 
     @tags.setter
     def tags(self, value: List[IncarTag]) -> None:
-        self._tags = value
+        self._index = {tag.name: tag for tag in value}
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.index
+
+    def __delitem__(self, name: str) -> None:
+        del self.index[name]
+
+    def __getitem__(self, name: str) -> Any:
+        return self.index[name].value
+
+    def __setitem__(self, name: str, value: Any) -> None:
+        # replace the tag so that copies sharing it are not affected
+        index = self.index
+        tag_type = INCAR_TAGS.get(name)
+        if tag_type is None:
+            tag = IncarTag(name, None, value)
+        else:
+            tag = tag_type(value)
+        if name in index:
+            tag.comment = index[name].comment
+        index[name] = tag
+
+
+def _decode_value(value: str, value_type: type) -> Any:
+    # decode a tag value written by VASP or by a person
+    try:
+        if value_type is bool:
+            flag = value.strip(".").upper()
+            if flag not in ["TRUE", "T", "FALSE", "F"]:
+                raise ValueError()
+            return flag in ["TRUE", "T"]
+        elif value_type is list:
+            # repeated values are written as <count>*<value>
+            values: List[float] = []
+            for token in value.split():
+                count, _, v = token.rpartition("*")
+                values += [float(v)] * (int(count) if count else 1)
+            return values
+        elif value_type is float:
+            return float(value.lower().replace("d", "e"))
+        else:
+            return value_type(value)
+    except ValueError:
+        err = "Unable to decode `{}` as {}.".format(value, value_type.__name__)
+        raise ValueError(err)
 
 
 class AlgoTag(IncarTag):
@@ -77,6 +222,8 @@ class AlgoTag(IncarTag):
 
 class AminTag(IncarTag):
 
+    _value_type = float
+
     def __init__(self, value: Any = None) -> None:
         super().__init__(
             "AMIN",
@@ -86,12 +233,16 @@ class AminTag(IncarTag):
 
 class AmixTag(IncarTag):
 
+    _value_type = float
+
     def __init__(self, value: Any = None) -> None:
         super().__init__("AMIX", "Linear mixing parameter", value)
 
 
 class AmixMagTag(IncarTag):
 
+    _value_type = float
+
     def __init__(self, value: Any = None) -> None:
         super().__init__("AMIX_MAG",
                          "Linear mixing parameter for magnetization density",
@@ -100,6 +251,8 @@ class AmixMagTag(IncarTag):
 
 class BmixTag(IncarTag):
 
+    _value_type = float
+
     def __init__(self, value: Any = None) -> None:
         super().__init__("BMIX",
                          "Cutoff wave vector for Kerker's mixing scheme", value)
@@ -107,6 +260,8 @@ class BmixTag(IncarTag):
 
 class BmixMagTag(IncarTag):
 
+    _value_type = float
+
     def __init__(self, value: Any = None) -> None:
         super().__init__(
             "BMIX_MAG",
@@ -116,6 +271,8 @@ class BmixMagTag(IncarTag):
 
 class EdiffTag(IncarTag):
 
+    _value_type = float
+
     def __init__(self, value: Any = None) -> None:
         super().__init__(
             "EDIFF", "The global break condition for the electronic SC-loop",
@@ -124,6 +281,8 @@ class EdiffTag(IncarTag):
 
 class EdiffgTag(IncarTag):
 
+    _value_type = float
+
     def __init__(self, value: Any = None) -> None:
         super().__init__(
             "EDIFFG",
@@ -133,6 +292,8 @@ class EdiffgTag(IncarTag):
 
 class EncutTag(IncarTag):
 
+    _value_type = float
+
     def __init__(self, value: Any = None) -> None:
         super().__init__("ENCUT",
                          "Cutoff energy for the planewave basis set in eV",
@@ -141,6 +302,8 @@ class EncutTag(IncarTag):
 
 class IbrionTag(IncarTag):
 
+    _value_type = int
+
     def __init__(self, value: Any = None) -> None:
         super().__init__("IBRION",
                          "Determines how the ions are updated and moved", value)
@@ -148,6 +311,8 @@ class IbrionTag(IncarTag):
 
 class IchargTag(IncarTag):
 
+    _value_type = int
+
     def __init__(self, value: Any = None) -> None:
         super().__init__(
             "ICHARG", "Determines construction of the initial charge density",
@@ -156,6 +321,8 @@ class IchargTag(IncarTag):
 
 class IsifTag(IncarTag):
 
+    _value_type = int
+
     def __init__(self, value: Any = None) -> None:
         super().__init__(
             "ISIF",
@@ -165,6 +332,8 @@ class IsifTag(IncarTag):
 
 class IsmearTag(IncarTag):
 
+    _value_type = int
+
     def __init__(self, value: Any = None) -> None:
         super().__init__(
             "ISMEAR",
@@ -174,12 +343,16 @@ class IsmearTag(IncarTag):
 
 class IspinTag(IncarTag):
 
+    _value_type = int
+
     def __init__(self, value: Any = None) -> None:
         super().__init__("ISPIN", "Specifies spin polarization", value)
 
 
 class IstartTag(IncarTag):
 
+    _value_type = int
+
     def __init__(self, value: Any = None) -> None:
         super().__init__("ISTART",
                          "Determines whether or not to read the WAVECAR file",
@@ -188,12 +361,16 @@ class IstartTag(IncarTag):
 
 class IsymTag(IncarTag):
 
+    _value_type = int
+
     def __init__(self, value: Any = None) -> None:
         super().__init__("ISYM", "Determines how symmetry is treated", value)
 
 
 class LchargTag(IncarTag):
 
+    _value_type = bool
+
     def __init__(self, value: Any = None) -> None:
         super().__init__(
             "LCHARG",
@@ -202,6 +379,8 @@ class LchargTag(IncarTag):
 
 class LorbitTag(IncarTag):
 
+    _value_type = int
+
     def __init__(self, value: Any = None) -> None:
         super().__init__(
             "LORBIT", "Determines whether PROCAR or PROUT files are written",
@@ -219,6 +398,8 @@ class LrealTag(IncarTag):
 
 class LvtotTag(IncarTag):
 
+    _value_type = bool
+
     def __init__(self, value: Any = None) -> None:
         super().__init__("LVTOT",
                          "Determines whether or not a LOCPOT file is written",
@@ -227,6 +408,8 @@ class LvtotTag(IncarTag):
 
 class LwaveTag(IncarTag):
 
+    _value_type = bool
+
     def __init__(self, value: Any = None) -> None:
         super().__init__("LWAVE",
                          "Determines whether or not a WAVECAR file is written",
@@ -235,6 +418,8 @@ class LwaveTag(IncarTag):
 
 class MagmomTag(IncarTag):
 
+    _value_type = list
+
     def __init__(self, value: Any = None) -> None:
         super().__init__("MAGMOM",
                          "Specifies the initial magnetic moment for each atom",
@@ -243,6 +428,8 @@ class MagmomTag(IncarTag):
 
 class NcoreTag(IncarTag):
 
+    _value_type = int
+
     def __init__(self, value: Any = None) -> None:
         super().__init__("NCORE",
                          "Determines the number of compute nodes per orbital",
@@ -251,6 +438,8 @@ class NcoreTag(IncarTag):
 
 class NelmTag(IncarTag):
 
+    _value_type = int
+
     def __init__(self, value: Any = None) -> None:
         super().__init__("NELM", "The maximum number of electronic SC steps",
                          value)
@@ -258,6 +447,8 @@ class NelmTag(IncarTag):
 
 class NelminTag(IncarTag):
 
+    _value_type = int
+
     def __init__(self, value: Any = None) -> None:
         super().__init__(
             "NELMIN", "Specifies the minimum number of electronic SCF steps",
@@ -266,6 +457,8 @@ class NelminTag(IncarTag):
 
 class NparTag(IncarTag):
 
+    _value_type = int
+
     def __init__(self, value: Any = None) -> None:
         super().__init__("NPAR",
                          "Determines the number of bands treated in parallel",
@@ -274,12 +467,16 @@ class NparTag(IncarTag):
 
 class NswTag(IncarTag):
 
+    _value_type = int
+
     def __init__(self, value: Any = None) -> None:
         super().__init__("NSW", "Maximum number of ionic steps", value)
 
 
 class PotimTag(IncarTag):
 
+    _value_type = float
+
     def __init__(self, value: Any = None) -> None:
         super().__init__("POTIM",
                          "Specifies the time step or step width scaling", value)
@@ -293,12 +490,16 @@ class PrecTag(IncarTag):
 
 class SigmaTag(IncarTag):
 
+    _value_type = float
+
     def __init__(self, value: Any = None) -> None:
         super().__init__("SIGMA", "The width of the smearing in eV", value)
 
 
 class SymprecTag(IncarTag):
 
+    _value_type = float
+
     def __init__(self, value: Any = None) -> None:
         super().__init__(
             "SYMPREC",
@@ -309,3 +510,11 @@ class SystemTag(IncarTag):
 
     def __init__(self, value: Any = None) -> None:
         super().__init__("SYSTEM", "Description of the simulation", value)
+
+
+# tag class of each tag name
+# - values of these tags are decoded into the tag's `_value_type`
+INCAR_TAGS: Dict[str, Type[IncarTag]] = {
+    tag_type().name: tag_type
+    for tag_type in IncarTag.__subclasses__()
+}
@@ -1,6 +1,7 @@
 from cmstk.util import data_directory
 from cmstk.vasp import incar
 import os
+import pytest
 
 
 def test_incar_file():
@@ -11,27 +12,27 @@ def test_incar_file():
     incar_tags = {tag.name: tag for tag in incarfile.tags}
     assert incar_tags["SYSTEM"].value == "Fe BCC unit"
     assert incar_tags["SYSTEM"].comment == "test comment"
-    assert incar_tags["ISTART"].value == "0"
-    assert incar_tags["ICHARG"].value == "2"
-    assert incar_tags["ISMEAR"].value == "1"
-    assert incar_tags["SIGMA"].value == "0.2"
+    assert incar_tags["ISTART"].value == 0
+    assert incar_tags["ICHARG"].value == 2
+    assert incar_tags["ISMEAR"].value == 1
+    assert incar_tags["SIGMA"].value == 0.2
     assert incar_tags["ALGO"].value == "Normal"
     assert incar_tags["PREC"].value == "High"
     assert incar_tags["LREAL"].value == ".FALSE."
-    assert incar_tags["EDIFF"].value == "1e-06"
-    assert incar_tags["ENCUT"].value == "400"
-    assert incar_tags["NELM"].value == "40"
-    assert incar_tags["ISPIN"].value == "2"
+    assert incar_tags["EDIFF"].value == 1e-06
+    assert incar_tags["ENCUT"].value == 400.0
+    assert incar_tags["NELM"].value == 40
+    assert incar_tags["ISPIN"].value == 2
     #assert np.array_equal(incar.tags["MAGMOM"].value, np.array([1.0, 1.0]))
-    assert incar_tags["IBRION"].value == "2"
-    assert incar_tags["ISIF"].value == "3"
-    assert incar_tags["POTIM"].value == "0.5"
-    assert incar_tags["NSW"].value == "40"
-    assert incar_tags["EDIFFG"].value == "-0.001"
-    assert incar_tags["LWAVE"].value == ".FALSE."
-    assert incar_tags["LCHARG"].value == ".FALSE."
-    assert incar_tags["LVTOT"].value == ".FALSE."
-    assert incar_tags["NCORE"].value == "4"
+    assert incar_tags["IBRION"].value == 2
+    assert incar_tags["ISIF"].value == 3
+    assert incar_tags["POTIM"].value == 0.5
+    assert incar_tags["NSW"].value == 40
+    assert incar_tags["EDIFFG"].value == -0.001
+    assert incar_tags["LWAVE"].value is False
+    assert incar_tags["LCHARG"].value is False
+    assert incar_tags["LVTOT"].value is False
+    assert incar_tags["NCORE"].value == 4
     incarfile.write("test.incar")
 
     incar_reader = incar.IncarFile(filepath="test.incar")
@@ -40,3 +41,41 @@ def test_incar_file():
     for key in incar_tags:
         assert incar_tags[key].value == incar_reader_tags[key].value
     os.remove("test.incar")
+
+
+def test_incar_file_index():
+    """Tests indexed access and copies of an IncarFile object."""
+    path = "test.incar"
+    with open(path, "w") as f:
+        f.write("SYSTEM = Fe BCC ! test comment\nENCUT = 400\n")
+        f.write("LWAVE = F\nMAGMOM = 2*2.5 -1\nCUSTOM = anything\n")
+    incarfile = incar.IncarFile(path)
+    with incarfile:
+        assert incarfile["SYSTEM"] == "Fe BCC"
+        assert incarfile.get_tag("SYSTEM").comment == "test comment"
+        assert isinstance(incarfile.get_tag("ENCUT"), incar.EncutTag)
+        assert incarfile["ENCUT"] == 400.0
+        assert incarfile["LWAVE"] is False
+        assert incarfile["MAGMOM"] == [2.5, 2.5, -1.0]
+        assert incarfile["CUSTOM"] == "anything"
+        variant = incarfile.copy(ENCUT=500, NSW=10)
+        assert variant["ENCUT"] == 500
+        assert variant["NSW"] == 10
+        # the original is unaffected and unchanged tags are shared
+        assert incarfile["ENCUT"] == 400.0
+        assert "NSW" not in incarfile
+        assert variant.get_tag("SYSTEM") is incarfile.get_tag("SYSTEM")
+        assert list(variant.index)[:2] == ["SYSTEM", "ENCUT"]
+        variant.write()
+    reader = incar.IncarFile(path)
+    with reader:
+        assert reader["ENCUT"] == 500.0
+        assert reader["LWAVE"] is False
+        assert reader["MAGMOM"] == [2.5, 2.5, -1.0]
+        assert reader["NSW"] == 10
+        del reader["NSW"]
+        assert "NSW" not in reader
+    assert incar.EncutTag(400).name == "ENCUT"
+    with pytest.raises(ValueError):
+        incar.IncarTag.from_str("NSW = many")
+    os.remove(path)
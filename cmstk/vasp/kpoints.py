@@ -1,5 +1,8 @@
 from cmstk.filetypes import TextFile
-from typing import Optional, Tuple
+from cmstk.structure.simulation import SimulationCell
+import itertools
+import numpy as np
+from typing import Iterable, List, Optional, Tuple
 
 
 class KpointsFile(TextFile):
@@ -113,3 +116,174 @@ class KpointsFile(TextFile):
                 f.write("{}\n".format(s))
             for s in [self.mesh_size, self.mesh_shift]:
                 f.write("{} {} {}\n".format(*s))
+
+
+def reciprocal_lattice(cell: SimulationCell,
+                       scaling_factor: float = 1.0) -> np.ndarray:
+    """Returns the reciprocal lattice vectors of a simulation cell.
+
+    Notes:
+        The vectors follow the VASP convention a_i . b_j = delta_ij (without
+        the factor of 2 pi).
+
+    Args:
+        cell: The simulation cell.
+        scaling_factor: Universal scaling factor of `cell.coordinate_matrix`.
+
+    Returns:
+        Reciprocal lattice vectors as rows of a matrix.
+    """
+    lattice = np.asarray(cell.coordinate_matrix, dtype=float) * scaling_factor
+    return np.linalg.inv(lattice).T
+
+
+def mesh_from_density(cell: SimulationCell,
+                      density: float,
+                      scaling_factor: float = 1.0) -> Tuple[int, int, int]:
+    """Returns the mesh size which achieves a target k-point density.
+
+    Notes:
+        The number of subdivisions along each reciprocal lattice vector is
+        N_i = max(1, int(density * |b_i| + 0.5)) which is the "length" R_k of
+        the fully automatic scheme of VASP. The spacing between k-points is
+        therefore as even as possible along each vector.
+
+    Args:
+        cell: The simulation cell.
+        density: Number of k-points per reciprocal Angstrom along each
+                 reciprocal lattice vector.
+        scaling_factor: Universal scaling factor of `cell.coordinate_matrix`.
+    """
+    lengths = np.linalg.norm(reciprocal_lattice(cell, scaling_factor), axis=1)
+    mesh = np.maximum(1, (density * lengths + 0.5).astype(int))
+    return (int(mesh[0]), int(mesh[1]), int(mesh[2]))
+
+
+def meshes_from_densities(
+        cell: SimulationCell,
+        densities: Iterable[float],
+        scaling_factor: float = 1.0) -> List[Tuple[int, int, int]]:
+    """Returns the distinct mesh sizes of a k-point density sweep.
+
+    Notes:
+        Densities which round to the same mesh as a lower density are dropped
+        so that no two calculations of a convergence sweep are equivalent.
+
+    Args:
+        cell: The simulation cell.
+        densities: Number of k-points per reciprocal Angstrom along each
+                   reciprocal lattice vector.
+        scaling_factor: Universal scaling factor of `cell.coordinate_matrix`.
+
+    Returns:
+        Each distinct mesh size in order of increasing density.
+    """
+    meshes: List[Tuple[int, int, int]] = []
+    for density in sorted(densities):
+        mesh = mesh_from_density(cell, density, scaling_factor)
+        if mesh not in meshes:
+            meshes.append(mesh)
+    return meshes
+
+
+def lattice_rotations(cell: SimulationCell,
+                      tolerance: float = 1e-5) -> np.ndarray:
+    """Returns the point group operations of the lattice of a simulation
+       cell.
+
+    Notes:
+        Every integer matrix with entries of -1, 0 or 1 is tested at once for
+        preservation of the metric tensor. The atoms of the cell are not
+        considered so a basis which lowers the symmetry of the lattice
+        requires the subgroup of operations which it preserves.
+
+    Args:
+        cell: The simulation cell.
+        tolerance: Relative tolerance of the metric tensor comparison.
+
+    Returns:
+        Rotations W which act on fractional positions as rows (x' = x W).
+        - Shape: (n_operations, 3, 3)
+    """
+    lattice = np.asarray(cell.coordinate_matrix, dtype=float)
+    metric = np.matmul(lattice, lattice.T)
+    candidates = np.array(list(itertools.product([-1, 0, 1], repeat=9)))
+    candidates = candidates.reshape((-1, 3, 3))
+    transformed = np.matmul(np.matmul(candidates, metric),
+                            candidates.transpose((0, 2, 1)))
+    scale = np.abs(metric).max()
+    deviation = np.abs(transformed - metric).reshape((-1, 9)).max(axis=1)
+    return candidates[deviation <= tolerance * scale]
+
+
+def irreducible_kpoints(mesh: Tuple[int, int, int],
+                        rotations: Optional[np.ndarray] = None,
+                        shift: Tuple[float, float, float] = (0, 0, 0),
+                        time_reversal: bool = True
+                        ) -> Tuple[np.ndarray, np.ndarray]:
+    """Returns the irreducible k-points of a mesh and their weights.
+
+    Notes:
+        The images of every k-point of the full mesh under every operation
+        are computed at once and each k-point is labelled with the smallest
+        index of its images. Operations which do not map the mesh onto itself
+        are ignored.
+
+    Args:
+        mesh: Number of subdivisions along each reciprocal lattice vector.
+        rotations: Rotations W which act on fractional positions as rows.
+        - Defaults to the identity.
+        - See `lattice_rotations`.
+        shift: Shift of the mesh in units of the subdivisions (0 or 0.5).
+        - (0, 0, 0) is a Gamma centered mesh.
+        time_reversal: Whether or not k and -k are equivalent.
+
+    Returns:
+        Fractional reciprocal coordinates of each irreducible k-point and
+        the number of k-points of the full mesh which it represents.
+        - Shapes: (n_kpoints, 3) and (n_kpoints,)
+    """
+    n = np.array(mesh, dtype=int)
+    doubled_shift = np.rint(np.array(shift, dtype=float) * 2).astype(int)
+    if rotations is None:
+        rotations = np.identity(3, dtype=int)[np.newaxis]
+    rotations = np.asarray(rotations).reshape((-1, 3, 3))
+    # fractional positions transform with W and k-points with W^-T
+    operations = np.rint(np.linalg.inv(rotations).transpose(
+        (0, 2, 1))).astype(int)
+    if time_reversal:
+        operations = np.concatenate((operations, -operations))
+    # each point of the full mesh in units of half a subdivision
+    indices = np.indices(mesh).reshape((3, -1)).T
+    doubled = 2 * indices + doubled_shift
+    kpoints = doubled / (2 * n)
+    images = np.matmul(kpoints, operations) * (2 * n)
+    rounded = np.rint(images).astype(int)
+    valid = np.all(np.abs(images - rounded) < 1e-8, axis=(1, 2))
+    valid &= np.all((rounded - doubled_shift) % 2 == 0, axis=(1, 2))
+    image_indices = ((rounded[valid] - doubled_shift) // 2) % n
+    flat = np.ravel_multi_index(image_indices.transpose((2, 0, 1)), mesh)
+    labels = flat.min(axis=0)
+    representatives, weights = np.unique(labels, return_counts=True)
+    return kpoints[representatives], weights
+
+
+def write_kpoint_list(path: str,
+                      kpoints: np.ndarray,
+                      weights: np.ndarray,
+                      comment: Optional[str] = None) -> None:
+    """Writes a KPOINTS file with an explicit list of k-points.
+
+    Args:
+        path: The filepath to write to.
+        kpoints: Fractional reciprocal coordinates of each k-point.
+        weights: Weight of each k-point.
+        comment: Top line file descriptor.
+    """
+    if comment is None:
+        comment = "Automatically generated by cmstk."
+    kpoints = np.asarray(kpoints, dtype=float).reshape((-1, 3))
+    table = np.column_stack((kpoints, weights))
+    body = ("%.10f %.10f %.10f %g\n" * len(table)) % tuple(table.ravel())
+    with open(path, "w") as f:
+        f.write("{}\n{}\nReciprocal\n".format(comment, len(table)) + body)
@@ -1,5 +1,10 @@
-from cmstk.vasp.kpoints import KpointsFile
+from cmstk.structure.simulation import SimulationCell
+from cmstk.vasp.kpoints import (KpointsFile, irreducible_kpoints,
+                                lattice_rotations, mesh_from_density,
+                                meshes_from_densities, reciprocal_lattice,
+                                write_kpoint_list)
 from cmstk.util import data_directory
+import numpy as np
 import os
 
 
@@ -25,3 +30,49 @@ def test_kpoints_file():
         assert kpoints_reader.mesh_size == kpoints.mesh_size
         assert kpoints_reader.mesh_shift == kpoints.mesh_shift
     os.remove("test.kpoints")
+
+
+def test_kpoint_mesh_generation():
+    """Tests generating k-point meshes from a density."""
+    cell = SimulationCell(coordinate_matrix=np.identity(3) * 2.5)
+    assert np.allclose(reciprocal_lattice(cell), np.identity(3) * 0.4)
+    assert mesh_from_density(cell, 20) == (8, 8, 8)
+    assert mesh_from_density(cell, 10, scaling_factor=2.0) == (2, 2, 2)
+    tetragonal = SimulationCell(coordinate_matrix=np.diag([2.5, 2.5, 5.0]))
+    assert mesh_from_density(tetragonal, 20) == (8, 8, 4)
+    # 11 and 12 round to the same mesh as 10
+    meshes = meshes_from_densities(cell, [12, 10, 11, 20])
+    assert meshes == [(4, 4, 4), (5, 5, 5), (8, 8, 8)]
+
+
+def test_irreducible_kpoints():
+    """Tests symmetry reduction of a k-point mesh."""
+    cubic = SimulationCell(coordinate_matrix=np.identity(3) * 2.87)
+    rotations = lattice_rotations(cubic)
+    assert len(rotations) == 48
+    kpoints, weights = irreducible_kpoints((4, 4, 4), rotations)
+    assert len(kpoints) == 10
+    assert weights.sum() == 64
+    assert np.allclose(kpoints[0], 0.0)
+    assert weights[0] == 1
+    kpoints, weights = irreducible_kpoints((4, 4, 4), rotations,
+                                           (0.5, 0.5, 0.5))
+    assert len(kpoints) == 4
+    assert weights.sum() == 64
+    fcc = SimulationCell(
+        coordinate_matrix=np.array([[0, 1, 1], [1, 0, 1], [1, 1, 0]]) * 1.8)
+    kpoints, weights = irreducible_kpoints((8, 8, 8), lattice_rotations(fcc))
+    assert len(kpoints) == 29
+    # only time reversal symmetry
+    kpoints, weights = irreducible_kpoints((4, 4, 4))
+    assert len(kpoints) == 36
+    kpoints, weights = irreducible_kpoints((4, 4, 4), time_reversal=False)
+    assert len(kpoints) == 64
+    path = "test.kpoints"
+    write_kpoint_list(path, kpoints, weights)
+    with open(path, "r") as f:
+        lines = f.readlines()
+    assert lines[1].strip() == "64"
+    assert lines[2].strip() == "Reciprocal"
+    assert len(lines) == 67
+    os.remove(path)
@@ -0,0 +1,25 @@
+from cmstk.vasp.chgcar import VolumetricFile
+from typing import Optional
+
+
+class LocpotFile(VolumetricFile):
+    """File wrapper for a VASP LOCPOT file.
+
+    Notes:
+        The grid values are the local potential in eV and the spin grid is
+        the potential of the second spin component of a spin polarized
+        calculation.
+
+    Args:
+        filepath: Filepath to a LOCPOT file.
+        cache: Whether or not to cache the decoded grids on disk.
+        chunk_size: Number of bytes decoded at a time.
+    """
+
+    def __init__(self,
+                 filepath: Optional[str] = None,
+                 cache: bool = False,
+                 chunk_size: int = 8388608) -> None:
+        if filepath is None:
+            filepath = "LOCPOT"
+        super().__init__(filepath, cache, chunk_size)
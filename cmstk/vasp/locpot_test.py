@@ -0,0 +1,26 @@
+from cmstk.vasp.locpot import LocpotFile
+import numpy as np
+import os
+import pytest
+
+
+def test_locpot_file():
+    """Tests decoding of a LOCPOT file without augmentation occupancies."""
+    path = "test.LOCPOT"
+    values = np.linspace(-5.0, 5.0, 24)
+    text = "Si\n 1.0\n 3.0 0.0 0.0\n 0.0 3.0 0.0\n 0.0 0.0 3.0\n"
+    text += " Si\n 2\nCartesian\n 0.0 0.0 0.0\n 1.5 1.5 1.5\n\n"
+    text += "    2    3    4\n"
+    for i in range(0, len(values), 5):
+        text += " ".join("{:.11E}".format(v) for v in values[i:i + 5]) + "\n"
+    with open(path, "w") as f:
+        f.write(text)
+    locpot = LocpotFile(path)
+    with locpot:
+        assert locpot.grid.shape == (2, 3, 4)
+        assert locpot.grid[1, 2, 3] == pytest.approx(values[-1])
+        assert locpot.grid[1, 0, 0] == pytest.approx(values[1])
+        assert np.allclose(locpot.lattice, np.identity(3) * 3.0)
+        with pytest.raises(ValueError):
+            locpot.spin_grid
+    os.remove(path)
@@ -1,5 +1,19 @@
-from cmstk.filetypes import TextFile
-from typing import Optional, List
+from cmstk.filetypes import (TextFile, read_appended_lines,
+                             read_lines_reversed)
+import asyncio
+import numpy as np
+import os
+import time
+from typing import AsyncIterator, Dict, Optional, List, Tuple
+
+# one record per ionic step line
+IONIC_DTYPE = np.dtype([("step", int), ("F", float), ("E0", float),
+                        ("dE", float), ("mag", float)])
+
+# one record per electronic (DAV, RMM, CG...) line
+SCF_DTYPE = np.dtype([("method", "U3"), ("N", int), ("E", float),
+                      ("dE", float), ("d_eps", float), ("ncg", int),
+                      ("rms", float), ("rms_c", float)])
 
 
 class OszicarFile(TextFile):
@@ -8,54 +22,218 @@ class OszicarFile(TextFile):
     Notes:
         This is a read-only file wrapper.
 
+        Every line is parsed exactly once as it is loaded into the ionic and
+        electronic records. The records are converted to structured arrays
+        when they are first accessed.
+
+        The final values are read from the end of the file without `load` and
+        are stored in the cache set by `cmstk.cache.set_result_cache` when one
+        is set.
+
+        The file of a running job can be followed with `refresh` or `follow`.
+        The byte offset is kept between calls so that only newly appended
+        bytes are parsed. A trailing line which has not been completely
+        written is left for the next call.
+
     Args:
         filepath: Filepath to an OSZICAR file.
-     
+
      Attributes:
         filepath: Filepath to an OSZICAR file.
         e0: Energy where sigma == 0 at each ionic step.
+        final_values: Each value reported on the last ionic step line.
+        - Keys are the step number and the symbols without "=" (F, E0, dE,
+          mag).
+        ionic_steps: Values reported on each ionic step line.
+        - Structured array with `IONIC_DTYPE`.
+        - Values which are not reported are NaN.
         magnetization: Magnetization at each ionic step.
+        scf_offsets: Boundaries of the electronic steps of each ionic step.
+        - Shape: (n_ionic_steps + 1,)
+        - scf_steps[scf_offsets[i]:scf_offsets[i + 1]] are the electronic
+          steps of ionic step i.
+        - Electronic steps of an unfinished ionic step follow scf_offsets[-1].
+        scf_steps: Values reported on each electronic step line.
+        - Structured array with `SCF_DTYPE`.
+        - Values which are not reported are NaN or -1 for ncg.
         total_free_energy: Total free energy at each ionic step.
      """
 
     def __init__(self, filepath: Optional[str] = None) -> None:
         if filepath is None:
             filepath = "OSZICAR"
-        self._total_free_energy: Optional[List[float]] = None
-        self._e0: Optional[List[float]] = None
-        self._magnetization: Optional[List[float]] = None
+        self._final_values: Optional[Dict[str, float]] = None
+        self._ionic_records: Optional[List[Tuple]] = None
+        self._ionic_steps: Optional[np.ndarray] = None
+        self._offset: Optional[int] = None
+        self._scf_offsets: Optional[List[int]] = None
+        self._scf_records: Optional[List[Tuple]] = None
+        self._scf_steps: Optional[np.ndarray] = None
         super().__init__(filepath)
 
+    def load(self, path: Optional[str] = None) -> None:
+        if path is None:
+            path = self.filepath
+        self._reset()
+        self._read_appended(path, final=True)
+
+    def refresh(self) -> List[Dict[str, float]]:
+        """Parses the lines appended to the file since the last `load` or
+           `refresh`.
+
+        Notes:
+            The file is parsed from the beginning if it has not been loaded
+            or if it has been truncated since the last call.
+
+        Returns:
+            Each value reported on each new ionic step line.
+        """
+        if (self._lines is None or self._offset is None
+                or os.path.getsize(self.filepath) < self._offset):
+            self._reset()
+        return self._read_appended(self.filepath, final=False)
+
+    async def follow(
+            self,
+            interval: float = 60.0,
+            max_idle: Optional[float] = None
+    ) -> AsyncIterator[Dict[str, float]]:
+        """Yields the values reported on each new ionic step line as it is
+           written.
+
+        Notes:
+            An OSZICAR file does not indicate when a run has finished so the
+            file is refreshed every `interval` seconds until nothing has been
+            appended to it for `max_idle` seconds or until the caller stops
+            iterating.
+
+        Args:
+            interval: Number of seconds between refreshes.
+            max_idle: Number of seconds without any appended line after which
+            the run is considered finished.
+            - Defaults to following the file until the caller stops.
+        """
+        last_change = time.monotonic()
+        while True:
+            offset = self._offset
+            for step in self.refresh():
+                yield step
+            now = time.monotonic()
+            if self._offset != offset:
+                last_change = now
+            elif max_idle is not None and now - last_change >= max_idle:
+                return
+            await asyncio.sleep(interval)
+
     @property
     def total_free_energy(self) -> List[float]:
-        if self._total_free_energy is None:
-            self._total_free_energy = self._get_values_for_symbol("F=")
-        return self._total_free_energy
+        return self.ionic_steps["F"].tolist()
 
     @property
     def e0(self) -> List[float]:
-        if self._e0 is None:
-            self._e0 = self._get_values_for_symbol("E0=")
-        return self._e0
+        return self.ionic_steps["E0"].tolist()
 
     @property
     def magnetization(self) -> List[float]:
-        if self._magnetization is None:
-            self._magnetization = self._get_values_for_symbol("mag=")
-        return self._magnetization
-
-    def _get_ionic_lines(self) -> List[str]:
-        return [l for l in self.lines if l.strip()[0].isdigit()]
-
-    def _get_values_for_symbol(self, symbol: str) -> List[float]:
-        lines = self._get_ionic_lines()
-        values: List[float] = []
-        for line in lines:
-            segments = [seg for seg in line.split() if len(seg.strip()) > 0]
-            for i, seg in enumerate(segments):
-                if seg == symbol:
-                    # append the next segment
-                    # because it is symbol's value
-                    values.append(float(segments[i + 1]))
-                    break
-        return values
+        mag = self.ionic_steps["mag"]
+        return mag[~np.isnan(mag)].tolist()
+
+    @property
+    def final_values(self) -> Dict[str, float]:
+        if self._final_values is None:
+            self._final_values = self._cached("final_values", 1,
+                                              self._read_final_values)
+        return self._final_values  # type: ignore
+
+    @property
+    def ionic_steps(self) -> np.ndarray:
+        if self._ionic_records is None:
+            raise RuntimeError("file not loaded")
+        # rebuild only when new records have been parsed
+        if (self._ionic_steps is None
+                or len(self._ionic_steps) != len(self._ionic_records)):
+            self._ionic_steps = np.array(self._ionic_records,
+                                         dtype=IONIC_DTYPE)
+        return self._ionic_steps
+
+    @property
+    def scf_offsets(self) -> np.ndarray:
+        if self._scf_offsets is None:
+            raise RuntimeError("file not loaded")
+        return np.array(self._scf_offsets, dtype=int)
+
+    @property
+    def scf_steps(self) -> np.ndarray:
+        if self._scf_records is None:
+            raise RuntimeError("file not loaded")
+        if (self._scf_steps is None
+                or len(self._scf_steps) != len(self._scf_records)):
+            self._scf_steps = np.array(self._scf_records, dtype=SCF_DTYPE)
+        return self._scf_steps
+
+    def _read_final_values(self) -> Dict[str, float]:
+        for line in read_lines_reversed(self.filepath):
+            line = line.strip()
+            if len(line) > 0 and line[0].isdigit():
+                return _parse_ionic_line(line)
+        err = "Unable to find an ionic step in `{}`.".format(self.filepath)
+        raise ValueError(err)
+
+    def _reset(self) -> None:
+        self._lines = []
+        self._offset = 0
+        self._ionic_records = []
+        self._ionic_steps = None
+        self._scf_offsets = [0]
+        self._scf_records = []
+        self._scf_steps = None
+
+    def _read_appended(self, path: str,
+                       final: bool) -> List[Dict[str, float]]:
+        # parse each appended line into the ionic or electronic records
+        lines = []
+        steps = []
+        for line, self._offset in read_appended_lines(
+                path,
+                self._offset,  # type: ignore
+                final):
+            line = line.strip()
+            if len(line) == 0:
+                continue
+            lines.append(line)
+            segments = line.split()
+            if line[0].isdigit():
+                values = _parse_ionic_line(line)
+                steps.append(values)
+                record = tuple(
+                    values.get(name, np.nan) for name in IONIC_DTYPE.names)
+                self._ionic_records.append(record)  # type: ignore
+                n_scf = len(self._scf_records)  # type: ignore
+                self._scf_offsets.append(n_scf)  # type: ignore
+            elif (len(segments) > 1 and segments[0].endswith(":")
+                  and segments[1].isdigit()):
+                record = _parse_scf_line(segments)
+                self._scf_records.append(record)  # type: ignore
+        self.lines.extend(lines)
+        return steps
+
+
+def _parse_ionic_line(line: str) -> Dict[str, float]:
+    # e.g. "1 F= -.13644212E+03 E0= -.13644801E+03  d E =-.136442E+03  mag= 2"
+    values: Dict[str, float] = {"step": int(line.split()[0])}
+    line = line.replace("d E =", "dE=")
+    segments = line.split("=")
+    for i in range(len(segments) - 1):
+        name = segments[i].split()[-1]
+        value = segments[i + 1].split()[0]
+        values[name] = float(value)
+    return values
+
+
+def _parse_scf_line(segments: List[str]) -> Tuple:
+    # e.g. "DAV:   2  -0.13652E+03  -0.78E-01  -0.21E+01  1064  0.16E+03  0.1E+01"
+    values = [float(s) for s in segments[2:]]
+    values += [np.nan] * (8 - len(segments))  # rms(c) is not always reported
+    ncg = -1 if np.isnan(values[3]) else int(values[3])
+    return (segments[0].rstrip(":"), int(segments[1]), values[0], values[1],
+            values[2], ncg, values[4], values[5])
@@ -1,6 +1,9 @@
 from cmstk.vasp.oszicar import OszicarFile
 from cmstk.util import data_directory
+import asyncio
+import numpy as np
 import os
+import pytest
 
 
 def test_oszicar_file():
@@ -14,3 +17,116 @@ def test_oszicar_file():
         assert oszicar.e0[-1] == -.13652664E+03
         assert oszicar.magnetization[0] == 24.9856
         assert oszicar.magnetization[-1] == 24.9537
+
+
+_oszicar_text = (
+    "       N       E                     dE             d eps\n"
+    "DAV:   1    -0.136442118840E+03   -0.13644E+03   -0.13640E+03"
+    "   432   0.134E+03\n"
+    "   1 F= -.13644212E+03 E0= -.13644801E+03  d E =-.136442E+03"
+    "  mag=    24.9856\n"
+    "DAV:   1    -0.136520188403E+03   -0.78070E-01   -0.21543E+01"
+    "   528   0.420E+02\n"
+    "   2 F= -.13652019E+03 E0= -.13652664E+03  d E =-.780699E-01"
+    "  mag=    24.9537\n")
+
+
+def test_oszicar_file_final_values():
+    """Tests reading the final ionic step from the end of the file."""
+    path = "test.oszicar"
+    text = _oszicar_text
+    with open(path, "w") as f:
+        f.write(text)
+    oszicar = OszicarFile(path)
+    final_values = oszicar.final_values
+    assert final_values["F"] == -.13652019E+03
+    assert final_values["E0"] == -.13652664E+03
+    assert final_values["dE"] == -.780699E-01
+    assert final_values["mag"] == 24.9537
+    with open(path, "w") as f:
+        f.write(text.split("\n")[0])
+    with pytest.raises(ValueError):
+        OszicarFile(path).final_values
+    os.remove(path)
+
+
+def test_oszicar_file_follow():
+    """Tests incrementally parsing a file as it is written."""
+    path = "test.oszicar"
+    index = _oszicar_text.index("mag=    24.9537")
+    with open(path, "w") as f:
+        f.write(_oszicar_text[:index])
+    oszicar = OszicarFile(path)
+    steps = oszicar.refresh()
+    assert [s["F"] for s in steps] == [-.13644212E+03]
+    assert oszicar.magnetization == [24.9856]
+    with open(path, "a") as f:
+        f.write(_oszicar_text[index:])
+    steps = oszicar.refresh()
+    assert [s["mag"] for s in steps] == [24.9537]
+    assert oszicar.magnetization == [24.9856, 24.9537]
+    assert oszicar.e0 == [-.13644801E+03, -.13652664E+03]
+
+    async def collect():
+        steps = []
+        async for step in OszicarFile(path).follow(interval=0.0):
+            steps.append(step)
+            if len(steps) == 2:
+                break
+        return steps
+
+    steps = asyncio.run(collect())
+    assert [s["E0"] for s in steps] == [-.13644801E+03, -.13652664E+03]
+
+    async def collect_until_idle():
+        follower = OszicarFile(path).follow(interval=0.01, max_idle=0.05)
+        return [step async for step in follower]
+
+    # following stops once the file stops growing
+    steps = asyncio.run(collect_until_idle())
+    assert [s["E0"] for s in steps] == [-.13644801E+03, -.13652664E+03]
+    os.remove(path)
+
+
+def test_oszicar_file_records():
+    """Tests parsing the ionic and electronic steps into structured arrays."""
+    path = "test.oszicar"
+    text = "       N       E                     dE             d eps"
+    text += "       ncg     rms          rms(c)\n"
+    text += "DAV:   1     0.424984893217E+03    0.42498E+03   -0.13916E+04"
+    text += "   432   0.134E+03\n"
+    text += "DAV:   2     0.110876263473E+02   -0.41390E+03   -0.40052E+03"
+    text += "   528   0.420E+02\n"
+    text += "RMM:   3    -0.136442118840E+03   -0.14753E+03   -0.21543E+01"
+    text += "   1064   0.160E+02    0.121E+01\n"
+    text += "   1 F= -.13644212E+03 E0= -.13644801E+03  d E =-.136442E+03"
+    text += "  mag=    24.9856\n"
+    text += "RMM:   1    -0.136520188403E+03   -0.78070E-01   -0.21543E+01"
+    text += "   1064   0.160E+00    0.121E-01\n"
+    text += "   2 F= -.13652019E+03 E0= -.13652664E+03  d E =-.780699E-01\n"
+    text += "DAV:   1    -0.136520188403E+03   -0.78070E-01   -0.21543E+01"
+    text += "   864   0.160E+00\n"
+    with open(path, "w") as f:
+        f.write(text)
+    oszicar = OszicarFile(path)
+    with oszicar:
+        ionic_steps = oszicar.ionic_steps
+        assert list(ionic_steps["step"]) == [1, 2]
+        assert ionic_steps["dE"][1] == -.780699E-01
+        assert np.isnan(ionic_steps["mag"][1])
+        assert oszicar.magnetization == [24.9856]
+        scf_steps = oszicar.scf_steps
+        assert len(scf_steps) == 5
+        assert list(scf_steps["method"]) == ["DAV", "DAV", "RMM", "RMM", "DAV"]
+        assert list(scf_steps["ncg"]) == [432, 528, 1064, 1064, 864]
+        assert np.isnan(scf_steps["rms_c"][0])
+        assert scf_steps["rms_c"][2] == 0.121E+01
+        offsets = oszicar.scf_offsets
+        assert list(offsets) == [0, 3, 4]
+        # electronic steps per ionic step
+        assert list(np.diff(offsets)) == [3, 1]
+        assert np.add.reduceat(scf_steps["ncg"][:offsets[-1]],
+                               offsets[:-1]).tolist() == [2024, 1064]
+    with pytest.raises(RuntimeError):
+        oszicar.scf_steps
+    os.remove(path)
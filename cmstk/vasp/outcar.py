@@ -1,55 +1,424 @@
-from cmstk.filetypes import TextFile
+from cmstk.filetypes import (TextFile, read_appended_lines,
+                             read_lines_reversed)
+import asyncio
 import copy
-from typing import Dict, List, Optional
+import numpy as np
+import os
+import re
+from typing import (Any, AsyncIterator, Callable, Dict, Iterable, Iterator,
+                    List, Match, Optional, Pattern, Tuple)
+
+# mutable state shared by the pattern handlers during a single pass
+_ScanState = Dict[str, Any]
+_Handler = Callable[[_ScanState, Match], None]
+
+
+def _new_state() -> _ScanState:
+    return {
+        "collector": None,
+        "components": {},
+        "current_magnetization": None,
+        "fermi_energy": [],
+        "free_energy": [],
+        "ionic_free_energy": [],
+        "magnetization": [],
+        "position_force": [],
+        "stress": [],
+        "timing": {
+            "cpu_time": [],
+            "real_time": [],
+            "elapsed_time": []
+        },
+    }
+
+
+def _read_component(name: str) -> _Handler:
+    # a free energy component of the current ionic step
+    def handler(state: _ScanState, match: Match) -> None:
+        state["components"][name] = float(match.group(1))
+
+    return handler
+
+
+def _read_electronic_step(state: _ScanState, match: Match) -> None:
+    state["free_energy"].append(copy.deepcopy(state["components"]))
+
+
+def _read_ionic_step(state: _ScanState, match: Match) -> None:
+    # the summary following the force block closes an ionic step
+    # - its TOTEN has already replaced that of the last electronic step
+    state["ionic_free_energy"].append(copy.deepcopy(state["components"]))
+    if state["current_magnetization"] is not None:
+        state["magnetization"].append(state["current_magnetization"])
+
+
+def _read_forces(state: _ScanState, match: Match) -> None:
+    state["rows"] = []
+    state["separators"] = 0
+    state["collector"] = _collect_forces
+
+
+def _collect_forces(state: _ScanState, line: str) -> None:
+    # rows of a force block are enclosed by dashed separators
+    if not line.strip().startswith("---"):
+        state["rows"].append(line)
+        return
+    state["separators"] += 1
+    if state["separators"] < 2:
+        return
+    state["collector"] = None
+    rows = state.pop("rows")
+    block = np.fromstring(" ".join(rows), sep=" ")
+    if block.size == 6 * len(rows):
+        state["position_force"].append(block.reshape((len(rows), 6)))
+
+
+def _read_stress(state: _ScanState, match: Match) -> None:
+    state["stress"].append(np.fromstring(match.group(1), sep=" "))
+
+
+def _read_magnetization(state: _ScanState, match: Match) -> None:
+    state["current_magnetization"] = float(match.group(1))
+
+
+def _read_fermi_energy(state: _ScanState, match: Match) -> None:
+    state["fermi_energy"].append(float(match.group(1)))
+
+
+def _read_loop_time(state: _ScanState, match: Match) -> None:
+    state["timing"]["cpu_time"].append(float(match.group(1)))
+    state["timing"]["real_time"].append(float(match.group(2)))
+
+
+def _read_elapsed_time(state: _ScanState, match: Match) -> None:
+    state["timing"]["elapsed_time"].append(float(match.group(1)))
+
+
+# the last line of the summary of an ionic step
+_ionic_step_pattern = re.compile(r"energy\s+without entropy=")
+
+# every quantity extracted from an OUTCAR file
+# - (literal trigger, compiled pattern, handler)
+# - a line is only matched against the patterns of the triggers it contains
+# - handlers may install a collector in the state which receives every
+#   following line until it removes itself
+OUTCAR_PATTERNS: List[Tuple[str, Pattern, _Handler]] = [
+    ("PSCENC", re.compile(r"PSCENC\s*=\s*(\S+)"), _read_component("PSCENC")),
+    ("TEWEN", re.compile(r"TEWEN\s*=\s*(\S+)"), _read_component("TEWEN")),
+    ("DENC", re.compile(r"-Hartree energ\s+DENC\s*=\s*(\S+)"),
+     _read_component("DENC")),
+    ("EXHF", re.compile(r"-exchange\s+EXHF\s*=\s*(\S+)"),
+     _read_component("EXHF")),
+    ("XCENC", re.compile(r"XCENC\s*=\s*(\S+)"), _read_component("XCENC")),
+    ("EENTRO", re.compile(r"EENTRO\s*=\s*(\S+)"), _read_component("EENTRO")),
+    ("EBANDS", re.compile(r"EBANDS\s*=\s*(\S+)"), _read_component("EBANDS")),
+    ("EATOM", re.compile(r"EATOM\s*=\s*(\S+)"), _read_component("EATOM")),
+    ("Ediel_sol", re.compile(r"Ediel_sol\s*=\s*(\S+)"),
+     _read_component("Ediel_sol")),
+    ("TOTEN", re.compile(r"free\s+energy\s+TOTEN\s*=\s*(\S+)"),
+     _read_component("TOTEN")),
+    ("energy without entropy =", re.compile(r"energy without entropy ="),
+     _read_electronic_step),
+    ("without entropy=", _ionic_step_pattern, _read_ionic_step),
+    ("TOTAL-FORCE", re.compile(r"POSITION\s+TOTAL-FORCE"), _read_forces),
+    ("in kB", re.compile(r"^\s*in kB\s+(.*)$"), _read_stress),
+    ("magnetization",
+     re.compile(r"number of electron\s+\S+\s+magnetization\s+(\S+)"),
+     _read_magnetization),
+    ("E-fermi", re.compile(r"E-fermi\s*:\s*(\S+)"), _read_fermi_energy),
+    ("LOOP+:",
+     re.compile(r"LOOP\+:\s+cpu time\s+([\d.]+):\s*real time\s+([\d.]+)"),
+     _read_loop_time),
+    ("Elapsed time", re.compile(r"Elapsed time \(sec\):\s*(\S+)"),
+     _read_elapsed_time),
+]
+
+
+def scan_outcar(path: str,
+                patterns: Optional[List[Tuple[str, Pattern, _Handler]]] = None
+                ) -> _ScanState:
+    """Extracts every quantity in a pattern table with a single pass over an
+       OUTCAR file.
+
+    Notes:
+        The file is streamed line by line. Each line is searched once for all
+        of the literal triggers at the same time and only the patterns of the
+        triggers which are found are evaluated so that adding a quantity to
+        the table does not add another pass or a significant cost per line.
+
+    Args:
+        path: Filepath to an OUTCAR file.
+        patterns: Table of (trigger, compiled pattern, handler) rows.
+        - Defaults to `OUTCAR_PATTERNS`.
+
+    Returns:
+        The state populated by the handlers.
+    """
+    with open(path, "r") as f:
+        return _scan_lines(f, _new_state(), patterns)
+
+
+def _scan_lines(lines: Iterable[str],
+                state: _ScanState,
+                patterns: Optional[List[Tuple[str, Pattern, _Handler]]] = None
+                ) -> _ScanState:
+    # match a sequence of lines against a pattern table
+    # - the state may be carried over from a previous call
+    if patterns is None:
+        patterns = OUTCAR_PATTERNS
+    table: Dict[str, List[Tuple[Pattern, _Handler]]] = {}
+    for trigger, pattern, handler in patterns:
+        table.setdefault(trigger, []).append((pattern, handler))
+    triggers = sorted(table, key=len, reverse=True)
+    prefilter = re.compile("|".join(re.escape(t) for t in triggers))
+    for line in lines:
+        if state["collector"] is not None:
+            state["collector"](state, line)
+            continue
+        found = prefilter.findall(line)
+        if len(found) == 0:
+            continue
+        for trigger in dict.fromkeys(found):
+            for pattern, handler in table[trigger]:
+                match = pattern.search(line)
+                if match is not None:
+                    handler(state, match)
+    return state
 
 
 class OutcarFile(TextFile):
     """File wrapper for a VASP OUTCAR file.
 
+    Notes:
+        Every property is extracted by a single streaming pass of
+        `scan_outcar` on `load` and the lines of the file are not stored.
+        `lines` instead reads the file the first time it is accessed and does
+        not require `load`.
+
+        An ionic step is closed by the summary ("FREE ENERGIE OF THE
+        ION-ELECTRON SYSTEM") which follows its force block. The summary only
+        reports TOTEN so the remaining components of an ionic step are those
+        of its last electronic step.
+
+        The final values are instead read from the end of the file without
+        `load`. Only the lines following the last electronic step of the last
+        complete ionic step are read which is typically the last few kB of the
+        file. They are stored in the cache set by
+        `cmstk.cache.set_result_cache` when one is set.
+
+        The file of a running job can be followed with `refresh` or `follow`.
+        The byte offset and scanner state are kept between calls so that only
+        newly appended bytes are parsed. A trailing line which has not been
+        completely written is left for the next call.
+
     Args:
         filepath: Filepath to an OUTCAR file.
 
     Attributes:
         filepath: Filepath to an OUTCAR file.
-        free_energy: Components of the free energy of the system after each 
+        fermi_energy: Each reported Fermi energy.
+        final_free_energy: Components of the free energy of the system after
+        the last complete ionic step.
+        final_position_force: Cartesian position and force of each atom after
+        the last complete ionic step.
+        - Shape: (n_atoms, 6)
+        forces: Force on each atom in eV/Angstrom after each ionic step.
+        - Shape: (n_steps, n_atoms, 3)
+        - A view of `position_force`.
+        free_energy: Components of the free energy of the system after each
+        electronic step.
+        ionic_free_energy: Components of the free energy of the system after
+        each ionic step.
+        lines: The stripped lines of the file.
+        magnetization: Total magnetization after each ionic step.
+        max_force: Largest force magnitude after each ionic step.
+        position_force: Cartesian position and force of each atom after each
         ionic step.
+        - Shape: (n_steps, n_atoms, 6)
+        - Incomplete blocks at the end of an interrupted run are dropped.
+        positions: Cartesian position of each atom in Angstroms after each
+        ionic step.
+        - Shape: (n_steps, n_atoms, 3)
+        - A view of `position_force`.
+        rms_force: Root mean square force magnitude after each ionic step.
+        stress: Stress tensor components (XX YY ZZ XY YZ ZX) in kB after each
+        ionic step.
+        - Shape: (n_steps, 6)
+        timing: Timing information in seconds.
+        - cpu_time: CPU time of each ionic step.
+        - real_time: Real time of each ionic step.
+        - elapsed_time: Total elapsed time if the run finished.
     """
 
     def __init__(self, filepath: Optional[str] = None) -> None:
         if filepath is None:
             filepath = "OUTCAR"
-        self._free_energy: Optional[List[Dict[str, float]]] = None
+        self._final_free_energy: Optional[Dict[str, float]] = None
+        self._final_position_force: Optional[np.ndarray] = None
+        self._offset: Optional[int] = None
+        self._position_force: Optional[np.ndarray] = None
+        self._state: Optional[_ScanState] = None
         super().__init__(filepath)
 
+    def load(self, path: Optional[str] = None) -> None:
+        if path is None:
+            path = self.filepath
+        self._offset = 0
+        self._state = _new_state()
+        self._position_force = None
+        self._read_appended(path, final=True)
+
+    def refresh(self) -> List[Dict[str, float]]:
+        """Parses the bytes appended to the file since the last `load` or
+           `refresh`.
+
+        Notes:
+            The file is parsed from the beginning if it has not been loaded
+            or if it has been truncated since the last call.
+
+        Returns:
+            Components of the free energy of each new ionic step.
+        """
+        if (self._state is None or self._offset is None
+                or os.path.getsize(self.filepath) < self._offset):
+            self._offset = 0
+            self._state = _new_state()
+            self._position_force = None
+        n_steps = len(self._state["ionic_free_energy"])
+        self._read_appended(self.filepath, final=False)
+        return self._state["ionic_free_energy"][n_steps:]
+
+    async def follow(self,
+                     interval: float = 60.0) -> AsyncIterator[Dict[str, float]]:
+        """Yields the free energy components of each new ionic step as it is
+           written.
+
+        Notes:
+            The file is refreshed every `interval` seconds until the total
+            elapsed time of the run has been written.
+
+        Args:
+            interval: Number of seconds between refreshes.
+        """
+        while True:
+            for step in self.refresh():
+                yield step
+            if len(self.timing["elapsed_time"]) > 0:
+                return
+            await asyncio.sleep(interval)
+
+    @property
+    def fermi_energy(self) -> List[float]:
+        return self._scan_state()["fermi_energy"]
+
+    @property
+    def final_free_energy(self) -> Dict[str, float]:
+        if self._final_free_energy is None:
+            self._read_tail()
+        return self._final_free_energy  # type: ignore
+
+    @property
+    def final_position_force(self) -> np.ndarray:
+        if self._final_position_force is None:
+            self._read_tail()
+        return self._final_position_force  # type: ignore
+
+    @property
+    def forces(self) -> np.ndarray:
+        return self.position_force[:, :, 3:]
+
     @property
     def free_energy(self) -> List[Dict[str, float]]:
-        if self._free_energy is None:
-            result: List[Dict[str, float]] = []
-            d: Dict[str, float] = {}
-            read = lambda x: float(x.split("=")[-1].strip())
-            for line in self.lines:
-                if "alpha Z" in line and "PSCENC" in line:
-                    d["PSCENC"] = read(line)
-                if "Ewald energy" in line and "TEWEN" in line:
-                    d["TEWEN"] = read(line)
-                if "-Hartree energ" in line and "DENC" in line:
-                    d["DENC"] = read(line)
-                if "-exchange" in line and "EXHF" in line:
-                    d["EXHF"] = read(line)
-                if "-V(xc)+E(xc)" in line and "XCENC" in line:
-                    d["XCENC"] = read(line)
-                if "entropy T*S" in line and "EENTRO" in line:
-                    d["EENTRO"] = read(line)
-                if "eigenvalues" in line and "EBANDS" in line:
-                    d["EBANDS"] = read(line)
-                if "atomic energy" in line and "EATOM" in line:
-                    d["EATOM"] = read(line)
-                if "Solvation" in line and "Ediel_sol" in line:
-                    d["Ediel_sol"] = read(line)
-                if "free energy" in line and "TOTEN" in line:
-                    d["TOTEN"] = float(
-                        line.split("=")[-1].replace("eV", "").strip())
-                if "energy without entropy =" in line:
-                    result.append(copy.deepcopy(d))
-            self._free_energy = result
-        return self._free_energy
+        return self._scan_state()["free_energy"]
+
+    @property
+    def lines(self) -> List[str]:
+        if self._lines is None:
+            super().load(self.filepath)
+        return self._lines  # type: ignore
+
+    @property
+    def ionic_free_energy(self) -> List[Dict[str, float]]:
+        return self._scan_state()["ionic_free_energy"]
+
+    @property
+    def magnetization(self) -> List[float]:
+        return self._scan_state()["magnetization"]
+
+    @property
+    def max_force(self) -> np.ndarray:
+        return np.linalg.norm(self.forces, axis=2).max(axis=1, initial=0.0)
+
+    @property
+    def position_force(self) -> np.ndarray:
+        blocks = self._scan_state()["position_force"]
+        # restack only when new blocks have been parsed
+        if (self._position_force is None
+                or len(self._position_force) != len(blocks)):
+            if len(blocks) > 0:
+                self._position_force = np.stack(blocks)
+            else:
+                self._position_force = np.zeros((0, 0, 6))
+        return self._position_force
+
+    @property
+    def positions(self) -> np.ndarray:
+        return self.position_force[:, :, :3]
+
+    @property
+    def rms_force(self) -> np.ndarray:
+        squared = np.einsum("ijk,ijk->ij", self.forces, self.forces)
+        n_atoms = max(squared.shape[1], 1)
+        return np.sqrt(squared.sum(axis=1) / n_atoms)
+
+    @property
+    def stress(self) -> np.ndarray:
+        return np.array(self._scan_state()["stress"]).reshape((-1, 6))
+
+    @property
+    def timing(self) -> Dict[str, List[float]]:
+        return self._scan_state()["timing"]
+
+    def _scan_state(self) -> _ScanState:
+        if self._state is None:
+            raise RuntimeError("file not loaded")
+        return self._state
+
+    def _read_appended(self, path: str, final: bool) -> None:
+        self._lines = None  # reread the file if the lines are accessed
+        _scan_lines(self._appended_lines(path, final),
+                    self._state)  # type: ignore
+
+    def _appended_lines(self, path: str, final: bool) -> Iterator[str]:
+        # advance the offset past each line as it is consumed
+        lines = read_appended_lines(path, self._offset, final)  # type: ignore
+        for line, self._offset in lines:
+            yield line
+
+    def _read_tail(self) -> None:
+        values = self._cached("final_values", 2, self._read_final_values)
+        self._final_free_energy, self._final_position_force = values
+
+    def _read_final_values(self) -> Tuple[Dict[str, float], np.ndarray]:
+        # read back past the summary and the force block of the last complete
+        # ionic step to the components of its last electronic step
+        lines: List[str] = []
+        found_step = False
+        found_forces = False
+        for line in read_lines_reversed(self.filepath):
+            lines.append(line)
+            if not found_step:
+                found_step = _ionic_step_pattern.search(line) is not None
+            elif not found_forces:
+                found_forces = "TOTAL-FORCE" in line
+            elif "PSCENC" in line:
+                # a complete force block of an unfinished step may follow
+                state = _scan_lines(reversed(lines), _new_state())
+                if (len(state["position_force"]) > 0
+                        and len(state["ionic_free_energy"]) > 0):
+                    return (state["ionic_free_energy"][0],
+                            state["position_force"][0])
+                break
+        err = "Unable to find a complete ionic step in `{}`.".format(
+            self.filepath)
+        raise ValueError(err)
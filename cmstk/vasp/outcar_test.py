@@ -1,6 +1,9 @@
 from cmstk.vasp.outcar import OutcarFile
 from cmstk.util import data_directory
+import asyncio
+import numpy as np
 import os
+import pytest
 
 
 def test_outcar_file():
@@ -21,3 +24,185 @@ def test_outcar_file():
         assert free_energy["EATOM"] == 4914.77660278
         assert free_energy["Ediel_sol"] == 0.0
         assert free_energy["TOTEN"] == -16.52753569
+
+
+def _write_outcar(path, n_steps=2, n_iterations=3):
+    # each ionic step follows the layout written by VASP
+    # - the components are only reported by the electronic steps
+    # - the summary following the force block only reports TOTEN
+    text = " POTCAR:    PAW_PBE Fe 06Sep2000\n"
+    for step in range(n_steps):
+        for iteration in range(n_iterations):
+            # the last electronic step of ionic step i has TOTEN -16 - i
+            toten = -16.0 - step + (n_iterations - 1 - iteration) * 0.5
+            text += " " + "-" * 41 + " Iteration{:5d}({:4d})  ".format(
+                step + 1, iteration + 1) + "-" * 39 + "\n"
+            text += " number of electron      16.0000000 magnetization       "
+            text += "{}\n".format(2.0 + step + iteration / 10)
+            text += "\n Free energy of the ion-electron system (eV)\n"
+            text += "  " + "-" * 51 + "\n"
+            text += "  alpha Z        PSCENC =       222.26498670\n"
+            text += "  Ewald energy   TEWEN  =     -3635.18175209\n"
+            text += "  -Hartree energ DENC   =     -1080.09667853\n"
+            text += "  -exchange      EXHF   =         0.00000000\n"
+            text += "  -V(xc)+E(xc)   XCENC  =       140.97654125\n"
+            text += "  PAW double counting   =      2709.27565706    -2713.8\n"
+            text += "  entropy T*S    EENTRO =        -0.00248741\n"
+            text += "  eigenvalues    EBANDS =      {:.8f}\n".format(
+                -393.82985341 - iteration)
+            text += "  atomic energy  EATOM  =      4914.77660278\n"
+            text += "  Solvation  Ediel_sol  =         0.00000000\n"
+            text += "  " + "-" * 51 + "\n"
+            text += "  free energy    TOTEN  =       {} eV\n\n".format(toten)
+            text += "  energy without entropy =      -16.5  "
+            text += "energy(sigma->0) =      -16.5\n\n"
+        text += " E-fermi :   {}     XC(G=0):  -6.4315     alpha+bet : -6.2\n"\
+            .format(5.5 + step)
+        text += "  FORCE on cell =-STRESS in cart. coord.  units (eV):\n"
+        text += "  in kB      {0}.0  {0}.0  {0}.0  0.1  0.2  0.3\n".format(step)
+        text += " POSITION                                       TOTAL-FORCE"
+        text += " (eV/Angst)\n"
+        text += " " + "-" * 83 + "\n"
+        text += "      0.00000      0.00000      0.00000         0.000000"
+        text += "      0.000000      {}\n".format(-step / 10)
+        text += "      1.43325      1.43325      1.43325         0.000000"
+        text += "      0.000000      {}\n".format(step / 10)
+        text += " " + "-" * 83 + "\n"
+        text += "    total drift:                                0.0 0.0 0.0\n"
+        text += "\n" + "-" * 104 + "\n\n"
+        text += "  FREE ENERGIE OF THE ION-ELECTRON SYSTEM (eV)\n"
+        text += "  " + "-" * 51 + "\n"
+        text += "  free  energy   TOTEN  =       {} eV\n\n".format(-16.0 - step)
+        text += "  energy  without entropy=      -16.5  "
+        text += "energy(sigma->0) =      -16.5\n\n"
+        text += "     LOOP+:  cpu time   {0}.5000: real time   {0}.7500\n"\
+            .format(10 + step)
+    text += "                  Elapsed time (sec):      112.345\n"
+    with open(path, "w") as f:
+        f.write(text)
+
+
+def test_outcar_file_scan():
+    """Tests extracting every quantity with a single pass."""
+    path = "test.outcar"
+    _write_outcar(path)
+    outcar = OutcarFile(path)
+    with outcar:
+        assert len(outcar.free_energy) == 6
+        assert outcar.free_energy[0]["TOTEN"] == -15.0
+        assert outcar.free_energy[0]["PSCENC"] == 222.2649867
+        assert outcar.free_energy[0]["EATOM"] == 4914.77660278
+        assert len(outcar.free_energy[0]) == 10
+        # an ionic step takes the components of its last electronic step
+        assert len(outcar.ionic_free_energy) == 2
+        assert outcar.ionic_free_energy[0]["TOTEN"] == -16.0
+        assert outcar.ionic_free_energy[1]["TOTEN"] == -17.0
+        assert outcar.ionic_free_energy[1]["EBANDS"] == -395.82985341
+        assert len(outcar.ionic_free_energy[1]) == 10
+        assert outcar.position_force.shape == (2, 2, 6)
+        assert np.array_equal(outcar.forces[1],
+                              [[0.0, 0.0, -0.1], [0.0, 0.0, 0.1]])
+        assert np.array_equal(outcar.positions[0, 1], [1.43325] * 3)
+        assert np.allclose(outcar.max_force, [0.0, 0.1])
+        assert np.allclose(outcar.rms_force, [0.0, 0.1])
+        assert outcar.stress.shape == (2, 6)
+        assert np.array_equal(outcar.stress[1], [1, 1, 1, 0.1, 0.2, 0.3])
+        assert outcar.magnetization == [2.2, 3.2]
+        assert outcar.fermi_energy == [5.5, 6.5]
+        assert outcar.timing["cpu_time"] == [10.5, 11.5]
+        assert outcar.timing["real_time"] == [10.75, 11.75]
+        assert outcar.timing["elapsed_time"] == [112.345]
+    with pytest.raises(RuntimeError):
+        outcar.free_energy
+    # the lines are read on demand without a scan
+    assert outcar.lines[0] == "POTCAR:    PAW_PBE Fe 06Sep2000"
+    assert outcar.lines[-1] == "Elapsed time (sec):      112.345"
+    os.remove(path)
+
+
+def test_outcar_file_interrupted():
+    """Tests that an incomplete final force block is dropped."""
+    path = "test.outcar"
+    _write_outcar(path, n_steps=3)
+    with open(path, "r") as f:
+        text = f.read()
+    # truncate the file partway through the final force block
+    index = text.rindex("TOTAL-FORCE")
+    with open(path, "w") as f:
+        f.write(text[:text.index("1.43325", index) + 3])
+    outcar = OutcarFile(path)
+    with outcar:
+        assert outcar.position_force.shape == (2, 2, 6)
+        assert len(outcar.max_force) == 2
+    os.remove(path)
+
+
+def test_outcar_file_tail():
+    """Tests reading the final ionic step from the end of the file."""
+    path = "test.outcar"
+    _write_outcar(path, n_steps=3)
+    with open(path, "r") as f:
+        text = f.read()
+    # the beginning of the file is never read
+    with open(path, "wb") as f:
+        f.write(b"\xff" * 100000 + text.encode())
+    outcar = OutcarFile(path)
+    assert outcar.final_free_energy["TOTEN"] == -18.0
+    assert outcar.final_free_energy["EBANDS"] == -395.82985341
+    assert len(outcar.final_free_energy) == 10
+    assert np.array_equal(outcar.final_position_force[:, 5], [-0.2, 0.2])
+    # an incomplete final step falls back to the previous one
+    # - with and without the force block of the final step
+    for marker in ["alpha Z", "FREE ENERGIE"]:
+        with open(path, "w") as f:
+            f.write(text[:text.rindex(marker)])
+        outcar = OutcarFile(path)
+        assert outcar.final_free_energy["TOTEN"] == -17.0
+        assert outcar.final_free_energy["EBANDS"] == -395.82985341
+        assert np.array_equal(outcar.final_position_force[:, 5],
+                              [-0.1, 0.1])
+    # a single ionic step
+    _write_outcar(path, n_steps=1)
+    outcar = OutcarFile(path)
+    assert outcar.final_free_energy["TOTEN"] == -16.0
+    assert np.array_equal(outcar.final_position_force[:, 5], [0.0, 0.0])
+    with open(path, "w") as f:
+        f.write("nothing to see here\n")
+    with pytest.raises(ValueError):
+        OutcarFile(path).final_free_energy
+    os.remove(path)
+
+
+def test_outcar_file_follow():
+    """Tests incrementally parsing a file as it is written."""
+    path = "test.outcar"
+    _write_outcar(path, n_steps=3)
+    with open(path, "r") as f:
+        text = f.read()
+    # split partway through a line of the second force block
+    # - every electronic step of the second ionic step has been written
+    index = text.index("TOTAL-FORCE", text.index("TOTAL-FORCE") + 1)
+    index = text.index("1.43325", index)
+    outcar = OutcarFile(path)
+    with open(path, "w") as f:
+        f.write(text[:index + 3])
+    steps = outcar.refresh()
+    assert [s["TOTEN"] for s in steps] == [-16.0]
+    assert len(outcar.free_energy) == 6
+    assert outcar.position_force.shape == (1, 2, 6)
+    assert outcar.refresh() == []
+    with open(path, "a") as f:
+        f.write(text[index + 3:])
+    steps = outcar.refresh()
+    assert [s["TOTEN"] for s in steps] == [-17.0, -18.0]
+    assert outcar.position_force.shape == (3, 2, 6)
+    assert np.array_equal(outcar.forces[1, :, 2], [-0.1, 0.1])
+    assert outcar.timing["elapsed_time"] == [112.345]
+
+    async def collect():
+        return [s async for s in OutcarFile(path).follow(interval=0.0)]
+
+    # the run has finished so following stops at the end of the file
+    steps = asyncio.run(collect())
+    assert [s["TOTEN"] for s in steps] == [-16.0, -17.0, -18.0]
+    os.remove(path)
@@ -1,5 +1,4 @@
 from cmstk.filetypes import TextFile
-from cmstk.structure.atom import Atom
 from cmstk.structure.simulation import SimulationCell
 from collections import OrderedDict
 import numpy as np
@@ -18,83 +17,135 @@ class PoscarFile(TextFile):
         except an array of zeros. If this feature is critically important to
         you, fork it and fix it :)
 
+        The coordinate block is decoded in bulk into a (n_atoms, 3) position
+        array and a (n_atoms, 3) relaxation array. When the file includes the
+        VASP5 species line the species are expanded into the symbol of each
+        atom of the simulation cell.
+
     Args:
         filepath: Filepath to a POSCAR file.
         comment: Comment line at the top of the file.
         direct: Specifies direct (fractional) coordinates.
+        - Defaults to the coordinate system line of the file when the
+          simulation cell is read from the file and to False otherwise.
         simulation_cell: Underlying simulation cell.
         n_atoms_per_symbol: Number of atoms of each species.
         - Presented in the order that they appear in the POTCAR.
         relaxations: Boolean matrix to indicate selective dymanics parameters.
+        species: IUPAC chemical symbol of each species.
+        - Presented in the same order as `n_atoms_per_symbol`.
 
     Attributes:
         filepath: Filepath to a POSCAR file.
         comment: Comment line at the top of the file.
         direct: Specifies direct (fractional) coordinates.
+        - The coordinate system of the positions of `simulation_cell`.
         simulation_cell: Underlying simulation cell.
         n_atoms_per_symbol: Number of atoms of each species.
         - Presented in the order that they appear in the POTCAR.
         relaxations: Boolean matrix to indicate selective dymanics parameters.
+        - Shape: (n_atoms, 3)
+        - Shape: (0, 3) if selective dynamics are not used.
+        species: IUPAC chemical symbol of each species.
+        - Empty if the file does not include the species line.
     """
 
     def __init__(self,
                  filepath: Optional[str] = None,
                  comment: Optional[str] = None,
-                 direct: bool = False,
+                 direct: Optional[bool] = None,
                  scaling_factor: Optional[float] = None,
                  simulation_cell: Optional[SimulationCell] = None,
                  n_atoms_per_symbol: Optional[List[int]] = None,
-                 relaxations: Optional[List[np.ndarray]] = None) -> None:
+                 relaxations: Optional[List[np.ndarray]] = None,
+                 species: Optional[List[str]] = None) -> None:
         if filepath is None:
             filepath = "POSCAR"
         if comment is None:
             comment = "# painstakingly crafted by cmstk :)"
         self._comment = comment
+        if direct is None and simulation_cell is not None:
+            direct = False
         self._direct = direct
         self._scaling_factor = scaling_factor
         self._simulation_cell = simulation_cell
-        if n_atoms_per_symbol is None and simulation_cell is not None:
+        if simulation_cell is not None:
             symbol_count_map: Dict[str, int] = OrderedDict()
             for sym in self.simulation_cell.symbols:
                 if sym in symbol_count_map:
                     symbol_count_map[sym] += 1
                 else:
                     symbol_count_map[sym] = 1
-            n_atoms_per_symbol = list(symbol_count_map.values())
+            if n_atoms_per_symbol is None:
+                n_atoms_per_symbol = list(symbol_count_map.values())
+            if species is None:
+                if "" in symbol_count_map:
+                    species = []
+                else:
+                    species = list(symbol_count_map.keys())
         self._n_atoms_per_symbol = n_atoms_per_symbol
+        if relaxations is not None:
+            relaxations = np.array(relaxations, dtype=bool).reshape((-1, 3))
         self._relaxations = relaxations
+        self._species = species
         super().__init__(filepath)
 
-    def write(self, path: Optional[str] = None) -> None:
+    def write(self,
+              path: Optional[str] = None,
+              direct: Optional[bool] = None) -> None:
         """Writes a POSCAR file.
 
+        Notes:
+            The coordinate block is formatted in a single pass over the
+            positions and relaxations and the file is written with a single
+            buffered write.
+
         Args:
             path: Filepath to write to.
+            direct: Write direct (fractional) coordinates.
+            - Defaults to `direct`.
+            - Positions are transformed with the coordinate matrix of the
+              simulation cell if this differs from `direct`.
         """
         if path is None:
             path = self.filepath
+        if direct is None:
+            direct = self.direct
+        cell = self.simulation_cell
+        positions = np.array(cell.positions, dtype=float).reshape((-1, 3))
+        if direct and not self.direct:
+            positions = np.matmul(positions, cell.fractional_matrix)
+        elif not direct and self.direct:
+            positions = np.matmul(positions, cell.coordinate_matrix)
+        header = ["{}\n".format(self.comment)]
+        header.append("\t{}\n".format(self.scaling_factor))
+        for row in cell.coordinate_matrix:
+            header.append("\t{:.6f} {:.6f} {:.6f}\n".format(
+                row[0], row[1], row[2]))
+        if len(self.species) > 0:
+            header.append("\t{}\n".format(" ".join(self.species)))
+        header.append("\t{}\n".format(" ".join(map(str,
+                                                    self.n_atoms_per_symbol))))
+        relaxations = np.asarray(self.relaxations, dtype=bool)
+        selective = len(relaxations) != 0
+        if selective:
+            header.append("Selective dynamics\n")
+        if direct:
+            header.append("Direct\n")
+        else:
+            header.append("Cartesian\n")
+        n_atoms = len(positions)
+        if selective:
+            table = np.empty((n_atoms, 6), dtype=object)
+            table[:, :3] = positions
+            table[:, 3:] = np.where(relaxations.reshape((-1, 3)), "T", "F")
+            row_format = "\t%.6f %.6f %.6f %s %s %s\n"
+        else:
+            table = positions
+            row_format = "\t%.6f %.6f %.6f\n"
+        body = (row_format * n_atoms) % tuple(table.ravel().tolist())
         with open(path, "w") as f:
-            f.write("{}\n".format(self.comment))
-            f.write("\t{}\n".format(self.scaling_factor))
-            for row in self.simulation_cell.coordinate_matrix:
-                row = "{:.6f} {:.6f} {:.6f}".format(row[0], row[1], row[2])
-                f.write("\t{}\n".format(row))
-            f.write("\t{}\n".format(" ".join(map(str,
-                                                 self.n_atoms_per_symbol))))
-            if len(self.relaxations) != 0:
-                f.write("Selective dynamics\n")
-            if self.direct:
-                f.write("Direct\n")
-            else:
-                f.write("Cartesian\n")
-            for i, p in enumerate(self.simulation_cell.positions):
-                p_row = "{:.6f} {:.6f} {:.6f}".format(p[0], p[1], p[2])
-                if len(self.relaxations) != 0:
-                    r = [("T" if x else "F") for x in self.relaxations[i]]
-                    r_row = " ".join(r)
-                    f.write("\t{} {}\n".format(p_row, r_row))
-                else:
-                    f.write("\t{}\n".format(p_row))
+            f.write("".join(header) + body)
 
     @property
     def comment(self) -> str:
@@ -133,16 +184,15 @@ class PoscarFile(TextFile):
     @property
     def simulation_cell(self) -> SimulationCell:
         if self._simulation_cell is None:
-            cm = self.lines[2:5]
-            cm_arr = np.array([np.fromstring(row, sep=" ") for row in cm])
-            start, end = self._position_section_line_numbers
-            positions = self.lines[start:end]
-            positions = [" ".join(p.split()[:3]) for p in positions]
-            arr_positions = [np.fromstring(p, sep=" ") for p in positions]
-            atoms = []
-            for p in arr_positions:
-                atoms.append(Atom(position=p))
-            simulation_cell = SimulationCell(atoms, cm_arr)
+            cm = " ".join(self.lines[2:5])
+            cm_arr = np.fromstring(cm, sep=" ").reshape((3, 3))
+            positions, _ = self._read_coordinate_block()
+            symbols = None
+            if len(self.species) > 0:
+                symbols = list(
+                    np.repeat(self.species, self.n_atoms_per_symbol))
+            simulation_cell = SimulationCell.from_arrays(
+                positions, cm_arr, symbols)
             self._simulation_cell = simulation_cell
         return self._simulation_cell
 
@@ -151,30 +201,25 @@ class PoscarFile(TextFile):
         self._simulation_cell = value
 
     @property
-    def relaxations(self) -> List[np.ndarray]:
+    def relaxations(self) -> np.ndarray:
         if self._relaxations is None:
-            start, end = self._position_section_line_numbers
-            relaxations = self.lines[start:end]
-            relaxations_lst = [r.split()[3:] for r in relaxations]
-            relaxations_arr = [
-                np.array([True if rr == "T" else False
-                          for rr in r])
-                for r in relaxations_lst
-            ]
-            self._relaxations = relaxations_arr
+            _, relaxations = self._read_coordinate_block()
+            self._relaxations = relaxations
         return self._relaxations
 
     @relaxations.setter
     def relaxations(self, value: List[np.ndarray]) -> None:
-        if len(value) != self.simulation_cell.n_atoms:
+        # an empty value disables selective dynamics
+        if len(value) not in [0, self.simulation_cell.n_atoms]:
             err = "relaxations length must match number of atoms."
             raise ValueError(err)
-        self._relaxations = value
+        self._relaxations = np.array(value, dtype=bool).reshape((-1, 3))
 
     @property
     def n_atoms_per_symbol(self) -> List[int]:
         if self._n_atoms_per_symbol is None:
-            naps = [int(s) for s in self.lines[5].split()]
+            line = self.lines[self._counts_line_number]
+            naps = [int(s) for s in line.split()]
             self._n_atoms_per_symbol = naps
         return self._n_atoms_per_symbol
 
@@ -186,14 +231,63 @@ class PoscarFile(TextFile):
         self._n_atoms_per_symbol = value
 
     @property
-    def _coordinate_system_line_number(self) -> int:
-        if self.lines[6][0] in ["S", "s"]:
-            return 7
+    def species(self) -> List[str]:
+        if self._species is None:
+            if self._counts_line_number == 6:
+                self._species = self.lines[5].split()
+            else:
+                self._species = []
+        return self._species
+
+    @species.setter
+    def species(self, value: List[str]) -> None:
+        if len(value) != len(self.n_atoms_per_symbol):
+            err = "Number of species must match number of symbols."
+            raise ValueError(err)
+        self._species = value
+
+    @property
+    def _counts_line_number(self) -> int:
+        # VASP5 files name the species on the line preceding the counts
+        if self.lines[5].split()[0].isdigit():
+            return 5
         else:
             return 6
 
+    @property
+    def _coordinate_system_line_number(self) -> int:
+        line_number = self._counts_line_number + 1
+        if self.lines[line_number][0] in ["S", "s"]:
+            return line_number + 1
+        else:
+            return line_number
+
     @property
     def _position_section_line_numbers(self) -> Tuple[int, int]:
         start = self._coordinate_system_line_number + 1
         end = start + sum(self.n_atoms_per_symbol)
         return (start, end)
+
+    def _read_coordinate_block(self) -> Tuple[np.ndarray, np.ndarray]:
+        # decode every position and relaxation flag with one conversion each
+        start, end = self._position_section_line_numbers
+        block = self.lines[start:end]
+        n_atoms = len(block)
+        selective = self._coordinate_system_line_number != (
+            self._counts_line_number + 1)
+        n_columns = 6 if selective else 3
+        tokens = " ".join(block).split()
+        if len(tokens) != n_atoms * n_columns:
+            # rows are annotated with trailing site labels
+            tokens = [t for row in block for t in row.split()[:n_columns]]
+        if len(tokens) != n_atoms * n_columns:
+            err = "Unable to parse the coordinate block of `{}`.".format(
+                self.filepath)
+            raise ValueError(err)
+        table = np.array(tokens).reshape((n_atoms, n_columns))
+        positions = table[:, :3].astype(float)
+        if selective:
+            relaxations = np.char.upper(table[:, 3:]) == "T"
+        else:
+            relaxations = np.zeros((0, 3), dtype=bool)
+        return positions, relaxations
@@ -1,3 +1,4 @@
+from cmstk.structure.simulation import SimulationCell
 from cmstk.vasp.poscar import PoscarFile
 from cmstk.util import data_directory
 import numpy as np
@@ -64,3 +65,93 @@ def test_contcar_file():
     assert poscar_reader.scaling_factor == poscar.scaling_factor
     assert os.path.exists("test.contcar")
     os.remove("test.contcar")
+
+
+def test_poscar_file_species():
+    """Tests reading a VASP5 POSCAR file with selective dynamics."""
+    path = "test.poscar"
+    with open(path, "w") as f:
+        f.write("Fe3Cr\n 1.0\n 5.74 0.0 0.0\n 0.0 5.74 0.0\n 0.0 0.0 5.74\n")
+        f.write(" Fe Cr\n 3 1\nSelective dynamics\nDirect\n")
+        f.write(" 0.0 0.0 0.0 T T T\n 0.5 0.5 0.0 F F T\n")
+        f.write(" 0.5 0.0 0.5 T F T Fe\n 0.0 0.5 0.5 F F F\n")
+    poscar = PoscarFile(path)
+    with poscar:
+        assert poscar.species == ["Fe", "Cr"]
+        assert poscar.n_atoms_per_symbol == [3, 1]
+        cell = poscar.simulation_cell
+        assert cell.symbols == ["Fe", "Fe", "Fe", "Cr"]
+        assert np.array_equal(cell.positions[2], [0.5, 0.0, 0.5])
+        assert poscar.relaxations.shape == (4, 3)
+        assert np.array_equal(poscar.relaxations[2], [True, False, True])
+        assert not poscar.relaxations[3].any()
+    # the species are recovered from the symbols of the simulation cell
+    assert PoscarFile(simulation_cell=cell).species == ["Fe", "Cr"]
+    with open(path, "w") as f:
+        f.write("Fe\n 1.0\n 2.87 0.0 0.0\n 0.0 2.87 0.0\n 0.0 0.0 2.87\n")
+        f.write(" 2\nCartesian\n 0.0 0.0 0.0\n 1.435 1.435 1.435\n")
+    poscar = PoscarFile(path)
+    with poscar:
+        assert poscar.species == []
+        assert poscar.simulation_cell.symbols == ["", ""]
+        assert poscar.relaxations.shape == (0, 3)
+    os.remove(path)
+
+
+def test_poscar_file_write():
+    """Tests writing positions, relaxations and species in bulk."""
+    path = "test.poscar"
+    lattice = np.array([[2.87, 0.0, 0.0], [0.0, 2.87, 0.0], [0.0, 0.0, 5.74]])
+    fractional = np.array([[0.0, 0.0, 0.0], [0.5, 0.5, 0.25],
+                           [0.0, 0.0, 0.5], [0.5, 0.5, 0.75]])
+    cartesian = np.matmul(fractional, lattice)
+    cell = SimulationCell.from_arrays(cartesian, lattice,
+                                      ["Fe", "Fe", "Fe", "Cr"])
+    relaxations = np.array([[True, True, True], [False, False, True],
+                            [True, False, True], [False, False, False]])
+    writer = PoscarFile(path,
+                        scaling_factor=1.0,
+                        simulation_cell=cell,
+                        relaxations=relaxations)
+    # cartesian positions are transformed on output
+    writer.write(direct=True)
+    reader = PoscarFile(path)
+    with reader:
+        assert reader.species == ["Fe", "Cr"]
+        assert reader.n_atoms_per_symbol == [3, 1]
+        assert reader.lines[8] == "Direct"
+        assert np.allclose(reader.simulation_cell.positions, fractional)
+        assert np.array_equal(reader.relaxations, relaxations)
+        assert reader.simulation_cell.symbols == cell.symbols
+    writer.relaxations = np.zeros((0, 3), dtype=bool)
+    writer.write()
+    reader = PoscarFile(path)
+    with reader:
+        assert reader.lines[7] == "Cartesian"
+        assert np.allclose(reader.simulation_cell.positions, cartesian)
+        assert reader.relaxations.shape == (0, 3)
+    os.remove(path)
+
+
+def test_poscar_file_write_direct():
+    """Tests that a direct file is not transformed twice when rewritten."""
+    path = "test.poscar"
+    with open(path, "w") as f:
+        f.write("Fe\n1.0\n2.0 0.0 0.0\n0.0 2.0 0.0\n0.0 0.0 4.0\nFe\n2\n"
+                "Direct\n0.0 0.0 0.0\n0.5 0.5 0.5\n")
+    poscar = PoscarFile(path)
+    with poscar:
+        assert poscar.direct
+        fractional = np.array(poscar.simulation_cell.positions)
+        poscar.write(direct=True)
+    reader = PoscarFile(path)
+    with reader:
+        assert reader.direct
+        assert np.allclose(reader.simulation_cell.positions, fractional)
+        reader.write(direct=False)
+    reader = PoscarFile(path)
+    with reader:
+        assert not reader.direct
+        assert np.allclose(reader.simulation_cell.positions,
+                           [[0.0, 0.0, 0.0], [1.0, 1.0, 2.0]])
+    os.remove(path)
@@ -1,5 +1,11 @@
 from cmstk.filetypes import TextFile
-from typing import List, Optional
+import hashlib
+import json
+import os
+import re
+from typing import Any, BinaryIO, Dict, List, Optional
+
+_title_pattern = re.compile(rb"TITEL\s*=\s*([^\r\n]*)")
 
 
 class PotcarFile(TextFile):
@@ -49,3 +55,150 @@ class PotcarFile(TextFile):
         with open(path, "w") as f:
             for line in self.lines:
                 f.write("{}\n".format(line))
+
+
+class PotcarLibrary(object):
+    """Index of a directory of single element POTCAR files.
+
+    Notes:
+        Every file named POTCAR below `directory` is indexed under the path
+        of its parent directory relative to `directory` (e.g. "Fe_pv"). Each
+        file is read once to record its title, the byte range of its dataset
+        and a hash of that range. The index is saved at `index_path` and a
+        file is only read again if its size or modification time changes.
+
+        A multi-element POTCAR is assembled by copying the indexed byte
+        ranges into the new file without decoding them. The copy is made by
+        the kernel where the platform supports it.
+
+    Args:
+        directory: Directory of the pseudopotential library.
+        index_path: Filepath to save the index to.
+        - Defaults to ".potcar_index.json" in `directory`.
+
+    Attributes:
+        directory: Directory of the pseudopotential library.
+        index: Filepath, byte range, title and hash of each potential.
+        index_path: Filepath to save the index to.
+        labels: Label of each potential in the library.
+    """
+
+    def __init__(self, directory: str,
+                 index_path: Optional[str] = None) -> None:
+        if index_path is None:
+            index_path = os.path.join(directory, ".potcar_index.json")
+        self.directory = directory
+        self.index_path = index_path
+        self._index: Optional[Dict[str, Dict[str, Any]]] = None
+
+    def assemble(self, labels: List[str], path: str) -> List[str]:
+        """Writes a POTCAR file which concatenates potentials from the
+           library.
+
+        Args:
+            labels: Label of each potential in the order of the POSCAR
+                    species.
+            path: Filepath to write to.
+
+        Returns:
+            Title of each potential written.
+
+        Raises:
+            ValueError
+            - A label is not in the library.
+        """
+        entries = []
+        for label in labels:
+            if label not in self.index:
+                err = "`{}` is not in the library at `{}`.".format(
+                    label, self.directory)
+                raise ValueError(err)
+            entries.append(self.index[label])
+        with open(path, "wb", buffering=0) as dst:
+            for entry in entries:
+                src_path = os.path.join(self.directory, entry["path"])
+                with open(src_path, "rb", buffering=0) as src:
+                    _copy_range(src, dst, entry["start"],
+                                entry["end"] - entry["start"])
+        return [entry["title"] for entry in entries]
+
+    @property
+    def index(self) -> Dict[str, Dict[str, Any]]:
+        if self._index is None:
+            self._index = self._read_index()
+        return self._index
+
+    @property
+    def labels(self) -> List[str]:
+        return sorted(self.index)
+
+    def _read_index(self) -> Dict[str, Dict[str, Any]]:
+        saved: Dict[str, Dict[str, Any]] = {}
+        if os.path.exists(self.index_path):
+            with open(self.index_path, "r") as f:
+                saved = json.load(f)
+        index = {}
+        for directory, _, files in os.walk(self.directory):
+            if "POTCAR" not in files:
+                continue
+            path = os.path.join(directory, "POTCAR")
+            relative_path = os.path.relpath(path, self.directory)
+            label = os.path.dirname(relative_path).replace(os.sep, "/")
+            stat = os.stat(path)
+            entry = saved.get(label)
+            if (entry is None or entry["path"] != relative_path
+                    or entry["size"] != stat.st_size
+                    or entry["mtime"] != stat.st_mtime_ns):
+                entry = _index_potcar(path)
+                entry["path"] = relative_path
+                entry["size"] = stat.st_size
+                entry["mtime"] = stat.st_mtime_ns
+            index[label] = entry
+        if index != saved:
+            try:
+                with open(self.index_path, "w") as f:
+                    json.dump(index, f, indent=1, sort_keys=True)
+            except OSError:
+                pass  # the library may be read-only
+        return index
+
+
+def _index_potcar(path: str) -> Dict[str, Any]:
+    # record the first dataset of a POTCAR file
+    with open(path, "rb") as f:
+        content = f.read()
+    match = _title_pattern.search(content)
+    if match is None:
+        err = "Unable to find the `TITEL` tag in `{}`.".format(path)
+        raise ValueError(err)
+    end = content.find(b"End of Dataset")
+    if end == -1:
+        end = len(content)
+    else:
+        end = content.find(b"\n", end)
+        end = len(content) if end == -1 else end + 1
+    digest = hashlib.blake2b(content[:end], digest_size=20).hexdigest()
+    return {
+        "title": match.group(1).strip().decode(),
+        "start": 0,
+        "end": end,
+        "digest": digest
+    }
+
+
+def _copy_range(src: BinaryIO, dst: BinaryIO, start: int, length: int) -> None:
+    # let the kernel copy the bytes when possible
+    if hasattr(os, "copy_file_range"):
+        try:
+            while length > 0:
+                n = os.copy_file_range(  # type: ignore
+                    src.fileno(), dst.fileno(), length, start)
+                if n == 0:
+                    break
+                start += n
+                length -= n
+        except OSError:
+            pass  # e.g. unsupported across file systems
+    if length > 0:
+        src.seek(start)
+        dst.write(src.read(length))
@@ -1,6 +1,8 @@
 from cmstk.util import data_directory
-from cmstk.vasp.potcar import PotcarFile
+from cmstk.vasp.potcar import PotcarFile, PotcarLibrary
 import os
+import pytest
+import shutil
 
 
 def test_potcar():
@@ -17,3 +19,43 @@ def test_potcar():
     potcar.load(filepath)
     assert len(potcar.titles) == 2
     os.remove(filepath)
+
+
+def _write_potential(directory, symbol):
+    os.makedirs(directory)
+    text = "  PAW_PBE {0} 02Aug2007\n 8.000\n parameters from PSCTR are:\n"
+    text += "   TITEL  = PAW_PBE {0} 02Aug2007\n   POMASS =   55.847\n"
+    text += " End of Dataset\n"
+    with open(os.path.join(directory, "POTCAR"), "w") as f:
+        f.write(text.format(symbol))
+
+
+def test_potcar_library():
+    """Tests indexing a POTCAR library and assembling from it."""
+    directory = "test_potcar_library"
+    _write_potential(os.path.join(directory, "Fe_pv"), "Fe_pv")
+    _write_potential(os.path.join(directory, "Cr_pv"), "Cr_pv")
+    library = PotcarLibrary(directory)
+    assert library.labels == ["Cr_pv", "Fe_pv"]
+    assert library.index["Fe_pv"]["title"] == "PAW_PBE Fe_pv 02Aug2007"
+    assert os.path.exists(library.index_path)
+    filepath = "POTCAR_FeCr"
+    titles = library.assemble(["Fe_pv", "Cr_pv"], filepath)
+    assert titles == ["PAW_PBE Fe_pv 02Aug2007", "PAW_PBE Cr_pv 02Aug2007"]
+    expected = b""
+    for label in ["Fe_pv", "Cr_pv"]:
+        with open(os.path.join(directory, label, "POTCAR"), "rb") as f:
+            expected += f.read()
+    with open(filepath, "rb") as f:
+        assert f.read() == expected
+    potcar = PotcarFile(filepath)
+    with potcar:
+        assert potcar.titles == titles
+    # the saved index is reused until a file changes
+    _write_potential(os.path.join(directory, "Fe_sv"), "Fe_sv")
+    library = PotcarLibrary(directory)
+    assert library.labels == ["Cr_pv", "Fe_pv", "Fe_sv"]
+    with pytest.raises(ValueError):
+        library.assemble(["Mn"], filepath)
+    os.remove(filepath)
+    shutil.rmtree(directory)
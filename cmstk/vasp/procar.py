@@ -0,0 +1,154 @@
+from cmstk.filetypes import BaseFile
+import numpy as np
+import re
+from typing import Iterator, List, Optional, Tuple
+
+_float_pattern = re.compile(r"-?\d+\.\d+")
+
+
+class ProcarFile(BaseFile):
+    """File wrapper for a VASP PROCAR file.
+
+    Notes:
+        This is a read-only file wrapper.
+
+        The arrays share the layout of the corresponding VasprunFile
+        properties so that a PROCAR can stand in for a missing or truncated
+        vasprun.xml file.
+
+        The file is streamed one k-point at a time and the projections of each
+        k-point are decoded with a single numeric conversion. `iter_kpoints`
+        does not require `load` and holds only a single k-point in memory so
+        it should be preferred for very large files.
+
+        Only the first block of projections of each band is read so the
+        magnetization blocks of a non-collinear calculation are skipped.
+
+    Args:
+        filepath: Filepath to a PROCAR file.
+
+    Attributes:
+        filepath: Filepath to a PROCAR file.
+        eigenvalues: Energy and occupation of each band at each k-point.
+        - Shape: (n_spins, n_kpoints, n_bands, 2)
+        eigenvectors: Electron eigenvectors projected onto atomic orbitals.
+        - Shape: (n_spins, n_kpoints, n_bands, n_ions, n_orbitals)
+        kpoints: Reciprocal coordinates of each k-point.
+        - Shape: (n_kpoints, 3)
+    """
+
+    def __init__(self, filepath: Optional[str] = None) -> None:
+        if filepath is None:
+            filepath = "PROCAR"
+        self._eigenvalues: Optional[np.ndarray] = None
+        self._eigenvectors: Optional[np.ndarray] = None
+        self._kpoints: Optional[np.ndarray] = None
+        super().__init__(filepath)
+
+    def load(self, path: Optional[str] = None) -> None:
+        if path is None:
+            path = self.filepath
+        eigenvalues: List[List[np.ndarray]] = []
+        eigenvectors: List[List[np.ndarray]] = []
+        kpoints: List[np.ndarray] = []
+        for spin, _, kpoint, values, projections in self.iter_kpoints(path):
+            if spin == len(eigenvalues):
+                eigenvalues.append([])
+                eigenvectors.append([])
+            if spin == 0:
+                kpoints.append(kpoint)
+            eigenvalues[spin].append(values)
+            eigenvectors[spin].append(projections)
+        self._eigenvalues = np.array(eigenvalues)
+        self._eigenvectors = np.array(eigenvectors)
+        self._kpoints = np.array(kpoints).reshape((-1, 3))
+
+    def iter_kpoints(
+        self,
+        path: Optional[str] = None
+    ) -> Iterator[Tuple[int, int, np.ndarray, np.ndarray, np.ndarray]]:
+        """Yields the eigenvalues and projections of each k-point.
+
+        Args:
+            path: Filepath to read from.
+            - Defaults to `filepath`.
+
+        Returns:
+            The spin and k-point indices, the reciprocal coordinates of the
+            k-point, the energy and occupation of each band with shape
+            (n_bands, 2) and the projections with shape
+            (n_bands, n_ions, n_orbitals).
+        """
+        if path is None:
+            path = self.filepath
+        spin = -1
+        kpoint = -1
+        n_ions = 0
+        coordinates = None
+        bands: List[str] = []
+        rows: List[str] = []
+        n_columns = 0
+        with open(path, "r") as f:
+            for line in f:
+                line = line.strip()
+                if len(line) == 0:
+                    continue
+                if line[0].isdigit():
+                    rows.append(line)
+                elif line.startswith("band"):
+                    bands.append(line)
+                elif line.startswith("ion"):
+                    n_columns = len(line.split())
+                elif line.startswith("k-point") or line.startswith("#"):
+                    if coordinates is not None:
+                        yield (spin, kpoint, coordinates,
+                               *_decode_kpoint(bands, rows, n_ions, n_columns))
+                        coordinates = None
+                        bands = []
+                        rows = []
+                    if line.startswith("#"):
+                        # the header is repeated for each spin channel
+                        n_ions = int(line.split(":")[3].split()[0])
+                        spin += 1
+                        kpoint = -1
+                    else:
+                        kpoint += 1
+                        text = line.split(":", 1)[1].split("weight")[0]
+                        coordinates = np.array(
+                            _float_pattern.findall(text), dtype=float)
+        if coordinates is not None:
+            yield (spin, kpoint, coordinates,
+                   *_decode_kpoint(bands, rows, n_ions, n_columns))
+
+    @property
+    def eigenvalues(self) -> np.ndarray:
+        if self._eigenvalues is None:
+            raise RuntimeError("file not loaded")
+        return self._eigenvalues
+
+    @property
+    def eigenvectors(self) -> np.ndarray:
+        if self._eigenvectors is None:
+            raise RuntimeError("file not loaded")
+        return self._eigenvectors
+
+    @property
+    def kpoints(self) -> np.ndarray:
+        if self._kpoints is None:
+            raise RuntimeError("file not loaded")
+        return self._kpoints
+
+
+def _decode_kpoint(bands: List[str], rows: List[str], n_ions: int,
+                   n_columns: int) -> Tuple[np.ndarray, np.ndarray]:
+    # e.g. "band     1 # energy   -5.47424063 # occ.  1.00000000"
+    values = np.array([(b.split()[4], b.split()[7]) for b in bands],
+                      dtype=float).reshape((-1, 2))
+    # each row is the ion index, the orbital projections and their total
+    projections = np.fromstring(" ".join(rows), sep=" ")
+    try:
+        projections = projections.reshape((len(bands), -1, n_columns))
+    except ValueError:
+        err = "Unable to parse the projections of a k-point."
+        raise ValueError(err)
+    return values, projections[:, :n_ions, 1:-1]
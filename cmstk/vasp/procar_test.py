@@ -0,0 +1,61 @@
+from cmstk.vasp.procar import ProcarFile
+import numpy as np
+import os
+import pytest
+
+_n_spins = 2
+_n_kpoints = 3
+_n_bands = 2
+_n_ions = 2
+_orbitals = ["s", "py", "pz", "px"]
+
+
+def _write_procar(path):
+    text = "PROCAR lm decomposed\n"
+    for s in range(_n_spins):
+        text += "# of k-points:  {}         # of bands:   {}         ".format(
+            _n_kpoints, _n_bands)
+        text += "# of ions:   {}\n\n".format(_n_ions)
+        for k in range(_n_kpoints):
+            # negative coordinates may run into each other
+            line = " k-point    {} :    0.25000000-0.{}0000000 0.00000000"
+            text += line.format(k + 1, k) + "     weight = 0.33333333\n\n"
+            for b in range(_n_bands):
+                line = "band     {} # energy   {:.8f} # occ.  {:.8f}\n\n"
+                text += line.format(b + 1, s * 100 + k * 10 + b, 1.0 - s / 2)
+                text += "ion      {}    tot\n".format("     ".join(_orbitals))
+                for i in range(_n_ions):
+                    values = [
+                        s * 1000 + k * 100 + b * 10 + i + o / 100
+                        for o in range(len(_orbitals))
+                    ]
+                    text += "    {}  {}  1.000\n".format(
+                        i + 1, "  ".join("{:.3f}".format(v) for v in values))
+                text += "tot    0.1  0.1  0.1  0.1  0.4\n\n"
+            text += "\n"
+    with open(path, "w") as f:
+        f.write(text)
+
+
+def test_procar_file():
+    """Tests streaming decoding of a spin polarized PROCAR file."""
+    path = "test.PROCAR"
+    _write_procar(path)
+    procar = ProcarFile(path)
+    with procar:
+        eigenvalues = procar.eigenvalues
+        assert eigenvalues.shape == (_n_spins, _n_kpoints, _n_bands, 2)
+        assert np.array_equal(eigenvalues[1, 2, 1], [121, 0.5])
+        eigenvectors = procar.eigenvectors
+        assert eigenvectors.shape == (_n_spins, _n_kpoints, _n_bands, _n_ions,
+                                      len(_orbitals))
+        assert eigenvectors[1, 2, 1, 1, 3] == pytest.approx(1211.03)
+        assert eigenvectors[0, 1, 0, 0, 2] == pytest.approx(100.02)
+        assert np.allclose(procar.kpoints[2], [0.25, -0.2, 0.0])
+    kpoints = list(procar.iter_kpoints())
+    assert len(kpoints) == _n_spins * _n_kpoints
+    spin, kpoint, _, values, projections = kpoints[-1]
+    assert (spin, kpoint) == (_n_spins - 1, _n_kpoints - 1)
+    assert values.shape == (_n_bands, 2)
+    assert projections.shape == (_n_bands, _n_ions, len(_orbitals))
+    os.remove(path)
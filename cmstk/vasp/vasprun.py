@@ -1,9 +1,406 @@
+from cmstk.cache import get_result_cache
 from cmstk.filetypes import XmlFile
 import numpy as np
-from typing import Optional
+import os
+from typing import (Any, BinaryIO, Callable, Dict, Iterable, Iterator, List,
+                    Optional, Set, Tuple)
+import xml.etree.ElementTree as ET
+from xml.etree.ElementTree import Element
 
 _bad_xml_err = "Unable to find or parse section `{}`."
 
+# paths (relative to the root element) of the sections required by each
+# property when the file is streamed
+_section_paths: Dict[str, List[Tuple[str, ...]]] = {
+    "density_of_states": [("calculation", "dos", "total")],
+    "eigenvalues": [("calculation", "eigenvalues"),
+                    ("calculation", "projected", "eigenvalues")],
+    "eigenvectors": [("calculation", "projected", "array")],
+    "fermi_energy": [("calculation", "dos", "i")],
+    "partial_density_of_states": [("calculation", "dos", "partial")],
+}
+
+# path (relative to the root element) of the set of each ion in the partial
+# density of states
+_ion_set_path = ("calculation", "dos", "partial", "array", "set", "set")
+
+# decides whether an element is discarded as soon as it has been parsed
+# - (tag path relative to the root element, element)
+_Discard = Callable[[Tuple[str, ...], Element], bool]
+
+
+# paths (relative to a calculation block) of each named varray
+_varray_paths = {
+    "basis": "structure/crystal/varray[@name='basis']",
+    "forces": "varray[@name='forces']",
+    "positions": "structure/varray[@name='positions']",
+    "stress": "varray[@name='stress']",
+}
+
+
+# fragments located by a raw byte search
+# - (opening tag prefix, closing tag, whether to search from the end)
+_fragments = {
+    "atominfo": (b"<atominfo>", b"</atominfo>", False),
+    "efermi": (b'<i name="efermi">', b"</i>", True),
+    "energy": (b"<energy>", b"</energy>", True),
+    "finalpos": (b'<structure name="finalpos"', b"</structure>", True),
+}
+
+# fragment required by each field of `query_vasprun`
+_query_fragments = {
+    "fermi_energy": "efermi",
+    "final_energy": "energy",
+    "final_lattice": "finalpos",
+    "final_positions": "finalpos",
+    "symbols": "atominfo",
+}
+
+QUERY_FIELDS = sorted(_query_fragments)
+
+
+def query_vasprun(path: str,
+                  fields: Iterable[str],
+                  chunk_size: int = 1048576) -> Dict[str, Any]:
+    """Extracts a handful of fields from a vasprun.xml file without parsing
+       the entire file.
+
+    Notes:
+        The file is scanned as raw bytes for the small fragments which
+        contain the requested fields and only those fragments are parsed.
+        Fields which are written near the beginning of the file are searched
+        for from the start and "final" fields are searched for from the end so
+        that the scan stops as soon as every fragment has been located. This
+        is typically orders of magnitude faster than a full parse.
+
+        The final energy is read from the last `<energy>` block of the file
+        which is the last completed ionic step of a finished calculation.
+
+        The results are stored in the cache set by
+        `cmstk.cache.set_result_cache` when one is set.
+
+    Args:
+        path: Filepath to a vasprun.xml file.
+        fields: Names of the fields to extract.
+        - Any of `QUERY_FIELDS`.
+        chunk_size: Number of bytes read at a time.
+
+    Returns:
+        The value of each requested field.
+        - fermi_energy: float
+        - final_energy: Dict[str, float] of each reported energy.
+        - final_lattice: Lattice vectors as rows of a 3x3 matrix.
+        - final_positions: Fractional position of each atom.
+        - symbols: List[str] of the IUPAC chemical symbol of each atom.
+
+    Raises:
+        ValueError
+        - Unknown field.
+        - A field cannot be found in the file.
+    """
+    # the order of the fields does not change the cached results
+    fields = sorted(set(fields))
+    for field in fields:
+        if field not in _query_fragments:
+            err = "Unknown field `{}`.".format(field)
+            raise ValueError(err)
+    cache = get_result_cache()
+    if cache is None:
+        return _query_fields(path, fields, chunk_size)
+    key = "query_vasprun.{}".format(",".join(fields))
+    return cache.fetch(path, key, 1,
+                       lambda: _query_fields(path, fields, chunk_size))
+
+
+def _query_fields(path: str, fields: List[str],
+                  chunk_size: int) -> Dict[str, Any]:
+    names = sorted({_query_fragments[field] for field in fields})
+    fragments = _locate_fragments(path, names, chunk_size)
+    results: Dict[str, Any] = {}
+    for field in fields:
+        fragment = fragments.get(_query_fragments[field])
+        if fragment is None:
+            err = _bad_xml_err.format(field)
+            raise ValueError(err)
+        results[field] = _query_parsers[field](fragment)
+    return results
+
+
+def _locate_fragments(path: str, names: List[str],
+                      chunk_size: int) -> Dict[str, Element]:
+    """Scans a file for the named fragments and parses each one found.
+
+    Args:
+        path: Filepath to the file.
+        names: Names of the fragments in `_fragments`.
+        chunk_size: Number of bytes read at a time.
+    """
+    # carry over enough bytes to find markers which straddle two chunks
+    overlap = max(len(_fragments[name][0]) for name in names) - 1
+    offsets: Dict[str, int] = {}
+    with open(path, "rb") as f:
+        size = f.seek(0, os.SEEK_END)
+        # scan forward from the beginning
+        pending = [name for name in names if not _fragments[name][2]]
+        position, carry = 0, b""
+        while pending and position < size:
+            f.seek(position)
+            chunk = f.read(chunk_size)
+            buffer = carry + chunk
+            for name in list(pending):
+                index = buffer.find(_fragments[name][0])
+                if index != -1:
+                    offsets[name] = position - len(carry) + index
+                    pending.remove(name)
+            carry = buffer[len(buffer) - overlap:]
+            position += len(chunk)
+        # scan backward from the end
+        pending = [name for name in names if _fragments[name][2]]
+        position, carry = size, b""
+        while pending and position > 0:
+            start = max(position - chunk_size, 0)
+            f.seek(start)
+            buffer = f.read(position - start) + carry
+            for name in list(pending):
+                index = buffer.rfind(_fragments[name][0])
+                if index != -1:
+                    offsets[name] = start + index
+                    pending.remove(name)
+            carry = buffer[:overlap]
+            position = start
+        fragments = {}
+        for name, offset in offsets.items():
+            text = _read_fragment(f, offset, _fragments[name][1], chunk_size)
+            if text is not None:
+                fragments[name] = ET.fromstring(text)
+    return fragments
+
+
+def _read_fragment(f: BinaryIO, offset: int, end: bytes,
+                   chunk_size: int) -> Optional[bytes]:
+    # read from `offset` through the first occurrence of `end`
+    f.seek(offset)
+    buffer = b""
+    while True:
+        chunk = f.read(chunk_size)
+        searched = max(len(buffer) - len(end) + 1, 0)
+        buffer += chunk
+        index = buffer.find(end, searched)
+        if index != -1:
+            return buffer[:index + len(end)]
+        if len(chunk) == 0:
+            return None
+
+
+def _query_fermi_energy(fragment: Element) -> float:
+    return float(fragment.text or "")
+
+
+def _query_final_energy(fragment: Element) -> Dict[str, float]:
+    return {i.get("name", ""): float(i.text or "") for i in fragment.iter("i")}
+
+
+def _query_final_lattice(fragment: Element) -> np.ndarray:
+    basis = fragment.find("crystal/varray[@name='basis']")
+    if basis is None:
+        err = _bad_xml_err.format("basis")
+        raise ValueError(err)
+    return _decode_rows(basis, (len(basis),), "v")
+
+
+def _query_final_positions(fragment: Element) -> np.ndarray:
+    positions = fragment.find("varray[@name='positions']")
+    if positions is None:
+        err = _bad_xml_err.format("positions")
+        raise ValueError(err)
+    return _decode_rows(positions, (len(positions),), "v")
+
+
+def _query_symbols(fragment: Element) -> List[str]:
+    atoms = fragment.find("array[@name='atoms']/set")
+    if atoms is None:
+        err = _bad_xml_err.format("atoms")
+        raise ValueError(err)
+    return [(rc[0].text or "").strip() for rc in atoms]
+
+
+_query_parsers = {
+    "fermi_energy": _query_fermi_energy,
+    "final_energy": _query_final_energy,
+    "final_lattice": _query_final_lattice,
+    "final_positions": _query_final_positions,
+    "symbols": _query_symbols,
+}
+
+
+def _stream_sections(path: str,
+                     section_paths: List[Tuple[str, ...]],
+                     discard: Optional[_Discard] = None) -> Element:
+    """Incrementally parses an XML file retaining only the requested sections.
+
+    Notes:
+        Every element outside of a requested section is discarded as soon as
+        it has been parsed so that memory usage is bounded by the size of the
+        retained sections rather than the size of the file. The retained
+        sections are grafted onto a skeleton tree which mirrors their original
+        location. When a section occurs more than once the last occurrence is
+        kept.
+
+    Args:
+        path: Filepath to the XML file.
+        section_paths: Tag paths of the sections to retain relative to the
+        root element.
+        discard: Decides whether an element within a retained section is
+        discarded as soon as it has been parsed.
+        - Defaults to retaining every element of the sections.
+    """
+    skeleton: Optional[Element] = None
+    stack: List[Element] = []
+    tags: List[str] = []
+    retained_depth = 0  # depth of the section being retained
+    for event, elem in ET.iterparse(path, events=("start", "end")):
+        if event == "start":
+            stack.append(elem)
+            tags.append(elem.tag)
+            if len(stack) == 1:
+                skeleton = Element(elem.tag, elem.attrib)
+            elif retained_depth == 0 and tuple(tags[1:]) in section_paths:
+                retained_depth = len(stack)
+            continue
+        depth = len(stack)
+        discarded = (discard is not None and depth > retained_depth > 0
+                     and discard(tuple(tags[1:]), elem))
+        stack.pop()
+        tags.pop()
+        if depth == 1:
+            break
+        if retained_depth != 0 and depth > retained_depth:
+            if discarded:
+                stack[-1].remove(elem)
+            continue
+        # the parser may already have attached later siblings
+        stack[-1].remove(elem)
+        if depth == retained_depth:
+            retained_depth = 0
+            _graft(skeleton, stack[1:], elem)  # type: ignore
+    if skeleton is None:
+        err = "Unable to parse `{}`.".format(path)
+        raise ValueError(err)
+    return skeleton
+
+
+def _parse_pruned(path: str, discard: _Discard) -> Element:
+    """Incrementally parses an entire XML file discarding selected elements.
+
+    Notes:
+        Each discarded element is removed from its parent as soon as it has
+        been parsed so it is never held in memory alongside its siblings.
+
+    Args:
+        path: Filepath to the XML file.
+        discard: Decides whether an element is discarded.
+    """
+    root: Optional[Element] = None
+    stack: List[Element] = []
+    tags: List[str] = []
+    for event, elem in ET.iterparse(path, events=("start", "end")):
+        if event == "start":
+            stack.append(elem)
+            tags.append(elem.tag)
+            continue
+        if len(stack) > 1 and discard(tuple(tags[1:]), elem):
+            stack[-2].remove(elem)
+        stack.pop()
+        tags.pop()
+        root = elem
+    if root is None:
+        err = "Unable to parse `{}`.".format(path)
+        raise ValueError(err)
+    return root
+
+
+def _discard_ions(ions: List[int]) -> _Discard:
+    # the sets of the partial density of states are labelled "ion 1", ...
+    comments = set("ion {}".format(i + 1) for i in ions)
+
+    def discard(tags: Tuple[str, ...], elem: Element) -> bool:
+        return tags == _ion_set_path and elem.get("comment") not in comments
+
+    return discard
+
+
+def _iter_calculations(path: str, keep: Set[str]) -> Iterator[Element]:
+    """Incrementally parses an XML file yielding each `<calculation>` block.
+
+    Notes:
+        Each block is discarded once the caller advances the iterator and
+        children of the block which are not listed in `keep` are discarded as
+        soon as they are parsed.
+
+    Args:
+        path: Filepath to the XML file.
+        keep: Tags of the children of each block to retain.
+    """
+    stack: List[Element] = []
+    for event, elem in ET.iterparse(path, events=("start", "end")):
+        if event == "start":
+            stack.append(elem)
+            continue
+        depth = len(stack)
+        stack.pop()
+        if depth == 1:
+            break
+        if depth == 2:
+            if elem.tag == "calculation":
+                yield elem
+            stack[-1].remove(elem)
+        elif depth == 3 and stack[-1].tag == "calculation":
+            if elem.tag not in keep:
+                stack[-1].remove(elem)
+
+
+def _decode_rows(elem: Element,
+                 shape: Tuple[int, ...],
+                 row_tag: str = "r") -> np.ndarray:
+    """Decodes every row below an element with one numeric conversion.
+
+    Args:
+        elem: Element containing the rows.
+        shape: Leading dimensions of the result.
+        - The trailing dimension is the number of columns in each row.
+        row_tag: Tag of the row elements.
+    """
+    text = " ".join([r.text or "" for r in elem.iter(row_tag)])
+    values = np.fromstring(text, sep=" ")
+    n_rows = int(np.prod(shape))
+    if n_rows == 0 or values.size % n_rows != 0:
+        err = _bad_xml_err.format(elem.tag)
+        raise ValueError(err)
+    return values.reshape(shape + (values.size // n_rows,))
+
+
+def _decode_varray(calculation: Element, name: str) -> np.ndarray:
+    """Decodes a named `<varray>` of a `<calculation>` block."""
+    varray = calculation.find(_varray_paths[name])
+    if varray is None:
+        err = _bad_xml_err.format(name)
+        raise ValueError(err)
+    return _decode_rows(varray, (len(varray),), "v")
+
+
+def _graft(skeleton: Element, ancestors: List[Element], elem: Element) -> None:
+    # attach `elem` to the skeleton at the location of its ancestors
+    parent = skeleton
+    for ancestor in ancestors:
+        child = parent.find(ancestor.tag)
+        if child is None:
+            child = ET.SubElement(parent, ancestor.tag, ancestor.attrib)
+        parent = child
+    for existing in parent.findall(elem.tag):
+        if existing.attrib == elem.attrib:
+            parent.remove(existing)
+    parent.append(elem)
+
 
 class VasprunFile(XmlFile):
     """File wrapper for a VASP vasprun.xml file.
@@ -13,30 +410,123 @@ class VasprunFile(XmlFile):
         others because the information available for parsing varies depending on
         the type of calculation. 
 
+        Large files can be streamed by specifying `sections`. Only the parts
+        of the file needed by those properties are kept in memory and all
+        other properties become unavailable.
+
+        The ionic trajectory (energies, forces, lattice, positions and stress)
+        is decoded by a single streaming pass over the `<calculation>` blocks
+        the first time any of those properties is accessed and does not
+        require `load`. Only the steps selected by `steps` are decoded.
+
+        Only the ions in `ions` are kept in the partial density of states.
+        The sets of every other ion are discarded by `load` as soon as they
+        have been parsed unless `cache` is set. Every orbital of the kept ions
+        is decoded with a single numeric conversion and the orbitals in
+        `orbitals` are selected afterwards. When `cache` is set the full partial density of states is
+        saved next to the file in NumPy's binary format the first time it is
+        decoded and is memory mapped on subsequent reads. A cache older than
+        the file is discarded.
+
     Args:
         filepath: Filepath to a vasprun.xml file.
+        sections: Names of the properties to extract while streaming.
+        - Defaults to parsing the entire file.
+        steps: Ionic steps to decode into the trajectory properties.
+        - Defaults to every step.
+        ions: Indices of the ions to decode into the partial density of states.
+        - Defaults to every ion.
+        orbitals: Indices of the orbitals to decode into the partial density of
+                  states.
+        - Defaults to every orbital.
+        cache: Whether or not to cache the partial density of states.
 
     Attributes:
         filepath: Filepath to a vasprun.xml file.
+        sections: Names of the properties to extract while streaming.
+        steps: Ionic steps to decode into the trajectory properties.
+        ions: Indices of the ions to decode into the partial density of states.
+        orbitals: Indices of the orbitals to decode into the partial density of
+                  states.
+        cache: Whether or not to cache the partial density of states.
+        cache_path: Filepath to the partial density of states cache.
         density_of_states: Total density of states.
         eigenvalues: Projected or actual eigenvalues. 
         eigenvectors: Electron eigenvectors projected onto atomic orbitals.
+        energies: Each energy reported at the end of each ionic step.
         fermi_energy: The calculated Fermi Energy.
+        forces: Force on each atom at each ionic step.
+        - Shape: (n_steps, n_atoms, 3)
+        partial_density_of_states: Site and orbital projected density of states.
+        - Shape: (n_ions, n_spins, n_energies, n_orbitals)
+        - The energies are the first column of `density_of_states`.
+        lattice: Lattice vectors as rows of a matrix at each ionic step.
+        - Shape: (n_steps, 3, 3)
+        positions: Fractional position of each atom at each ionic step.
+        - Shape: (n_steps, n_atoms, 3)
+        stress: Stress tensor at each ionic step.
+        - Shape: (n_steps, 3, 3)
     """
 
-    def __init__(self, filepath: Optional[str] = None) -> None:
+    def __init__(self,
+                 filepath: Optional[str] = None,
+                 sections: Optional[List[str]] = None,
+                 steps: Optional[slice] = None,
+                 ions: Optional[List[int]] = None,
+                 orbitals: Optional[List[int]] = None,
+                 cache: bool = False) -> None:
         if filepath is None:
             filepath = "vasprun.xml"
+        if sections is not None:
+            for section in sections:
+                if section not in _section_paths:
+                    err = "Unknown section `{}`.".format(section)
+                    raise ValueError(err)
+        self.sections = sections
+        if steps is None:
+            steps = slice(None)
+        for index in [steps.start, steps.stop, steps.step]:
+            if index is not None and index < 0:
+                err = "`steps` must not contain negative values."
+                raise ValueError(err)
+        self.steps = steps
+        self.ions = ions
+        self.orbitals = orbitals
+        self.cache = cache
         self._density_of_states: Optional[np.ndarray] = None
         self._eigenvalues: Optional[np.ndarray] = None
         self._eigenvectors: Optional[np.ndarray] = None
+        self._energies: Optional[Dict[str, np.ndarray]] = None
         self._fermi_energy: Optional[float] = None
+        self._forces: Optional[np.ndarray] = None
+        self._lattice: Optional[np.ndarray] = None
+        self._partial_density_of_states: Optional[np.ndarray] = None
+        self._positions: Optional[np.ndarray] = None
+        self._stress: Optional[np.ndarray] = None
         super().__init__(filepath)
 
+    def load(self, path: Optional[str] = None) -> None:
+        if path is None:
+            path = self.filepath
+        # the cache holds every ion so the ions are only selected without it
+        discard = None
+        if self.ions is not None and not self.cache:
+            discard = _discard_ions(self.ions)
+        if self.sections is None:
+            if discard is None:
+                super().load(path)
+            else:
+                self._root = _parse_pruned(path, discard)
+            return
+        section_paths = []
+        for section in self.sections:
+            section_paths += _section_paths[section]
+        self._root = _stream_sections(path, section_paths, discard)
+
     @property
     def density_of_states(self) -> np.ndarray:
         if self._density_of_states is None:
-            dos_input = self.root.find("calculation")
+            dos_input = self._final_calculation()
             if dos_input is None:
                 err = _bad_xml_err.format("calculation")
                 raise ValueError(err)
@@ -49,35 +539,21 @@ class VasprunFile(XmlFile):
                 err = _bad_xml_err.format("total")
                 raise ValueError(err)
             dos_input = dos_input[0][-1][-1]
-            dos = np.zeros((len(dos_input), 3))
-            for i, row in enumerate(dos_input):
-                text = row.text
-                if text is None:
-                    err = _bad_xml_err.format("total")
-                    raise ValueError(err)
-                dos[i, 0] = float(text.split()[0])  # energy
-                dos[i, 1] = float(text.split()[1])
-                dos[i, 2] = float(text.split()[2])
+            dos = _decode_rows(dos_input, (len(dos_input),))
             self._density_of_states = dos
         return self._density_of_states
 
     @property
     def eigenvalues(self) -> np.ndarray:
         if self._eigenvalues is None:
-            data = self.root.find("calculation")
+            data = self._final_calculation()
             if data is None:
                 err = _bad_xml_err.format("calculation")
                 raise ValueError(err)
-            is_projected = True
-            try:
-                _ = data.find("projected")
-            except AttributeError:
-                is_projected = False
-            if is_projected:
-                data = data.find("projected")
-                if data is None:
-                    err = _bad_xml_err.format("projected")
-                    raise ValueError(err)
+            # prefer the eigenvalues reported alongside the projections
+            projected = data.find("projected")
+            if projected is not None:
+                data = projected
             data = data.find("eigenvalues")
             if data is None:
                 err = _bad_xml_err.format("eigenvalues")
@@ -90,23 +566,14 @@ class VasprunFile(XmlFile):
             n_spins = len(data)
             n_kpoints = len(data[0])
             n_bands = len(data[0][0])
-            eigenvalues = np.zeros((n_spins, n_kpoints, n_bands, 2))
-            for i in range(n_spins):
-                for j in range(n_kpoints):
-                    for k in range(n_bands):
-                        for l in range(2):
-                            text = data[i][j][k].text
-                            if text is None:
-                                err = _bad_xml_err.format("array")
-                                raise ValueError(err)
-                            eigenvalues[i, j, k, l] = float(text.split()[l])
+            eigenvalues = _decode_rows(data, (n_spins, n_kpoints, n_bands))
             self._eigenvalues = eigenvalues
         return self._eigenvalues
 
     @property
     def eigenvectors(self) -> np.ndarray:
         if self._eigenvectors is None:
-            projection = self.root.find("calculation")
+            projection = self._final_calculation()
             if projection is None:
                 err = _bad_xml_err.format("calculation")
                 raise ValueError(err)
@@ -123,31 +590,15 @@ class VasprunFile(XmlFile):
             n_kpoints = len(projection[0])
             n_bands = len(projection[0][0])
             n_ions = len(projection[0][0][0])
-            text = projection[0][0][0][0].text
-            if text is None:
-                err = _bad_xml_err.format("array")
-                raise ValueError(err)
-            n_orbitals = len(text.split())
-            eigenvectors = np.zeros(
-                (n_spins, n_kpoints, n_bands, n_ions, n_orbitals))
-            for i in range(n_spins):
-                for j in range(n_kpoints):
-                    for k in range(n_bands):
-                        for l in range(n_ions):
-                            for m in range(n_orbitals):
-                                text = projection[i][j][k][l].text
-                                if text is None:
-                                    err = _bad_xml_err.format("array")
-                                    raise ValueError(err)
-                                eigenvectors[i, j, k, l, m] = float(
-                                    text.split()[m])
+            eigenvectors = _decode_rows(projection,
+                                        (n_spins, n_kpoints, n_bands, n_ions))
             self._eigenvectors = eigenvectors
         return self._eigenvectors
 
     @property
     def fermi_energy(self) -> float:
         if self._fermi_energy is None:
-            fermi = self.root.find("calculation")
+            fermi = self._final_calculation()
             if fermi is None:
                 err = _bad_xml_err.format("calculation")
                 raise ValueError(err)
@@ -165,3 +616,131 @@ class VasprunFile(XmlFile):
                 raise ValueError(err)
             self._fermi_energy = float(text)
         return self._fermi_energy
+
+    @property
+    def cache_path(self) -> str:
+        return "{}.pdos.npy".format(self.filepath)
+
+    @property
+    def partial_density_of_states(self) -> np.ndarray:
+        if self._partial_density_of_states is None:
+            if self.cache:
+                pdos = self._read_partial_cache()
+            else:
+                pdos = self._decode_partial(self.ions, self.orbitals)
+            self._partial_density_of_states = pdos
+        return self._partial_density_of_states
+
+    @property
+    def energies(self) -> Dict[str, np.ndarray]:
+        if self._energies is None:
+            self._read_trajectory()
+        return self._energies  # type: ignore
+
+    @property
+    def forces(self) -> np.ndarray:
+        if self._forces is None:
+            self._read_trajectory()
+        return self._forces  # type: ignore
+
+    @property
+    def lattice(self) -> np.ndarray:
+        if self._lattice is None:
+            self._read_trajectory()
+        return self._lattice  # type: ignore
+
+    @property
+    def positions(self) -> np.ndarray:
+        if self._positions is None:
+            self._read_trajectory()
+        return self._positions  # type: ignore
+
+    @property
+    def stress(self) -> np.ndarray:
+        if self._stress is None:
+            self._read_trajectory()
+        return self._stress  # type: ignore
+
+    def _read_trajectory(self) -> None:
+        start, stop, step = self.steps.start, self.steps.stop, self.steps.step
+        if start is None:
+            start = 0
+        if step is None:
+            step = 1
+        energies: Dict[str, List[float]] = {}
+        forces, lattice, positions, stress = [], [], [], []
+        keep = {"energy", "structure", "varray"}
+        for i, calculation in enumerate(
+                _iter_calculations(self.filepath, keep)):
+            if stop is not None and i >= stop:
+                break
+            if i < start or (i - start) % step != 0:
+                continue
+            forces.append(_decode_varray(calculation, "forces"))
+            stress.append(_decode_varray(calculation, "stress"))
+            lattice.append(_decode_varray(calculation, "basis"))
+            positions.append(_decode_varray(calculation, "positions"))
+            for energy in calculation.findall("energy/i"):
+                name = energy.get("name", "")
+                energies.setdefault(name, []).append(float(energy.text or ""))
+        if len(positions) == 0:
+            err = _bad_xml_err.format("calculation")
+            raise ValueError(err)
+        self._energies = {k: np.array(v) for k, v in energies.items()}
+        self._forces = np.stack(forces)
+        self._lattice = np.stack(lattice)
+        self._positions = np.stack(positions)
+        self._stress = np.stack(stress)
+
+    def _decode_partial(self, ions: Optional[List[int]],
+                        orbitals: Optional[List[int]]) -> np.ndarray:
+        partial = self._final_calculation()
+        if partial is None:
+            err = _bad_xml_err.format("calculation")
+            raise ValueError(err)
+        partial = partial.find("dos/partial/array")
+        if partial is None:
+            err = _bad_xml_err.format("partial")
+            raise ValueError(err)
+        partial = partial.find("set")
+        if partial is None or len(partial) == 0:
+            err = _bad_xml_err.format("set")
+            raise ValueError(err)
+        if ions is None:
+            sets = list(partial)
+        else:
+            # unselected ions may already have been discarded while parsing
+            labelled = {s.get("comment"): s for s in partial}
+            sets = [labelled.get("ion {}".format(i + 1)) for i in ions]
+            if any(s is None for s in sets):
+                err = _bad_xml_err.format("set")
+                raise ValueError(err)
+        # join only the selected ions so that a single conversion is needed
+        selection = Element("set")
+        selection.extend(sets)
+        n_spins = len(sets[0])
+        n_energies = len(sets[0][0])
+        pdos = _decode_rows(selection, (len(sets), n_spins, n_energies))
+        pdos = pdos[..., 1:]  # the first column is the energy
+        if orbitals is not None:
+            pdos = pdos[..., orbitals]
+        return pdos
+
+    def _read_partial_cache(self) -> np.ndarray:
+        path = self.cache_path
+        if (not os.path.exists(path)
+                or os.path.getmtime(path) < os.path.getmtime(self.filepath)):
+            np.save(path, self._decode_partial(None, None))
+        pdos = np.load(path, mmap_mode="r")
+        if self.ions is not None:
+            pdos = pdos[self.ions]
+        if self.orbitals is not None:
+            pdos = pdos[..., self.orbitals]
+        return pdos
+
+    def _final_calculation(self) -> Optional[Element]:
+        # sections such as the DOS are only written in the final ionic step
+        calculations = self.root.findall("calculation")
+        if len(calculations) == 0:
+            return None
+        return calculations[-1]
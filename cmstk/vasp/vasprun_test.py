@@ -1,6 +1,9 @@
+from cmstk.cache import ResultCache, set_result_cache
 from cmstk.util import data_directory
-from cmstk.vasp.vasprun import VasprunFile
+from cmstk.vasp.vasprun import QUERY_FIELDS, VasprunFile, query_vasprun
+import numpy as np
 import os
+import pytest
 
 
 def test_vasprun_file():
@@ -16,3 +19,276 @@ def test_vasprun_file():
         assert eigenvectors.shape == (1, 286, 16, 1, 9)
         fermi_energy = vasprun.fermi_energy
         assert fermi_energy == 9.09133775
+
+
+_n_spins = 2
+_n_kpoints = 3
+_n_bands = 4
+_n_ions = 2
+_n_orbitals = 9
+_n_energies = 5
+_n_steps = 3
+
+
+def _rows(tag, values):
+    return "".join("<{0}> {1} </{0}>\n".format(tag, " ".join(map(str, row)))
+                   for row in values)
+
+
+def _eigenvalues_xml():
+    xml = "<eigenvalues>\n<array>\n<field>eigene</field><field>occ</field>\n"
+    xml += "<set>\n"
+    for s in range(_n_spins):
+        xml += '<set comment="spin {}">\n'.format(s + 1)
+        for k in range(_n_kpoints):
+            xml += '<set comment="kpoint {}">\n'.format(k + 1)
+            xml += _rows("r", [[s * 100 + k * 10 + b, 0.5]
+                               for b in range(_n_bands)])
+            xml += "</set>\n"
+        xml += "</set>\n"
+    return xml + "</set>\n</array>\n</eigenvalues>\n"
+
+
+def _projected_xml():
+    xml = "<projected>\n" + _eigenvalues_xml() + "<array>\n<set>\n"
+    for s in range(_n_spins):
+        xml += '<set comment="spin{}">\n'.format(s + 1)
+        for k in range(_n_kpoints):
+            xml += '<set comment="kpoint {}">\n'.format(k + 1)
+            for b in range(_n_bands):
+                xml += '<set comment="band {}">\n'.format(b + 1)
+                xml += _rows("r", [[
+                    s * 1000 + k * 100 + b * 10 + i + o / 100
+                    for o in range(_n_orbitals)
+                ] for i in range(_n_ions)])
+                xml += "</set>\n"
+            xml += "</set>\n"
+        xml += "</set>\n"
+    return xml + "</set>\n</array>\n</projected>\n"
+
+
+def _dos_xml():
+    xml = '<dos>\n<i name="efermi">      5.00000000 </i>\n<total>\n<array>\n'
+    xml += "<field>energy</field><field>total</field><field>integrated</field>"
+    xml += "\n<set>\n"
+    for s in range(_n_spins):
+        xml += '<set comment="spin {}">\n'.format(s + 1)
+        xml += _rows("r", [[e, e * 2 + s, e * 3 + s]
+                           for e in range(_n_energies)])
+        xml += "</set>\n"
+    xml += "</set>\n</array>\n</total>\n<partial>\n<array>\n<set>\n"
+    for i in range(_n_ions):
+        xml += '<set comment="ion {}">\n'.format(i + 1)
+        for s in range(_n_spins):
+            xml += '<set comment="spin {}">\n'.format(s + 1)
+            xml += _rows("r", [[e] + [i * 100 + s * 10 + o + e / 10
+                                      for o in range(_n_orbitals)]
+                               for e in range(_n_energies)])
+            xml += "</set>\n"
+        xml += "</set>\n"
+    return xml + "</set>\n</array>\n</partial>\n</dos>\n"
+
+
+def _structure_xml(step, name=None):
+    if name is None:
+        xml = "<structure>\n"
+    else:
+        xml = '<structure name="{}">\n'.format(name)
+    xml += '<crystal>\n<varray name="basis">\n'
+    xml += _rows("v", np.identity(3) * (3.0 + step / 10))
+    xml += '</varray>\n<i name="volume">  27.0 </i>\n</crystal>\n'
+    xml += '<varray name="positions">\n'
+    xml += _rows("v", [[0.0, 0.0, 0.0], [0.5, 0.5, 0.5 + step / 100]])
+    return xml + "</varray>\n</structure>\n"
+
+
+def _calculation_xml(step):
+    xml = "<calculation>\n<scstep>\n<energy>\n"
+    xml += '<i name="e_fr_energy"> {} </i>\n'.format(-10.0 - step)
+    xml += "</energy>\n</scstep>\n" + _structure_xml(step)
+    xml += '<varray name="forces">\n'
+    xml += _rows("v", [[step, -step, 0.0], [-step, step, 1.0]])
+    xml += '</varray>\n<varray name="stress">\n'
+    xml += _rows("v", np.identity(3) * step)
+    xml += "</varray>\n<energy>\n"
+    xml += '<i name="e_fr_energy"> {} </i>\n'.format(-20.0 - step)
+    xml += '<i name="e_wo_entrp"> {} </i>\n'.format(-20.1 - step)
+    xml += '<i name="e_0_energy"> {} </i>\n'.format(-20.2 - step)
+    xml += "</energy>\n"
+    if step == _n_steps - 1:
+        xml += _eigenvalues_xml() + _dos_xml() + _projected_xml()
+    return xml + "</calculation>\n"
+
+
+def _write_vasprun(path):
+    xml = '<?xml version="1.0" encoding="ISO-8859-1"?>\n<modeling>\n'
+    xml += '<generator>\n<i name="program" type="string">vasp </i>\n'
+    xml += "</generator>\n<atominfo>\n<atoms> 2 </atoms>\n"
+    xml += '<array name="atoms">\n<set>\n'
+    xml += "<rc><c>Si</c><c>   1</c></rc>\n<rc><c>Ge</c><c>   2</c></rc>\n"
+    xml += "</set>\n</array>\n</atominfo>\n" + _structure_xml(0, "initialpos")
+    for step in range(_n_steps):
+        xml += _calculation_xml(step)
+    xml += _structure_xml(_n_steps - 1, "finalpos") + "</modeling>\n"
+    with open(path, "w") as f:
+        f.write(xml)
+
+
+def test_vasprun_file_eigenvectors():
+    """Tests bulk decoding of eigenvalues and projections."""
+    path = "test_vasprun.xml"
+    _write_vasprun(path)
+    vasprun = VasprunFile(path)
+    with vasprun:
+        eigenvalues = vasprun.eigenvalues
+        assert eigenvalues.shape == (_n_spins, _n_kpoints, _n_bands, 2)
+        assert eigenvalues[1, 2, 3, 0] == 123
+        assert np.all(eigenvalues[..., 1] == 0.5)
+        eigenvectors = vasprun.eigenvectors
+        assert eigenvectors.shape == (_n_spins, _n_kpoints, _n_bands,
+                                      _n_ions, _n_orbitals)
+        assert eigenvectors[1, 2, 3, 1, 4] == pytest.approx(1231.04)
+        assert eigenvectors[0, 1, 0, 0, 8] == pytest.approx(100.08)
+    os.remove(path)
+
+
+def test_vasprun_file_streaming():
+    """Tests streaming only the requested sections of a vasprun.xml file."""
+    path = "test_vasprun.xml"
+    _write_vasprun(path)
+    full = VasprunFile(path)
+    full.load()
+    streamed = VasprunFile(
+        path, sections=["density_of_states", "eigenvectors", "fermi_energy"])
+    with streamed:
+        assert np.array_equal(streamed.density_of_states,
+                              full.density_of_states)
+        assert np.array_equal(streamed.eigenvectors, full.eigenvectors)
+        assert streamed.fermi_energy == full.fermi_energy
+        # unrequested sections are discarded while parsing
+        assert len(streamed.root.findall("calculation")) == 1
+        assert streamed.root.find("calculation/varray") is None
+        assert streamed.root.find("calculation/projected/eigenvalues") is None
+        assert streamed.root.find("calculation/dos/partial") is None
+    streamed = VasprunFile(path, sections=["fermi_energy", "eigenvalues"])
+    with streamed:
+        assert streamed.fermi_energy == 5.0
+        assert np.array_equal(streamed.eigenvalues, full.eigenvalues)
+        assert streamed.root.find("calculation/dos/total") is None
+    os.remove(path)
+    with pytest.raises(ValueError):
+        VasprunFile(path, sections=["bogus"])
+
+
+def test_vasprun_file_trajectory():
+    """Tests decoding the ionic trajectory of a vasprun.xml file."""
+    path = "test_vasprun.xml"
+    _write_vasprun(path)
+    vasprun = VasprunFile(path)
+    assert vasprun.positions.shape == (_n_steps, _n_ions, 3)
+    assert vasprun.positions[2, 1, 2] == pytest.approx(0.52)
+    assert vasprun.forces.shape == (_n_steps, _n_ions, 3)
+    assert np.array_equal(vasprun.forces[1], [[1, -1, 0], [-1, 1, 1]])
+    assert vasprun.lattice.shape == (_n_steps, 3, 3)
+    assert vasprun.lattice[1, 0, 0] == pytest.approx(3.1)
+    assert np.array_equal(vasprun.stress[2], np.identity(3) * 2)
+    assert np.allclose(vasprun.energies["e_0_energy"], [-20.2, -21.2, -22.2])
+    assert sorted(vasprun.energies) == [
+        "e_0_energy", "e_fr_energy", "e_wo_entrp"
+    ]
+    sliced = VasprunFile(path, steps=slice(1, None, 1))
+    assert sliced.forces.shape == (_n_steps - 1, _n_ions, 3)
+    assert np.array_equal(sliced.forces, vasprun.forces[1:])
+    assert np.array_equal(sliced.energies["e_fr_energy"],
+                          vasprun.energies["e_fr_energy"][1:])
+    sliced = VasprunFile(path, steps=slice(0, 3, 2))
+    assert np.array_equal(sliced.positions, vasprun.positions[::2])
+    os.remove(path)
+    with pytest.raises(ValueError):
+        VasprunFile(path, steps=slice(-1, None))
+
+
+def test_vasprun_file_partial_density_of_states():
+    """Tests decoding and caching the partial density of states."""
+    path = "test_vasprun.xml"
+    _write_vasprun(path)
+    vasprun = VasprunFile(path)
+    with vasprun:
+        assert vasprun.density_of_states.shape == (_n_energies, 3)
+        assert vasprun.density_of_states[4, 1] == 9
+        pdos = vasprun.partial_density_of_states
+        assert pdos.shape == (_n_ions, _n_spins, _n_energies, _n_orbitals)
+        assert pdos[1, 0, 3, 2] == pytest.approx(102.3)
+    selected = VasprunFile(path, ions=[1], orbitals=[0, 4])
+    with selected:
+        assert np.array_equal(selected.partial_density_of_states,
+                              pdos[[1]][..., [0, 4]])
+        # the unselected ions are discarded while parsing
+        sets = selected.root.findall("calculation/dos/partial/array/set/set")
+        assert [s.get("comment") for s in sets] == ["ion 2"]
+        assert selected.root.find("calculation/dos/total") is not None
+    streamed = VasprunFile(path,
+                           sections=["partial_density_of_states"],
+                           ions=[1, 0])
+    with streamed:
+        assert np.array_equal(streamed.partial_density_of_states,
+                              pdos[[1, 0]])
+        sets = streamed.root.findall("calculation/dos/partial/array/set/set")
+        assert len(sets) == _n_ions
+    streamed = VasprunFile(path,
+                           sections=["partial_density_of_states"],
+                           ions=[0])
+    with streamed:
+        assert np.array_equal(streamed.partial_density_of_states, pdos[[0]])
+        sets = streamed.root.findall("calculation/dos/partial/array/set/set")
+        assert [s.get("comment") for s in sets] == ["ion 1"]
+    cached = VasprunFile(path, ions=[1], orbitals=[0, 4], cache=True)
+    with cached:
+        assert np.array_equal(cached.partial_density_of_states,
+                              pdos[[1]][..., [0, 4]])
+    assert os.path.exists(cached.cache_path)
+    # the cache is read without parsing the xml file
+    cached = VasprunFile(path, cache=True)
+    assert np.array_equal(cached.partial_density_of_states, pdos)
+    os.remove(cached.cache_path)
+    os.remove(path)
+
+
+def test_query_vasprun():
+    """Tests extracting individual fields from a vasprun.xml file."""
+    path = "test_vasprun.xml"
+    _write_vasprun(path)
+    vasprun = VasprunFile(path)
+    # a small chunk size forces markers to straddle chunk boundaries
+    for chunk_size in [37, 1048576]:
+        results = query_vasprun(path, QUERY_FIELDS, chunk_size)
+        assert results["fermi_energy"] == 5.0
+        assert results["final_energy"]["e_0_energy"] == pytest.approx(-22.2)
+        assert np.array_equal(results["final_lattice"], vasprun.lattice[-1])
+        assert np.array_equal(results["final_positions"],
+                              vasprun.positions[-1])
+        assert results["symbols"] == ["Si", "Ge"]
+    assert list(query_vasprun(path, ["fermi_energy"])) == ["fermi_energy"]
+    # the order of the fields shares a single cached result
+    db_path = "test_vasprun_cache.sqlite"
+    cache = ResultCache(db_path)
+    set_result_cache(cache)
+    try:
+        first = query_vasprun(path, ["symbols", "fermi_energy"])
+        size = cache.size
+        second = query_vasprun(path, ["fermi_energy", "symbols", "symbols"])
+        assert cache.size == size
+        assert first == second
+        assert second["symbols"] == ["Si", "Ge"]
+    finally:
+        set_result_cache(None)
+    for suffix in ["", "-wal", "-shm"]:
+        if os.path.exists(db_path + suffix):
+            os.remove(db_path + suffix)
+    with pytest.raises(ValueError):
+        query_vasprun(path, ["bogus"])
+    with open(path, "w") as f:
+        f.write("<modeling>\n</modeling>\n")
+    with pytest.raises(ValueError):
+        query_vasprun(path, ["final_energy"])
+    os.remove(path)
@@ -0,0 +1,272 @@
+from cmstk.filetypes import BaseFile
+import mmap
+import numpy as np
+import os
+from typing import Iterator, List, Optional
+
+_marker = b"configuration="
+
+
+class XdatcarFile(BaseFile):
+    """File wrapper for a VASP XDATCAR file.
+
+    Notes:
+        This is a read-only file wrapper.
+
+        The file is never read into memory at once. `load` parses the header
+        and scans the memory mapped file once for the start and end of each
+        frame's coordinate block. Any frame can then be read in constant time
+        and a range of frames is converted to an array with a single numeric
+        conversion.
+
+        The frame index is persisted alongside the file at `index_path` and
+        is reused by subsequent loads as long as the size and modification
+        time of the file are unchanged.
+
+        Variable cell files (those which repeat the header before every
+        frame) are supported and the lattice of each frame is recorded in the
+        index.
+
+    Args:
+        filepath: Filepath to an XDATCAR file.
+        persist_index: Whether or not to write the frame index to disk.
+
+    Attributes:
+        filepath: Filepath to an XDATCAR file.
+        persist_index: Whether or not to write the frame index to disk.
+        comment: Comment line at the top of the file.
+        index_path: Filepath of the persisted frame index.
+        lattices: Lattice vectors (including the scaling factor) as rows of a
+                  matrix for each frame.
+        - Shape: (n_frames, 3, 3)
+        n_atoms: Number of atoms in each frame.
+        n_atoms_per_symbol: Number of atoms of each species.
+        n_frames: Number of frames in the file.
+        species: IUPAC chemical symbol of each species.
+        - Empty if the file does not include the species line.
+        variable_cell: Whether or not the lattice changes between frames.
+    """
+
+    def __init__(self,
+                 filepath: Optional[str] = None,
+                 persist_index: bool = True) -> None:
+        if filepath is None:
+            filepath = "XDATCAR"
+        self.persist_index = persist_index
+        self._comment: Optional[str] = None
+        self._ends: Optional[np.ndarray] = None
+        self._lattices: Optional[np.ndarray] = None
+        self._n_atoms_per_symbol: Optional[List[int]] = None
+        self._species: Optional[List[str]] = None
+        self._starts: Optional[np.ndarray] = None
+        self._variable_cell: Optional[bool] = None
+        super().__init__(filepath)
+
+    def load(self, path: Optional[str] = None) -> None:
+        if path is None:
+            path = self.filepath
+        with open(path, "rb") as f:
+            header = [f.readline().decode().strip() for _ in range(7)]
+        self._comment = header[0]
+        if header[5].split()[0].isdigit():
+            self._species = []
+            counts = header[5]
+        else:
+            self._species = header[5].split()
+            counts = header[6]
+        self._n_atoms_per_symbol = [int(n) for n in counts.split()]
+        stat = os.stat(path)
+        key = np.array([stat.st_size, stat.st_mtime_ns], dtype=np.int64)
+        index_path = "{}.index.npz".format(path)
+        if os.path.exists(index_path):
+            with np.load(index_path) as index:
+                if np.array_equal(index["key"], key):
+                    self._starts = index["starts"]
+                    self._ends = index["ends"]
+                    self._lattices = index["lattices"]
+                    self._variable_cell = bool(index["variable_cell"])
+                    return
+        self._build_index(path)
+        if self.persist_index:
+            np.savez(index_path,
+                     key=key,
+                     starts=self._starts,
+                     ends=self._ends,
+                     lattices=self._lattices,
+                     variable_cell=self._variable_cell)
+
+    def read_frame(self, index: int) -> np.ndarray:
+        """Returns the positions of a single frame.
+
+        Args:
+            index: Index of the frame.
+            - Negative indices count back from the last frame.
+
+        Raises:
+            IndexError
+            - Frame index out of range.
+        """
+        n_frames = self.n_frames
+        if index < 0:
+            index += n_frames
+        if index < 0 or index >= n_frames:
+            err = "Frame index {} out of range.".format(index)
+            raise IndexError(err)
+        return self.read_frames(index, index + 1)[0]
+
+    def read_frames(self,
+                    start: Optional[int] = None,
+                    stop: Optional[int] = None,
+                    step: int = 1) -> np.ndarray:
+        """Returns the positions of a range of frames.
+
+        Notes:
+            The range follows the rules of a slice of the frames so a
+            negative `step` returns the frames in reverse order.
+
+        Args:
+            start: Index of the first frame.
+            - Defaults to the first frame of the range in `step` order.
+            stop: Index following the last frame.
+            - Defaults to the end of the range in `step` order.
+            step: Stride between frames.
+
+        Returns:
+            Fractional position of each atom in each frame.
+            - Shape: (n_frames, n_atoms, 3)
+
+        Raises:
+            ValueError
+            - A coordinate block is incomplete or malformed.
+        """
+        indices = np.arange(*slice(start, stop, step).indices(self.n_frames))
+        return self._decode_frames(indices)
+
+    def iter_frames(self,
+                    start: Optional[int] = None,
+                    stop: Optional[int] = None,
+                    step: int = 1,
+                    chunk_size: int = 64) -> Iterator[np.ndarray]:
+        """Yields the positions of each frame in a range.
+
+        Notes:
+            Frames are decoded `chunk_size` at a time so that memory usage is
+            independent of the length of the trajectory. The range follows
+            the rules of `read_frames`.
+
+        Args:
+            start: Index of the first frame.
+            - Defaults to the first frame of the range in `step` order.
+            stop: Index following the last frame.
+            - Defaults to the end of the range in `step` order.
+            step: Stride between frames.
+            chunk_size: Number of frames decoded at a time.
+        """
+        indices = np.arange(*slice(start, stop, step).indices(self.n_frames))
+        for i in range(0, len(indices), chunk_size):
+            frames = self._decode_frames(indices[i:i + chunk_size])
+            for frame in frames:
+                yield frame
+
+    def _decode_frames(self, indices: np.ndarray) -> np.ndarray:
+        # decode the coordinate blocks of the indexed frames in their order
+        starts = self._starts[indices]  # type: ignore
+        ends = self._ends[indices]  # type: ignore
+        with open(self.filepath, "rb") as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                text = b" ".join(mm[s:e] for s, e in zip(starts, ends))
+        values = np.fromstring(text.decode(), sep=" ")
+        if values.size != len(indices) * self.n_atoms * 3:
+            err = "Unable to parse the frames of `{}`.".format(self.filepath)
+            raise ValueError(err)
+        return values.reshape((len(indices), self.n_atoms, 3))
+
+    @property
+    def comment(self) -> str:
+        if self._comment is None:
+            raise RuntimeError("file not loaded")
+        return self._comment
+
+    @property
+    def index_path(self) -> str:
+        return "{}.index.npz".format(self.filepath)
+
+    @property
+    def lattices(self) -> np.ndarray:
+        if self._lattices is None:
+            raise RuntimeError("file not loaded")
+        return self._lattices
+
+    @property
+    def n_atoms(self) -> int:
+        return sum(self.n_atoms_per_symbol)
+
+    @property
+    def n_atoms_per_symbol(self) -> List[int]:
+        if self._n_atoms_per_symbol is None:
+            raise RuntimeError("file not loaded")
+        return self._n_atoms_per_symbol
+
+    @property
+    def n_frames(self) -> int:
+        if self._starts is None:
+            raise RuntimeError("file not loaded")
+        return len(self._starts)
+
+    @property
+    def species(self) -> List[str]:
+        if self._species is None:
+            raise RuntimeError("file not loaded")
+        return self._species
+
+    @property
+    def variable_cell(self) -> bool:
+        if self._variable_cell is None:
+            raise RuntimeError("file not loaded")
+        return self._variable_cell
+
+    def _build_index(self, path: str) -> None:
+        # the header is the comment, scaling factor, lattice and counts lines
+        n_header_lines = 6 if len(self.species) == 0 else 7
+        with open(path, "rb") as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                markers = []
+                position = mm.find(_marker)
+                while position != -1:
+                    markers.append(mm.rfind(b"\n", 0, position) + 1)
+                    position = mm.find(_marker, position + len(_marker))
+                size = len(mm)
+                starts = [mm.find(b"\n", m) + 1 for m in markers]
+                # the first frame decides whether headers are repeated
+                variable_cell = False
+                if len(markers) > 1:
+                    n_lines = mm[starts[0]:markers[1]].count(b"\n")
+                    variable_cell = n_lines != self.n_atoms
+                headers = [0]
+                ends = []
+                for marker in markers[1:]:
+                    if variable_cell:
+                        header = marker
+                        for _ in range(n_header_lines):
+                            header = mm.rfind(b"\n", 0, header - 1) + 1
+                        headers.append(header)
+                        ends.append(header)
+                    else:
+                        ends.append(marker)
+                ends.append(size)
+                lattices = [
+                    self._read_lattice(mm[h:m])
+                    for h, m in zip(headers, markers)
+                ]
+        if not variable_cell:
+            lattices = lattices * len(markers)
+        self._starts = np.array(starts, dtype=np.int64)
+        self._ends = np.array(ends, dtype=np.int64)
+        self._lattices = np.array(lattices, dtype=float).reshape((-1, 3, 3))
+        self._variable_cell = variable_cell
+
+    def _read_lattice(self, header: bytes) -> np.ndarray:
+        lines = header.decode().split("\n")
+        scaling_factor = float(lines[1])
+        lattice = np.fromstring(" ".join(lines[2:5]), sep=" ")
+        return lattice.reshape((3, 3)) * scaling_factor
@@ -0,0 +1,88 @@
+from cmstk.vasp.xdatcar import XdatcarFile
+import numpy as np
+import os
+import pytest
+
+_n_frames = 5
+
+
+def _positions(frame):
+    return np.array([[0.0, 0.0, frame / 100], [0.5, 0.5, 0.5],
+                     [0.25, 0.75, frame / 10]])
+
+
+def _header(frame, variable_cell):
+    a = 3.0 + frame / 10 if variable_cell else 3.0
+    text = "Fe Cr trajectory\n           1\n"
+    text += "     {:.6f}    0.000000    0.000000\n".format(a)
+    text += "     0.000000    {:.6f}    0.000000\n".format(a)
+    text += "     0.000000    0.000000    {:.6f}\n".format(a)
+    return text + "   Fe   Cr\n     2     1\n"
+
+
+def _write_xdatcar(path, variable_cell=False):
+    text = ""
+    for frame in range(_n_frames):
+        if frame == 0 or variable_cell:
+            text += _header(frame, variable_cell)
+        text += "Direct configuration=     {}\n".format(frame + 1)
+        text += "".join("  {:.8f}  {:.8f}  {:.8f}\n".format(*row)
+                        for row in _positions(frame))
+    with open(path, "w") as f:
+        f.write(text)
+
+
+def test_xdatcar_file():
+    """Tests indexed frame access of an XDATCAR file."""
+    path = "test.XDATCAR"
+    _write_xdatcar(path)
+    xdatcar = XdatcarFile(path)
+    with xdatcar:
+        assert xdatcar.comment == "Fe Cr trajectory"
+        assert xdatcar.species == ["Fe", "Cr"]
+        assert xdatcar.n_atoms_per_symbol == [2, 1]
+        assert xdatcar.n_frames == _n_frames
+        assert not xdatcar.variable_cell
+        assert np.allclose(xdatcar.lattices, np.identity(3) * 3.0)
+        assert np.allclose(xdatcar.read_frame(3), _positions(3))
+        assert np.allclose(xdatcar.read_frame(-1), _positions(4))
+        subset = xdatcar.read_frames(1, 4)
+        assert subset.shape == (3, 3, 3)
+        assert np.allclose(subset[2], _positions(3))
+        frames = xdatcar.read_frames()
+        strided = list(xdatcar.iter_frames(step=2, chunk_size=2))
+        assert len(strided) == 3
+        assert np.allclose(strided[2], _positions(4))
+        # reverse iteration spans chunks and defaults to the last frame
+        reverse = list(xdatcar.iter_frames(step=-1, chunk_size=2))
+        assert len(reverse) == _n_frames
+        assert np.allclose(reverse, frames[::-1])
+        reverse = list(xdatcar.iter_frames(_n_frames - 1, None, -2, 2))
+        assert np.allclose(reverse, frames[::-2])
+        assert np.allclose(xdatcar.read_frames(step=-1), frames[::-1])
+        with pytest.raises(IndexError):
+            xdatcar.read_frame(_n_frames)
+    assert os.path.exists(xdatcar.index_path)
+    # the persisted index is reused while the file is unchanged
+    cached = XdatcarFile(path)
+    with cached:
+        assert cached.n_frames == _n_frames
+        assert np.allclose(cached.read_frames(), frames)
+    os.remove(xdatcar.index_path)
+    os.remove(path)
+
+
+def test_xdatcar_file_variable_cell():
+    """Tests indexed frame access of a variable cell XDATCAR file."""
+    path = "test.XDATCAR"
+    _write_xdatcar(path, variable_cell=True)
+    xdatcar = XdatcarFile(path, persist_index=False)
+    with xdatcar:
+        assert xdatcar.variable_cell
+        assert xdatcar.lattices.shape == (_n_frames, 3, 3)
+        assert xdatcar.lattices[3, 1, 1] == pytest.approx(3.3)
+        frames = xdatcar.read_frames(step=2)
+        assert frames.shape == (3, 3, 3)
+        assert np.allclose(frames[1], _positions(2))
+    assert not os.path.exists(xdatcar.index_path)
+    os.remove(path)
@@ -1,41 +1,131 @@
+import glob
 import matplotlib.pyplot as plt
 from cmstk.eam import SetflFile
-from typing import Tuple
+import multiprocessing
+import numpy as np
+import os
+from typing import List, Optional, Tuple
 
 
-def setfl_profile_plot(setfl: SetflFile) -> Tuple[plt.Figure, plt.Axes]:
+def setfl_profile_plot(
+        setfl: SetflFile,
+        max_points: Optional[int] = None) -> Tuple[plt.Figure, plt.Axes]:
     """Prepares a plot displaying the attributes of an EAM potential.
 
     Args:
         setfl: SetflFile object to pull EAM information from.
+        max_points: Maximum number of points to draw for each curve.
+        - Curves are decimated by keeping the minimum and maximum of each
+          bucket so that spikes and wells survive the reduction.
+        - Must be at least 2.
+        - Defaults to drawing every tabulated point.
+
+    Raises:
+        ValueError
+        - `max_points` is less than 2.
     """
     fig, axes = plt.subplots(nrows=1, ncols=3)
+    rho = setfl.d_rho * np.arange(1, setfl.n_rho + 1)
+    r = setfl.d_r * np.arange(1, setfl.n_r + 1)
     # plot the embedding function for each symbol
     for s in setfl.symbols:
-        embedding_y = setfl.embedding_function[s]
-        embedding_x = [setfl.d_rho * (i + 1) for i in range(setfl.n_rho)]
-        axes[0].plot(embedding_x, embedding_y, label=s)
-        axes[0].legend()
-        axes[0].set_xlabel("Electron Density")
-        axes[0].set_ylabel("Energy (eV)")
-        axes[0].set_title("Embedding Function")
+        x, y = _decimate(rho, setfl.embedding_function[s], max_points)
+        axes[0].plot(x, y, label=s)
+    axes[0].legend()
+    axes[0].set_xlabel("Electron Density")
+    axes[0].set_ylabel("Energy (eV)")
+    axes[0].set_title("Embedding Function")
     # plot the density function for each symbol
     for s in setfl.symbols:
-        density_y = setfl.density_function[s]
-        density_x = [setfl.d_r * (i + 1) for i in range(setfl.n_r)]
-        axes[1].plot(density_x, density_y, label=s)
-        axes[1].legend()
-        axes[1].set_xlabel("Distance (Angstroms)")
-        axes[1].set_ylabel("Electron Density")
-        axes[1].set_title("Density Function")
+        x, y = _decimate(r, setfl.density_function[s], max_points)
+        axes[1].plot(x, y, label=s)
+    axes[1].legend()
+    axes[1].set_xlabel("Distance (Angstroms)")
+    axes[1].set_ylabel("Electron Density")
+    axes[1].set_title("Density Function")
     # plot the pair function for each pair
     for sp in setfl.symbol_pairs:
-        potential_y = setfl.pair_function[sp]
-        potential_x = [setfl.d_r * (i + 1) for i in range(setfl.n_r)]
-        axes[2].plot(potential_x, potential_y, label=sp)
-        axes[2].legend()
-        axes[2].set_xlabel("Distance (Angstroms)")
-        axes[2].set_ylabel("Energy (eV)")
-        axes[2].set_title("Pair Function")
+        x, y = _decimate(r, setfl.pair_function[sp], max_points)
+        axes[2].plot(x, y, label=sp)
+    axes[2].legend()
+    axes[2].set_xlabel("Distance (Angstroms)")
+    axes[2].set_ylabel("Energy (eV)")
+    axes[2].set_title("Pair Function")
     fig.tight_layout(pad=1.0)
     return (fig, axes)
+
+
+def setfl_profile_plot_directory(directory: str,
+                                 output_directory: Optional[str] = None,
+                                 pattern: str = "*.eam.alloy",
+                                 max_points: Optional[int] = 2000,
+                                 processes: Optional[int] = None) -> List[str]:
+    """Renders a profile plot for every setfl file in a directory in parallel.
+
+    Args:
+        directory: Directory to search for setfl files.
+        output_directory: Directory to save the figures in.
+        - Defaults to `directory`.
+        pattern: Glob pattern matching the setfl files.
+        max_points: Maximum number of points to draw for each curve.
+        - Must be at least 2.
+        processes: Number of worker processes.
+        - Defaults to the number of available cores.
+
+    Returns:
+        Filepaths of the saved figures in the order of the sorted inputs.
+
+    Raises:
+        ValueError
+        - `max_points` is less than 2.
+    """
+    _check_max_points(max_points)
+    if output_directory is None:
+        output_directory = directory
+    paths = sorted(glob.glob(os.path.join(directory, pattern)))
+    tasks = []
+    for path in paths:
+        filename = "{}.png".format(os.path.basename(path))
+        tasks.append((path, os.path.join(output_directory, filename),
+                      max_points))
+    with multiprocessing.Pool(processes) as pool:
+        return pool.map(_render_profile, tasks)
+
+
+def _render_profile(task: Tuple[str, str, Optional[int]]) -> str:
+    path, figure_path, max_points = task
+    setfl = SetflFile(path)
+    with setfl:
+        fig, _ = setfl_profile_plot(setfl, max_points)
+        fig.savefig(figure_path)
+        plt.close(fig)
+    return figure_path
+
+
+def _decimate(x: np.ndarray, y: np.ndarray,
+              max_points: Optional[int]) -> Tuple[np.ndarray, np.ndarray]:
+    # keep the extrema of equally sized buckets in their original order
+    _check_max_points(max_points)
+    y = np.asarray(y, dtype=float)
+    if max_points is None or len(y) <= max_points:
+        return x, y
+    n_buckets = max_points // 2
+    bucket_size = int(np.ceil(len(y) / n_buckets))
+    n_buckets = int(np.ceil(len(y) / bucket_size))
+    padded = np.full(n_buckets * bucket_size, np.nan)
+    padded[:len(y)] = y
+    buckets = padded.reshape((n_buckets, bucket_size))
+    lows = np.argmin(np.where(np.isnan(buckets), np.inf, buckets), axis=1)
+    highs = np.argmax(np.where(np.isnan(buckets), -np.inf, buckets), axis=1)
+    offsets = np.arange(n_buckets) * bucket_size
+    index = np.sort(np.stack((lows, highs), axis=1), axis=1)
+    index = (index + offsets[:, np.newaxis]).ravel()
+    index = index[index < len(y)]
+    return x[index], y[index]
+
+
+def _check_max_points(max_points: Optional[int]) -> None:
+    # each bucket contributes its minimum and maximum
+    if max_points is not None and max_points < 2:
+        err = "max_points must be at least 2."
+        raise ValueError(err)
@@ -0,0 +1,34 @@
+from cmstk.visualization.potential import _decimate
+import numpy as np
+import pytest
+
+
+def test_decimate():
+    """Tests reducing a profile to the extrema of each bucket."""
+    x = np.linspace(0.0, 10.0, 1001)
+    y = np.sin(x * 7.0) + np.cos(x * 3.0)
+    for max_points in [2, 3, 10, 100, 999]:
+        xd, yd = _decimate(x, y, max_points)
+        assert len(yd) <= max_points
+        assert np.array_equal(np.diff(xd) > 0, np.ones(len(xd) - 1, bool))
+        # the extrema of each bucket survive in their original order
+        bucket_size = int(np.ceil(len(y) / max(max_points // 2, 1)))
+        for start in range(0, len(y), bucket_size):
+            bucket = y[start:start + bucket_size]
+            assert bucket.min() in yd
+            assert bucket.max() in yd
+        assert yd.min() == y.min()
+        assert yd.max() == y.max()
+    # short profiles and a missing limit are returned unchanged
+    xd, yd = _decimate(x[:10], y[:10], 10)
+    assert np.array_equal(xd, x[:10])
+    assert np.array_equal(yd, y[:10])
+    xd, yd = _decimate(x, y, None)
+    assert np.array_equal(xd, x)
+    assert np.array_equal(yd, y)
+    # a single point cannot hold the extrema of a bucket
+    for max_points in [0, 1]:
+        with pytest.raises(ValueError):
+            _decimate(x, y, max_points)
+        with pytest.raises(ValueError):
+            _decimate(x[:1], y[:1], max_points)
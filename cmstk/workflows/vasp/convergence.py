@@ -1,5 +1,5 @@
-from cmstk.vasp.incar import IncarFile, EncutTag
-from cmstk.vasp.kpoints import KpointsFile
+from cmstk.vasp.incar import IncarFile
+from cmstk.vasp.kpoints import KpointsFile, meshes_from_densities
 from cmstk.vasp.poscar import PoscarFile
 from cmstk.vasp.potcar import PotcarFile
 from cmstk.hpc.util import BaseSubmissionScript
@@ -31,21 +31,13 @@ def converge_encut(
     if calc_dir is None:
         calc_dir = os.getcwd()
     for encut in encut_values:
-        new_tags = []
-        has_encut = False
-        for tag in incar.tags:
-            if tag.name == "ENCUT":
-                has_encut = True
-                tag.value = encut
-            new_tags.append(tag)
-        if not has_encut:
-            new_tags.append(EncutTag(encut))
-        incar.tags = new_tags
+        variant = incar.copy(ENCUT=encut)
         dirname = "{}eV".format(encut)
         path = os.path.join(calc_dir, dirname)
         if not os.path.exists(path):
             os.makedirs(path)
-        write_input_files(path, incar, kpoints, poscar, potcar, submission_script)
+        write_input_files(path, variant, kpoints, poscar, potcar,
+                          submission_script)
         start_calculation(path, submission_script)
 
 
@@ -79,3 +71,37 @@ def converge_kpoints(
             os.makedirs(path)
         write_input_files(path, incar, kpoints, poscar, potcar, submission_script)
         start_calculation(path, submission_script)
+
+
+def converge_kpoint_density(
+    densities: List[float],
+    incar: IncarFile,
+    kpoints: KpointsFile,
+    poscar: PoscarFile,
+    potcar: PotcarFile,
+    submission_script: BaseSubmissionScript,
+    calc_dir: Optional[str] = None,
+) -> List[Tuple[int, int, int]]:
+    """Starts a KPOINTS convergence calculation from k-point densities.
+
+    Notes:
+        Densities which produce the same mesh as a lower density are skipped.
+
+    Args:
+        densities: The k-point densities to test in k-points per reciprocal
+            Angstrom along each reciprocal lattice vector.
+        incar: The vasp INCAR file.
+        kpoints: The vasp KPOINTS file.
+        poscar: The vasp POSCAR file.
+        potcar: The vasp POTCAR file.
+        submission_script: The hpc submission script.
+        calc_dir: The directory in which to execute the calculation.
+
+    Returns:
+        The KPOINT mesh sizes which were started.
+    """
+    meshes = meshes_from_densities(poscar.simulation_cell, densities,
+                                   poscar.scaling_factor)
+    converge_kpoints(meshes, incar, kpoints, poscar, potcar, submission_script,
+                     calc_dir)
+    return meshes
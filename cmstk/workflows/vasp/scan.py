@@ -0,0 +1,150 @@
+from cmstk.vasp.oszicar import OszicarFile
+from cmstk.vasp.outcar import OutcarFile
+from cmstk.vasp.vasprun import query_vasprun
+import multiprocessing
+import numpy as np
+import os
+import re
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+_Parser = Callable[[str], Dict[str, Any]]
+
+
+def _parse_vasprun(path: str) -> Dict[str, Any]:
+    results = query_vasprun(path, ["fermi_energy", "final_energy"])
+    return {
+        "energy": results["final_energy"]["e_fr_energy"],
+        "fermi_energy": results["fermi_energy"]
+    }
+
+
+def _parse_outcar(path: str) -> Dict[str, Any]:
+    outcar = OutcarFile(path)
+    forces = outcar.final_position_force[:, 3:]
+    return {
+        "energy": outcar.final_free_energy["TOTEN"],
+        "max_force": float(np.linalg.norm(forces, axis=1).max(initial=0.0))
+    }
+
+
+def _parse_oszicar(path: str) -> Dict[str, Any]:
+    values = OszicarFile(path).final_values
+    return {"energy": values["F"], "n_ionic_steps": int(values["step"])}
+
+
+# parser of each file which identifies a run directory
+# - (filename, parser)
+# - files are tried in order and the first one which parses fills the row
+# - parsers return the columns they contribute to the table
+RUN_FILE_PARSERS: List[Tuple[str, _Parser]] = [
+    ("vasprun.xml", _parse_vasprun),
+    ("OUTCAR", _parse_outcar),
+    ("OSZICAR", _parse_oszicar),
+]
+
+# every column of the result table and the value of a missing entry
+RESULT_COLUMNS: Dict[str, Any] = {
+    "directory": "",
+    "status": "",
+    "source": "",
+    "error": "",
+    "encut": np.nan,
+    "kpoint_mesh": (0, 0, 0),
+    "energy": np.nan,
+    "fermi_energy": np.nan,
+    "max_force": np.nan,
+    "n_ionic_steps": -1,
+}
+
+# directory names written by `cmstk.workflows.vasp.convergence`
+_encut_pattern = re.compile(r"^(\d+)eV$")
+_mesh_pattern = re.compile(r"^(\d+)x(\d+)x(\d+)$")
+
+
+def scan_run_directories(
+        root: str,
+        processes: Optional[int] = None,
+        chunk_size: Optional[int] = None,
+        parsers: Optional[List[Tuple[str, _Parser]]] = None
+) -> Dict[str, np.ndarray]:
+    """Collects the results of every VASP run directory below a directory.
+
+    Notes:
+        A run directory is any directory which contains one of the files in
+        `parsers`. Directories are parsed in parallel and are sent to the
+        worker processes `chunk_size` at a time so that the cost of
+        dispatching a task is shared by many small directories.
+
+        Each row records whether the directory was parsed ("ok"), whether
+        every parser failed ("failed", with the last error message) and the
+        file which filled the row. The ENCUT and k-point mesh are read from
+        directory names of the form "<encut>eV" and "AxBxC".
+
+    Args:
+        root: Directory to search for run directories.
+        processes: Number of worker processes.
+        - Defaults to the number of available cores.
+        - Directories are parsed in the calling process if this is 1.
+        chunk_size: Number of directories sent to a worker at a time.
+        - Defaults to an even split of four chunks per worker.
+        parsers: Table of (filename, parser) rows.
+        - Defaults to `RUN_FILE_PARSERS`.
+
+    Returns:
+        Each column of `RESULT_COLUMNS` with a row for each run directory.
+        - Rows are in the order of the sorted directory paths.
+    """
+    if parsers is None:
+        parsers = RUN_FILE_PARSERS
+    filenames = set(filename for filename, _ in parsers)
+    directories = []
+    for directory, _, files in os.walk(root):
+        if not filenames.isdisjoint(files):
+            directories.append(directory)
+    directories.sort()
+    tasks = [(directory, parsers) for directory in directories]
+    if processes == 1:
+        rows = [_scan_directory(task) for task in tasks]
+    else:
+        if processes is None:
+            processes = os.cpu_count() or 1
+        if chunk_size is None:
+            chunk_size = max(len(tasks) // (4 * processes), 1)
+        with multiprocessing.Pool(processes) as pool:
+            rows = pool.map(_scan_directory, tasks, chunk_size)
+    columns = {}
+    for name, default in RESULT_COLUMNS.items():
+        default = np.asarray(default)
+        if len(rows) == 0:
+            columns[name] = np.zeros((0, ) + default.shape, default.dtype)
+        else:
+            columns[name] = np.array([row.get(name, default) for row in rows])
+    return columns
+
+
+def _scan_directory(
+        task: Tuple[str, List[Tuple[str, _Parser]]]) -> Dict[str, Any]:
+    directory, parsers = task
+    row: Dict[str, Any] = {"directory": directory, "status": "failed"}
+    name = os.path.basename(os.path.normpath(directory))
+    match = _encut_pattern.match(name)
+    if match is not None:
+        row["encut"] = float(match.group(1))
+    match = _mesh_pattern.match(name)
+    if match is not None:
+        row["kpoint_mesh"] = tuple(int(n) for n in match.groups())
+    for filename, parser in parsers:
+        path = os.path.join(directory, filename)
+        if not os.path.exists(path):
+            continue
+        try:
+            row.update(parser(path))
+        except Exception as e:
+            # a truncated file falls back to the next parser
+            row["error"] = "{}: {}".format(filename, e)
+            continue
+        row["status"] = "ok"
+        row["source"] = filename
+        row["error"] = ""
+        break
+    return row
@@ -0,0 +1,119 @@
+from cmstk.workflows.vasp.scan import RESULT_COLUMNS, scan_run_directories
+import numpy as np
+import os
+import shutil
+
+_oszicar = """       N       E                     dE             d eps       ncg     rms          rms(c)
+DAV:   1     0.138E+03    0.138E+03   -0.115E+04  1064   0.116E+03
+DAV:   2    -0.136E+03   -0.274E+03   -0.250E+03  1064   0.228E+02
+   1 F= -.13644212E+03 E0= -.13644801E+03  d E =-.136442E+03  mag=     2.1
+DAV:   1    -0.136E+03   -0.186E-01   -0.120E+01  1064   0.150E+01
+   2 F= {} E0= -.13644801E+03  d E =-.136442E+03  mag=     2.1
+"""
+
+# an electronic step and the results of an ionic step as written by VASP
+_outcar_electronic_step = """ Free energy of the ion-electron system (eV)
+  ---------------------------------------------------
+  alpha Z        PSCENC =       222.26498670
+  Ewald energy   TEWEN  =     -3635.18175209
+  -Hartree energ DENC   =     -1080.09667853
+  -exchange      EXHF   =         0.00000000
+  -V(xc)+E(xc)   XCENC  =       140.97654125
+  PAW double counting   =      2709.27565706    -2713.81111219
+  entropy T*S    EENTRO =        -0.00248741
+  eigenvalues    EBANDS =      -393.82985341
+  atomic energy  EATOM  =      4914.77660278
+  Solvation  Ediel_sol  =         0.00000000
+  ---------------------------------------------------
+  free energy    TOTEN  =       {0} eV
+
+  energy without entropy =      {0}  energy(sigma->0) =      {0}
+
+"""
+_outcar_ionic_step = """ POSITION                                       TOTAL-FORCE (eV/Angst)
+ -----------------------------------------------------------------------------------
+      0.00000      0.00000      0.00000         0.000000      0.000000     -{1}
+      1.43325      1.43325      1.43325         0.000000      0.000000      {1}
+ -----------------------------------------------------------------------------------
+    total drift:                                0.000000      0.000000      0.000000
+
+--------------------------------------------------------------------------------------------------------
+
+  FREE ENERGIE OF THE ION-ELECTRON SYSTEM (eV)
+  ---------------------------------------------------
+  free  energy   TOTEN  =       {0} eV
+
+  energy  without entropy=      {0}  energy(sigma->0) =      {0}
+
+"""
+
+
+def _write_outcar(path, steps):
+    # each ionic step is (energy, force) and has two electronic steps
+    with open(path, "w") as f:
+        for energy, force in steps:
+            f.write(_outcar_electronic_step.format(energy + 1.0))
+            f.write(_outcar_electronic_step.format(energy))
+            f.write(_outcar_ionic_step.format(energy, force))
+
+
+def _write_run(directory, energy, vasprun=None):
+    os.makedirs(directory)
+    with open(os.path.join(directory, "OSZICAR"), "w") as f:
+        f.write(_oszicar.format(energy))
+    if vasprun is not None:
+        with open(os.path.join(directory, "vasprun.xml"), "w") as f:
+            f.write(vasprun)
+
+
+def test_scan_run_directories():
+    """Tests collecting the results of a tree of run directories."""
+    root = "test_scan"
+    _write_run(os.path.join(root, "encut", "400eV"), -136.0)
+    _write_run(os.path.join(root, "encut", "500eV"), -137.0)
+    # a truncated vasprun.xml falls back to the OSZICAR
+    _write_run(os.path.join(root, "kpoints", "4x4x2"), -138.0, "<modeling>")
+    os.makedirs(os.path.join(root, "broken"))
+    with open(os.path.join(root, "broken", "OUTCAR"), "w") as f:
+        f.write("nothing to see here\n")
+    os.makedirs(os.path.join(root, "empty"))
+    # an OUTCAR without an OSZICAR reports its last complete ionic step
+    os.makedirs(os.path.join(root, "outcar"))
+    _write_outcar(os.path.join(root, "outcar", "OUTCAR"),
+                  [(-139.0, 0.5), (-140.0, 0.25)])
+    with open(os.path.join(root, "outcar", "OUTCAR"), "a") as f:
+        f.write(_outcar_electronic_step.format(-141.0))
+    for processes in [1, 2]:
+        table = scan_run_directories(root, processes, chunk_size=1)
+        assert sorted(table) == sorted(RESULT_COLUMNS)
+        assert [os.path.relpath(d, root) for d in table["directory"]] == [
+            "broken",
+            os.path.join("encut", "400eV"),
+            os.path.join("encut", "500eV"),
+            os.path.join("kpoints", "4x4x2"),
+            "outcar",
+        ]
+        assert list(table["status"]) == ["failed", "ok", "ok", "ok", "ok"]
+        assert list(table["source"]) == [
+            "", "OSZICAR", "OSZICAR", "OSZICAR", "OUTCAR"
+        ]
+        assert table["error"][0].startswith("OUTCAR")
+        assert table["error"][3] == ""
+        assert table["error"][4] == ""
+        assert np.allclose(table["energy"][1:],
+                           [-136.0, -137.0, -138.0, -140.0])
+        assert np.isnan(table["energy"][0])
+        assert table["max_force"][4] == 0.25
+        assert np.isnan(table["max_force"][1])
+        assert list(table["n_ionic_steps"]) == [-1, 2, 2, 2, -1]
+        assert table["encut"][2] == 500.0
+        assert np.isnan(table["encut"][3])
+        assert np.array_equal(table["kpoint_mesh"][3], [4, 4, 2])
+    shutil.rmtree(os.path.join(root, "broken"))
+    shutil.rmtree(os.path.join(root, "encut"))
+    shutil.rmtree(os.path.join(root, "kpoints"))
+    shutil.rmtree(os.path.join(root, "outcar"))
+    table = scan_run_directories(root, 1)
+    assert table["kpoint_mesh"].shape == (0, 3)
+    assert len(table["energy"]) == 0
+    shutil.rmtree(root)
@@ -15,7 +15,7 @@ if __name__ == "__main__":
     path = os.path.join(data_directory(), "potentials", "Zhou-Pd-H-2008.eam.alloy")
     setfl = SetflFile(path)
     setfl.load()
-    fig, axes = setfl_profile_plot(setfl)
+    fig, axes = setfl_profile_plot(setfl, max_points=2000)
 
     # customize the plot
     axes[0].set_xlim((0.0, 50.0))